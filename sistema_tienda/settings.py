@@ -41,11 +41,13 @@ INSTALLED_APPS = [
     'django.contrib.humanize',
     'crispy_forms',
     'crispy_bootstrap5',
+    'django_select2',  # Archivos estáticos de los widgets Select2 (combobox con AJAX)
 ]
 
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 MIDDLEWARE = [
+    "tienda.middleware.InstrumentacionMiddleware",  # Primero: su tiempo total incluye a los demás
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,6 +69,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "tienda.context_processors.permisos",  # {{ permisos }} precalculado en todos los templates
             ],
         },
     },
@@ -98,6 +101,41 @@ DATABASES = {
 }
 
 
+# Caché (memoria local por defecto; en producción con varios procesos conviene un backend
+# compartido como Redis o Memcached para que la invalidación llegue a todos los procesos)
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tienda',
+    }
+}
+
+# Segundos que se guarda en caché el rol de cada usuario (se invalida al guardar el perfil)
+TIENDA_ROLES_CACHE_SEGUNDOS = 300
+
+# Segundos que se guarda en caché la serie JSON de cada gráfica por rango de fechas
+TIENDA_GRAFICAS_CACHE_SEGUNDOS = 300
+
+# Segundos que se guardan en caché los contadores del dashboard (se ajustan con señales)
+TIENDA_CONTADORES_CACHE_SEGUNDOS = 600
+
+# Segundos que se guardan en caché las sugerencias de los combobox de clientes y productos
+TIENDA_AUTOCOMPLETAR_CACHE_SEGUNDOS = 30
+
+# Procesos con los que se calculan por mes los reportes de periodos largos (1 = sin procesos extra).
+# En el servidor de reportes conviene el número de núcleos
+TIENDA_REPORTE_PROCESOS = 1
+
+# Instrumentación por petición (Server-Timing y estadísticas por ruta en /dashboard/rendimiento/)
+TIENDA_INSTRUMENTACION = True
+# Veces que una misma sentencia SQL debe repetirse en una petición para reportarla como posible N+1
+TIENDA_INSTRUMENTACION_REPETIDAS = 3
+# Latencias recientes que se guardan por ruta para calcular percentiles
+TIENDA_INSTRUMENTACION_MUESTRAS = 500
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
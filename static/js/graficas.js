@@ -0,0 +1,53 @@
+/* static/js/graficas.js */
+/* Dibuja gráficas de barras en SVG a partir de una serie JSON:
+   {"titulo": "...", "etiqueta_valor": "...", "etiquetas": [...], "valores": [...]}
+   Uso: <div class="grafica-barras" data-grafica-url="/ventas/reporte/grafica/?..."></div> */
+(function () {
+    'use strict';
+
+    var SVG = 'http://www.w3.org/2000/svg';
+    var ALTO_BARRA = 28;      // Alto de cada barra (px)
+    var SEPARACION = 10;      // Espacio entre barras (px)
+    var ANCHO_ETIQUETA = 160; // Espacio reservado para el nombre del producto (px)
+
+    function elemento(nombre, atributos, texto) {
+        var nodo = document.createElementNS(SVG, nombre);
+        Object.keys(atributos).forEach(function (clave) { nodo.setAttribute(clave, atributos[clave]); });
+        if (texto !== undefined) { nodo.textContent = texto; }
+        return nodo;
+    }
+
+    function dibujar(contenedor, serie) {
+        if (!serie.valores.length) {
+            contenedor.textContent = 'Sin datos para graficar';
+            return;
+        }
+        var ancho = contenedor.clientWidth || 500;
+        var maximo = Math.max.apply(null, serie.valores) || 1;
+        var anchoBarras = ancho - ANCHO_ETIQUETA - 50;
+        var alto = serie.valores.length * (ALTO_BARRA + SEPARACION) + 30;
+
+        var svg = elemento('svg', { width: ancho, height: alto, role: 'img', 'aria-label': serie.titulo });
+        svg.appendChild(elemento('text', { x: 0, y: 16, 'font-weight': 'bold' }, serie.titulo));
+
+        serie.valores.forEach(function (valor, i) {
+            var y = 30 + i * (ALTO_BARRA + SEPARACION);
+            var largo = Math.max(2, anchoBarras * valor / maximo);
+            var barra = elemento('rect', { x: ANCHO_ETIQUETA, y: y, width: largo, height: ALTO_BARRA, fill: '#0d6efd', rx: 3 });
+            barra.appendChild(elemento('title', {}, serie.etiquetas[i] + ': ' + valor + ' (' + serie.etiqueta_valor + ')'));
+            svg.appendChild(barra);
+            svg.appendChild(elemento('text', { x: ANCHO_ETIQUETA - 6, y: y + ALTO_BARRA / 2 + 4, 'text-anchor': 'end', 'font-size': 12 },
+                serie.etiquetas[i].length > 24 ? serie.etiquetas[i].slice(0, 23) + '…' : serie.etiquetas[i]));
+            svg.appendChild(elemento('text', { x: ANCHO_ETIQUETA + largo + 6, y: y + ALTO_BARRA / 2 + 4, 'font-size': 12 }, valor));
+        });
+
+        contenedor.replaceChildren(svg);
+    }
+
+    document.querySelectorAll('[data-grafica-url]').forEach(function (contenedor) {
+        fetch(contenedor.dataset.graficaUrl, { credentials: 'same-origin' })
+            .then(function (respuesta) { return respuesta.json(); })
+            .then(function (serie) { dibujar(contenedor, serie); })
+            .catch(function () { contenedor.textContent = 'No se pudo cargar la gráfica'; });
+    });
+})();
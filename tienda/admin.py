@@ -1,8 +1,13 @@
 # tienda/admin.py
 # Importamos el módulo admin de Django para registrar modelos
 from django.contrib import admin
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.template.response import TemplateResponse
 # Importamos todos nuestros modelos
 from .models import Categoria, Producto, Proveedor, Cliente, PerfilUsuario
+from .forms import AjusteMasivoForm
+from .operaciones import ajustar_productos
+from .busqueda import ids_coincidentes
 
 
 # ============ CONFIGURACIÓN DEL ADMIN PARA PERFILES DE USUARIO ============
@@ -20,7 +25,7 @@ class PerfilUsuarioAdmin(admin.ModelAdmin):
 @admin.register(Categoria)  # Decorador que registra el modelo Categoria
 class CategoriaAdmin(admin.ModelAdmin):
     """Configuración personalizada del admin para Categorías"""
-    list_display = ('id', 'nombre', 'fecha_creacion')  # Columnas que se muestran en la lista
+    list_display = ('id', 'nombre', 'total_productos', 'productos_activos', 'fecha_creacion')  # Columnas que se muestran en la lista
     search_fields = ('nombre',)  # Campos por los que se puede buscar
     list_filter = ('fecha_creacion',)  # Filtros laterales
     ordering = ('nombre',)  # Orden por defecto
@@ -31,18 +36,52 @@ class CategoriaAdmin(admin.ModelAdmin):
 class ProductoAdmin(admin.ModelAdmin):
     """Configuración personalizada del admin para Productos"""
     list_display = ('id', 'nombre', 'categoria', 'precio', 'stock', 'activo', 'fecha_creacion')  # Columnas visibles
-    search_fields = ('nombre', 'descripcion')  # Búsqueda por nombre o descripción
+    search_fields = ('nombre', 'descripcion')  # Muestra la caja de búsqueda (ver get_search_results)
     list_filter = ('categoria', 'activo', 'fecha_creacion')  # Filtros por categoría, estado y fecha
     list_editable = ('precio', 'stock', 'activo')  # Campos editables directamente en la lista
     ordering = ('-fecha_creacion',)  # Orden descendente por fecha
-    filter_horizontal = ('proveedores',) 
+    autocomplete_fields = ('proveedores',)  # Busca proveedores con AJAX (paginado) en lugar de listarlos todos
+    actions = ['ajuste_masivo']
+
+    def get_search_results(self, request, queryset, search_term):
+        """Usa el índice de búsqueda (tienda.busqueda) en lugar de icontains sobre toda la tabla"""
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(id__in=ids_coincidentes(search_term)), False
+
+    @admin.action(description='Ajustar precio o stock de los productos seleccionados')
+    def ajuste_masivo(self, request, queryset):
+        """Acción con página intermedia: vista previa y después un solo UPDATE sobre la selección"""
+        form = AjusteMasivoForm(request.POST if 'accion' in request.POST else None)
+        resultado = None
+        if form.is_valid():
+            simular = request.POST['accion'] != 'aplicar'
+            resultado = ajustar_productos(queryset.order_by(), simular=simular, **form.cleaned_data)
+            if not simular:
+                self.message_user(request, f'{resultado["afectados"]} productos actualizados')
+                return None  # Regresa a la lista de productos
+
+        return TemplateResponse(request, 'admin/tienda/producto/ajuste_masivo.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Ajuste masivo de precio o stock',
+            'opts': self.model._meta,
+            'form': form,
+            'resultado': resultado,
+            'total_seleccionados': queryset.count(),
+            # Con "seleccionar todos" Django reconstruye la selección a partir de los filtros
+            'seleccionar_todos': request.POST.get('select_across') == '1',
+            'seleccionados': request.POST.getlist(ACTION_CHECKBOX_NAME),
+            'action_checkbox_name': ACTION_CHECKBOX_NAME,
+        })
 
 # ============ CONFIGURACIÓN DEL ADMIN PARA PROVEEDORES ============
 @admin.register(Proveedor)
 class ProveedorAdmin(admin.ModelAdmin):
     """Configuración personalizada del admin para Proveedores"""
     list_display = ('id', 'nombre', 'empresa', 'telefono', 'email', 'fecha_registro')
-    search_fields = ('nombre', 'empresa', 'email')  # Búsqueda por nombre, empresa o email
+    # Búsqueda por prefijo (^ = istartswith) de nombre, empresa o email: usa los índices,
+    # también en el autocompletar de proveedores del producto
+    search_fields = ('^nombre', '^empresa', '^email')
     list_filter = ('fecha_registro',)
     ordering = ('empresa',)
 
@@ -0,0 +1,136 @@
+# tienda/analitica.py
+# Estadísticas de las ventas de un periodo calculadas en memoria con NumPy:
+# una sola lectura de columnas (values_list) y después operaciones vectorizadas.
+# NumPy es una dependencia opcional (no está en requirements.txt, como openpyxl): este
+# módulo solo lo importan benchmark_analitica y sus pruebas, nunca una vista al arrancar.
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+from .models import Venta
+
+TAMANO_LOTE = 20000  # Filas que se convierten a arreglos a la vez (acota la memoria de tuplas)
+
+# Columna -> tipo del arreglo. Los importes van en centavos (int64): las sumas son exactas
+COLUMNAS = {
+    'id': np.int64,
+    'producto': np.int64,
+    'cliente': np.int64,
+    'cantidad': np.int64,
+    'centavos': np.int64,
+    'epoch': np.int64,
+}
+
+
+def cargar_ventas(inicio, fin, lote=TAMANO_LOTE):
+    """
+    Columnas de las ventas del rango [inicio, fin) como arreglos de NumPy:
+        {'id', 'producto', 'cliente', 'cantidad', 'centavos', 'epoch'}
+    Un solo SELECT leído por lotes con iterator(); el total se convierte a centavos en la BD
+    (sin crear un Decimal por fila) y la fecha a segundos epoch (UTC).
+    """
+    filas = (
+        Venta.objects
+        .filter(fecha_venta__gte=inicio, fecha_venta__lt=fin)
+        .order_by()
+        .annotate(centavos=Cast(Round(F('total') * 100), BigIntegerField()))
+        .values_list('id', 'producto_id', 'cliente_id', 'cantidad', 'centavos', 'fecha_venta')
+        .iterator(chunk_size=lote)
+    )
+
+    partes = {columna: [] for columna in COLUMNAS}
+    pendientes = []
+
+    def convertir():
+        ids, productos, clientes, cantidades, centavos, fechas = zip(*pendientes)
+        for columna, valores in zip(COLUMNAS, (ids, productos, clientes, cantidades, centavos)):
+            partes[columna].append(np.fromiter(valores, dtype=COLUMNAS[columna], count=len(pendientes)))
+        partes['epoch'].append(np.fromiter((fecha.timestamp() for fecha in fechas), dtype=np.int64,
+                                           count=len(pendientes)))
+        pendientes.clear()
+
+    for fila in filas:
+        pendientes.append(fila)
+        if len(pendientes) >= lote:
+            convertir()
+    if pendientes:
+        convertir()
+
+    return {
+        columna: np.concatenate(arreglos) if arreglos else np.empty(0, dtype=COLUMNAS[columna])
+        for columna, arreglos in partes.items()
+    }
+
+
+def _pesos(centavos):
+    """Centavos (int64) a Decimal con dos decimales"""
+    return Decimal(int(centavos)).scaleb(-2)
+
+
+# ============ ESTADÍSTICAS ============
+def totales(ventas, percentiles=(50, 90, 99)):
+    """Número de ventas, unidades, ingresos, promedio por venta y percentiles del importe"""
+    centavos = ventas['centavos']
+    num_ventas = len(centavos)
+    if not num_ventas:
+        cero = Decimal('0.00')
+        return {'num_ventas': 0, 'unidades': 0, 'ingresos': cero, 'promedio': cero,
+                'percentiles': {p: cero for p in percentiles}}
+
+    ingresos = int(centavos.sum())
+    return {
+        'num_ventas': num_ventas,
+        'unidades': int(ventas['cantidad'].sum()),
+        'ingresos': _pesos(ingresos),
+        'promedio': (_pesos(ingresos) / num_ventas).quantize(Decimal('0.01')),
+        # method='lower': el percentil es siempre el importe de una venta real
+        'percentiles': {
+            p: _pesos(valor)
+            for p, valor in zip(percentiles, np.percentile(centavos, percentiles, method='lower'))
+        },
+    }
+
+
+def top(ventas, dimension='producto', orden='ingresos', limite=5):
+    """
+    Los `limite` productos/clientes con mayor `orden` (num_ventas, unidades o ingresos):
+    np.unique agrupa por id y bincount suma cada grupo; solo se ordenan los grupos, no las ventas.
+    Regresa diccionarios {clave, num_ventas, unidades, ingresos} como top_dimension.
+    """
+    claves, grupos = np.unique(ventas[dimension], return_inverse=True)
+    if not len(claves):
+        return []
+    metricas = {
+        'num_ventas': np.bincount(grupos, minlength=len(claves)),
+        'unidades': np.bincount(grupos, weights=ventas['cantidad'], minlength=len(claves)).astype(np.int64),
+        # Los pesos de bincount son float64: exactos mientras la suma no pase de 2**53 centavos
+        'ingresos': np.bincount(grupos, weights=ventas['centavos'], minlength=len(claves)).astype(np.int64),
+    }
+
+    # Mayor a menor; en empate, la clave menor primero (igual que ORDER BY -valor, clave)
+    elegidos = np.lexsort((claves, -metricas[orden]))[:limite]
+    return [
+        {
+            'clave': int(claves[i]),
+            'num_ventas': int(metricas['num_ventas'][i]),
+            'unidades': int(metricas['unidades'][i]),
+            'ingresos': _pesos(metricas['ingresos'][i]),
+        }
+        for i in elegidos
+    ]
+
+
+def histograma(ventas, intervalos=10):
+    """
+    Distribución del importe de las ventas en `intervalos` rangos del mismo ancho:
+    {'limites': [Decimal, ...] (intervalos + 1), 'conteos': [int, ...]}
+    """
+    if not len(ventas['centavos']):
+        return {'limites': [], 'conteos': []}
+    conteos, limites = np.histogram(ventas['centavos'], bins=intervalos)
+    return {
+        'limites': [_pesos(round(limite)) for limite in limites],
+        'conteos': conteos.tolist(),
+    }
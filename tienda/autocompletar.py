@@ -0,0 +1,138 @@
+# tienda/autocompletar.py
+# Sugerencias para los combobox con AJAX (Select2): clientes y productos (ventas/tickets)
+# y proveedores (formulario de producto)
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .busqueda import coincidencias, normalizar
+from .models import Cliente, Producto, Proveedor
+
+LIMITE = 20  # Sugerencias por página
+MINIMO_CARACTERES = 2  # Con menos letras el prefijo casi no filtra: no se consulta la BD
+MAXIMO_PALABRAS = 4
+MAXIMO_PAGINAS = 10  # 200 sugerencias: más allá conviene escribir más letras (y el OFFSET crece con la página)
+
+
+def _pagina(valor):
+    """Número de página que manda Select2 al hacer scroll (?page=2); 1 si falta o es inválido"""
+    try:
+        return max(int(valor), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _con_cache(tipo, texto, pagina, calcular):
+    """
+    Guarda la respuesta por unos segundos: mientras se escribe se repiten los mismos
+    prefijos (y varios vendedores buscan a los mismos clientes). Sin invalidación,
+    por eso la duración es corta. Después de MAXIMO_PAGINAS no se consulta la BD.
+    """
+    texto = ' '.join(texto.split())
+    if len(texto) < MINIMO_CARACTERES or pagina > MAXIMO_PAGINAS:
+        return {'results': [], 'more': False}
+
+    # 'Pérez', 'perez' y 'PEREZ' comparten entrada; el hash da claves válidas también en Memcached
+    resumen = hashlib.md5(normalizar(texto).encode()).hexdigest()
+    clave = f'tienda:autocompletar:{tipo}:{resumen}:{pagina}'
+    respuesta = cache.get(clave)
+    if respuesta is None:
+        respuesta = calcular(texto, pagina)
+        if pagina == MAXIMO_PAGINAS:
+            respuesta['more'] = False  # Select2 deja de pedir páginas
+        cache.set(clave, respuesta, getattr(settings, 'TIENDA_AUTOCOMPLETAR_CACHE_SEGUNDOS', 30))
+    return respuesta
+
+
+def _recortar(filas):
+    """Se pide una fila de más para saber si hay otra página sin hacer COUNT"""
+    return filas[:LIMITE], len(filas) > LIMITE
+
+
+# ============ CLIENTES ============
+def _calcular_clientes(texto, pagina):
+    # Cada palabra debe ser prefijo del nombre, del apellido o del correo ('ju pe' -> Juan Pérez).
+    # LIKE 'ju%' usa los índices de nombre/apellido/email (en MySQL la collation ya ignora
+    # mayúsculas y acentos), a diferencia de LIKE '%ju%', que recorre toda la tabla
+    filtro = Q()
+    for palabra in texto.split()[:MAXIMO_PALABRAS]:
+        filtro &= Q(apellido__istartswith=palabra) | Q(nombre__istartswith=palabra) | Q(email__istartswith=palabra)
+
+    desde = (pagina - 1) * LIMITE
+    filas = list(
+        Cliente.objects.filter(filtro)
+        .order_by('apellido', 'nombre', 'id')
+        .values_list('id', 'nombre', 'apellido', 'email')[desde:desde + LIMITE + 1]
+    )
+    filas, mas = _recortar(filas)
+    return {
+        'results': [
+            {'id': pk, 'text': f'{nombre} {apellido} ({email})'}
+            for pk, nombre, apellido, email in filas
+        ],
+        'more': mas,
+    }
+
+
+def autocompletar_clientes(texto, pagina=None):
+    """Respuesta en el formato de Select2: {'results': [{'id', 'text'}, ...], 'more': bool}"""
+    return _con_cache('clientes', texto or '', _pagina(pagina), _calcular_clientes)
+
+
+# ============ PRODUCTOS ============
+def _calcular_productos(texto, pagina):
+    # Se reutiliza el índice invertido de la búsqueda (cada palabra como prefijo de un término),
+    # ordenado por relevancia; solo productos activos, como en el ticket
+    filas = coincidencias(texto, Producto.objects.filter(activo=True))
+    if filas is None:
+        return {'results': [], 'more': False}
+
+    desde = (pagina - 1) * LIMITE
+    filas, mas = _recortar(list(filas.order_by('-puntaje', 'producto_id')[desde:desde + LIMITE + 1]))
+    ids = [fila['producto_id'] for fila in filas]
+    datos = {
+        pk: (nombre, precio, stock)
+        for pk, nombre, precio, stock in Producto.objects.filter(id__in=ids).values_list('id', 'nombre', 'precio', 'stock')
+    }
+    return {
+        'results': [
+            {'id': pk, 'text': f'{datos[pk][0]} - ${datos[pk][1]}', 'stock': datos[pk][2]}
+            for pk in ids if pk in datos
+        ],
+        'more': mas,
+    }
+
+
+def autocompletar_productos(texto, pagina=None):
+    """Igual que autocompletar_clientes, para los productos activos"""
+    return _con_cache('productos', texto or '', _pagina(pagina), _calcular_productos)
+
+
+# ============ PROVEEDORES ============
+def _calcular_proveedores(texto, pagina):
+    # Igual que en clientes: cada palabra es prefijo del nombre, la empresa o el correo
+    filtro = Q()
+    for palabra in texto.split()[:MAXIMO_PALABRAS]:
+        filtro &= Q(nombre__istartswith=palabra) | Q(empresa__istartswith=palabra) | Q(email__istartswith=palabra)
+
+    desde = (pagina - 1) * LIMITE
+    filas = list(
+        Proveedor.objects.filter(filtro)
+        .order_by('nombre', 'id')
+        .values_list('id', 'nombre', 'empresa')[desde:desde + LIMITE + 1]
+    )
+    filas, mas = _recortar(filas)
+    return {
+        'results': [
+            {'id': pk, 'text': f'{nombre} ({empresa})' if empresa else nombre}
+            for pk, nombre, empresa in filas
+        ],
+        'more': mas,
+    }
+
+
+def autocompletar_proveedores(texto, pagina=None):
+    """Igual que autocompletar_clientes, para el selector de proveedores del producto"""
+    return _con_cache('proveedores', texto or '', _pagina(pagina), _calcular_proveedores)
@@ -0,0 +1,222 @@
+# tienda/busqueda.py
+# Búsqueda de productos con índice invertido: tokenización en español, prefijos y relevancia
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, Value, When
+
+from .catalogo import codificar_cursor, consulta_catalogo, decodificar_cursor, TAMANO_PAGINA
+from .models import Producto, TerminoProducto
+
+# Peso de un término según el campo donde aparece (si aparece en varios se suman)
+PESOS = {
+    'nombre': 10,
+    'categoria': 4,
+    'proveedor': 3,
+    'descripcion': 1,
+}
+LONGITUD_MAXIMA = 40  # max_length de TerminoProducto.termino
+MAXIMO_TERMINOS_CONSULTA = 6  # Palabras de la búsqueda que se toman en cuenta
+
+# Palabras demasiado comunes que no aportan a la búsqueda
+PALABRAS_VACIAS = {
+    'a', 'al', 'con', 'de', 'del', 'e', 'el', 'en', 'la', 'las', 'lo', 'los', 'o', 'para',
+    'por', 'sin', 'su', 'sus', 'u', 'un', 'una', 'unos', 'unas', 'y',
+}
+
+PALABRA = re.compile(r'[a-z0-9]+')
+ALFABETO = '0123456789abcdefghijklmnopqrstuvwxyz'  # Caracteres posibles de un término, en orden
+
+
+# ============ TOKENIZACIÓN ============
+def normalizar(texto):
+    """Minúsculas y sin acentos: 'Pañales Ecológicos' -> 'panales ecologicos'"""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def raiz(palabra):
+    """Quita el plural más común en español para que 'pañales' y 'pañal' coincidan"""
+    if len(palabra) > 4 and palabra.endswith('es'):
+        return palabra[:-2]
+    if len(palabra) > 3 and palabra.endswith('s'):
+        return palabra[:-1]
+    return palabra
+
+
+def tokenizar(texto):
+    """Lista de términos (sin palabras vacías) en el orden en que aparecen"""
+    return [
+        raiz(palabra)[:LONGITUD_MAXIMA]
+        for palabra in PALABRA.findall(normalizar(texto))
+        if palabra not in PALABRAS_VACIAS
+    ]
+
+
+# ============ MANTENIMIENTO DEL ÍNDICE ============
+def terminos_de_productos(ids):
+    """{producto_id: {termino: peso}} leyendo los productos y sus relaciones en dos consultas"""
+    terminos = defaultdict(dict)
+
+    def agregar(producto_id, texto, campo):
+        for termino in set(tokenizar(texto)):
+            terminos[producto_id][termino] = terminos[producto_id].get(termino, 0) + PESOS[campo]
+
+    campos = ('id', 'nombre', 'descripcion', 'categoria__nombre')
+    for producto_id, nombre, descripcion, categoria in Producto.objects.filter(id__in=ids).values_list(*campos):
+        terminos.setdefault(producto_id, {})  # Productos sin ningún término también se limpian
+        agregar(producto_id, nombre, 'nombre')
+        agregar(producto_id, descripcion, 'descripcion')
+        agregar(producto_id, categoria, 'categoria')
+
+    Relacion = Producto.proveedores.through
+    relaciones = Relacion.objects.filter(producto_id__in=ids).values_list('producto_id', 'proveedor__nombre')
+    for producto_id, proveedor in relaciones:
+        agregar(producto_id, proveedor, 'proveedor')
+    return terminos
+
+
+def indexar_productos(ids, lote=1000):
+    """Vuelve a indexar los productos indicados (los que ya no existen solo se quitan del índice)"""
+    ids = list(ids)
+    for i in range(0, len(ids), lote):
+        grupo = ids[i:i + lote]
+        terminos = terminos_de_productos(grupo)
+        with transaction.atomic():
+            TerminoProducto.objects.filter(producto_id__in=grupo).delete()
+            TerminoProducto.objects.bulk_create([
+                TerminoProducto(producto_id=producto_id, termino=termino, peso=peso)
+                for producto_id, pesos in terminos.items()
+                for termino, peso in pesos.items()
+            ], batch_size=5000)
+
+
+def indexar_productos_de(productos, lote=1000):
+    """
+    Reindexa los productos de un queryset leyendo sus ids por lotes (WHERE id > ultimo),
+    sin cargar todos los ids de una categoría o proveedor grande a la vez
+    """
+    ultimo_id = 0
+    while True:
+        ids = list(productos.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True)[:lote])
+        if not ids:
+            return
+        indexar_productos(ids, lote=lote)
+        ultimo_id = ids[-1]
+
+
+def reindexar_todo(lote=1000):
+    """Reconstruye el índice completo; regresa el número de productos indexados"""
+    TerminoProducto.objects.all().delete()
+    ids = list(Producto.objects.order_by('id').values_list('id', flat=True))
+    indexar_productos(ids, lote=lote)
+    return len(ids)
+
+
+# ============ CONSULTA ============
+def siguiente_prefijo(prefijo):
+    """
+    Menor texto mayor que todos los que empiezan con `prefijo` ('abz' -> 'ac').
+    Sirve para buscar por prefijo como un rango (termino >= 'ab' AND termino < 'ac'),
+    que usa el índice en cualquier BD; LIKE 'ab%' no lo usa en SQLite (por el ESCAPE).
+    Regresa None si no hay límite superior ('zz').
+    """
+    caracteres = list(prefijo)
+    while caracteres:
+        posicion = ALFABETO.find(caracteres[-1])
+        if 0 <= posicion < len(ALFABETO) - 1:
+            caracteres[-1] = ALFABETO[posicion + 1]
+            return ''.join(caracteres)
+        caracteres.pop()
+    return None
+
+
+def con_prefijo(prefijo):
+    """Condición: el término empieza con `prefijo` (como rango del índice)"""
+    limite = siguiente_prefijo(prefijo)
+    if limite is None:
+        return Q(termino__gte=prefijo)
+    return Q(termino__gte=prefijo, termino__lt=limite)
+
+
+def coincidencias(texto, productos=None):
+    """
+    Queryset con (producto_id, puntaje) de los productos que contienen TODOS los términos
+    buscados; cada término se compara como prefijo ('refres' encuentra 'refresco').
+    El puntaje suma los pesos de los términos encontrados; una coincidencia exacta
+    vale el doble que una por prefijo. Regresa None si el texto no tiene términos.
+    """
+    terminos = list(dict.fromkeys(tokenizar(texto)))[:MAXIMO_TERMINOS_CONSULTA]
+    if not terminos:
+        return None
+
+    filtro = Q()
+    for termino in terminos:
+        filtro |= con_prefijo(termino)
+    filas = TerminoProducto.objects.filter(filtro)
+    if productos is not None:
+        filas = filas.filter(producto__in=productos)
+
+    # Un indicador por término buscado: el producto debe tenerlos todos (búsqueda AND)
+    indicadores = {
+        f't{i}': Max(Case(When(con_prefijo(termino), then=Value(1)), default=Value(0)))
+        for i, termino in enumerate(terminos)
+    }
+    puntaje = Sum(Case(
+        When(termino__in=terminos, then=F('peso') * 2),
+        default=F('peso'),
+        output_field=IntegerField(),
+    ))
+    return (
+        filas.values('producto_id')
+        .annotate(puntaje=puntaje, **indicadores)
+        .filter(**{nombre: 1 for nombre in indicadores})
+    )
+
+
+def ids_coincidentes(texto, productos=None):
+    """Subconsulta con los ids de los productos que coinciden (para filtrar un queryset)"""
+    filas = coincidencias(texto, productos)
+    if filas is None:
+        return Producto.objects.none().values('id')
+    return filas.values('producto_id')
+
+
+def buscar_productos(texto, cursor=None, categoria=None, tamano=TAMANO_PAGINA):
+    """
+    Página de resultados ordenada por relevancia (puntaje desc, id asc) con cursor,
+    como en el catálogo. Regresa {'productos', 'siguiente', 'orden'} igual que
+    tienda.catalogo.pagina_catalogo.
+    """
+    productos = None
+    if categoria and str(categoria).isdigit():
+        productos = Producto.objects.filter(categoria_id=categoria)
+    filas = coincidencias(texto, productos)
+    if filas is None:
+        return {'productos': [], 'siguiente': None, 'orden': 'relevancia'}
+
+    posicion = decodificar_cursor(cursor)
+    if posicion:
+        valor, ultimo_id = posicion
+        try:
+            puntaje = int(valor)
+        except ValueError:
+            puntaje = None
+        if puntaje is not None:
+            filas = filas.filter(Q(puntaje__lt=puntaje) | Q(puntaje=puntaje, producto_id__gt=ultimo_id))
+
+    pagina = list(filas.order_by('-puntaje', 'producto_id')[:tamano + 1])
+    siguiente = None
+    if len(pagina) > tamano:
+        pagina = pagina[:tamano]
+        siguiente = codificar_cursor(pagina[-1]['puntaje'], pagina[-1]['producto_id'])
+
+    # Los productos de la página se cargan en el mismo orden de relevancia
+    por_id = consulta_catalogo().in_bulk([fila['producto_id'] for fila in pagina])
+    return {
+        'productos': [por_id[fila['producto_id']] for fila in pagina if fila['producto_id'] in por_id],
+        'siguiente': siguiente,
+        'orden': 'relevancia',
+    }
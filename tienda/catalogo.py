@@ -0,0 +1,117 @@
+# tienda/catalogo.py
+# Consultas del catálogo de productos con paginación por cursor (keyset)
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch, Q
+
+from .models import Producto, Proveedor
+
+# Campos por los que se puede ordenar el catálogo (el "-" indica orden descendente)
+ORDENAMIENTOS = {
+    'nombre': 'Nombre (A-Z)',
+    '-nombre': 'Nombre (Z-A)',
+    'precio': 'Precio (menor a mayor)',
+    '-precio': 'Precio (mayor a menor)',
+    'stock': 'Stock (menor a mayor)',
+    '-stock': 'Stock (mayor a menor)',
+}
+ORDEN_POR_DEFECTO = 'nombre'
+TAMANO_PAGINA = 50
+
+
+# ============ CODIFICACIÓN DEL CURSOR ============
+def codificar_cursor(valor, pk):
+    """Convierte (valor del campo de orden, id) en un texto seguro para la URL"""
+    datos = json.dumps([str(valor), pk])
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (valor, id) o None si el cursor es inválido"""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)  # base64 necesita longitud múltiplo de 4
+        valor, pk = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valor, str):  # codificar_cursor siempre guarda texto
+            return None
+        return valor, int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+def valor_cursor(modelo, campo, valor):
+    """
+    Convierte el valor del cursor al tipo del campo de orden; None si no corresponde
+    (cursor alterado o copiado de otro ordenamiento: se muestra la primera página)
+    """
+    try:
+        return modelo._meta.get_field(campo).to_python(valor)
+    except ValidationError:
+        return None
+
+
+# ============ PÁGINA DEL CATÁLOGO ============
+def consulta_catalogo():
+    """Productos con su categoría (JOIN) y sus proveedores (un solo prefetch)"""
+    return (
+        Producto.objects
+        .select_related('categoria')
+        .prefetch_related(Prefetch('proveedores', queryset=Proveedor.objects.only('id', 'nombre')))
+    )
+
+
+def pagina_catalogo(orden=None, cursor=None, categoria=None, tamano=TAMANO_PAGINA):
+    """
+    Devuelve una página del catálogo ordenada por un campo estable (campo, id).
+
+    En lugar de OFFSET se filtra a partir del último registro de la página anterior
+    (WHERE campo > valor OR (campo = valor AND id > ultimo_id)), así el costo de
+    cualquier página es el mismo sin importar el tamaño de la tabla.
+    La categoría se trae con JOIN y los proveedores con un solo prefetch.
+
+    Regresa un diccionario con:
+        productos: lista de productos de la página
+        siguiente: cursor de la siguiente página (None si es la última)
+        orden: ordenamiento aplicado
+    """
+    if orden not in ORDENAMIENTOS:
+        orden = ORDEN_POR_DEFECTO
+    descendente = orden.startswith('-')
+    campo = orden.lstrip('-')
+
+    productos = consulta_catalogo()
+
+    if categoria and str(categoria).isdigit():
+        productos = productos.filter(categoria_id=categoria)
+
+    posicion = decodificar_cursor(cursor)
+    valor = valor_cursor(Producto, campo, posicion[0]) if posicion else None
+    if valor is not None:
+        ultimo_id = posicion[1]
+        if descendente:
+            productos = productos.filter(Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'id__lt': ultimo_id}))
+        else:
+            productos = productos.filter(Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor, 'id__gt': ultimo_id}))
+
+    # El id desempata productos con el mismo valor para que el orden sea estable
+    if descendente:
+        productos = productos.order_by(f'-{campo}', '-id')
+    else:
+        productos = productos.order_by(campo, 'id')
+
+    # Se pide un registro extra para saber si existe una página siguiente
+    resultados = list(productos[:tamano + 1])
+    siguiente = None
+    if len(resultados) > tamano:
+        resultados = resultados[:tamano]
+        ultimo = resultados[-1]
+        siguiente = codificar_cursor(getattr(ultimo, campo), ultimo.pk)
+
+    return {
+        'productos': resultados,
+        'siguiente': siguiente,
+        'orden': orden,
+    }
@@ -0,0 +1,92 @@
+# tienda/categorias.py
+# Conteo de productos (total y activos) por categoría, guardado en la propia Categoria
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Categoria, Producto
+
+
+# ============ MANTENIMIENTO INCREMENTAL ============
+def estado_conteo(producto):
+    """(categoria_id, activo) del producto; None si esos campos no se cargaron (only/defer)"""
+    if {'categoria_id', 'activo'} & producto.get_deferred_fields():
+        return None
+    return producto.categoria_id, producto.activo
+
+
+def estado_guardado(pk):
+    """Lee de la BD el (categoria_id, activo) de un producto ya guardado"""
+    return Producto.objects.filter(pk=pk).values_list('categoria_id', 'activo').first()
+
+
+class DeltasCategorias:
+    """
+    Acumula los cambios de un grupo de productos y los aplica con un UPDATE por
+    categoría afectada (mover 1000 productos de A a B son dos UPDATE, no 2000).
+    """
+
+    def __init__(self):
+        self.deltas = defaultdict(lambda: [0, 0])  # categoria_id -> [total, activos]
+
+    def mover(self, anterior, actual):
+        """anterior/actual: (categoria_id, activo) o None (producto nuevo / eliminado)"""
+        if anterior == actual:
+            return
+        for estado, signo in ((anterior, -1), (actual, 1)):
+            if estado:
+                categoria_id, activo = estado
+                self.deltas[categoria_id][0] += signo
+                self.deltas[categoria_id][1] += signo if activo else 0
+
+    def aplicar(self):
+        with transaction.atomic():
+            for categoria_id, (total, activos) in self.deltas.items():
+                if total or activos:
+                    Categoria.objects.filter(pk=categoria_id).update(
+                        total_productos=F('total_productos') + total,
+                        productos_activos=F('productos_activos') + activos,
+                    )
+        self.deltas.clear()
+
+
+def ajustar_conteos(anterior, actual):
+    """Cambio de un solo producto (Producto.save y eliminación)"""
+    deltas = DeltasCategorias()
+    deltas.mover(anterior, actual)
+    deltas.aplicar()
+
+
+# ============ RECONCILIACIÓN ============
+def conteos_reales(ids=None):
+    """{categoria_id: (total, activos)} contando los productos con un solo GROUP BY"""
+    productos = Producto.objects.order_by()
+    if ids is not None:
+        productos = productos.filter(categoria_id__in=ids)
+    filas = productos.values('categoria_id').annotate(total=Count('id'), activos=Count('id', filter=Q(activo=True)))
+    return {fila['categoria_id']: (fila['total'], fila['activos']) for fila in filas}
+
+
+def reconciliar_categorias(ids=None, corregir=True):
+    """
+    Compara los conteos guardados con los reales y corrige solo las categorías que no
+    coinciden. Regresa [(categoria, guardado, real), ...] con las diferencias encontradas.
+    """
+    categorias = Categoria.objects.order_by('id')
+    if ids is not None:
+        categorias = categorias.filter(id__in=ids)
+    reales = conteos_reales(ids)
+
+    diferencias = []
+    for categoria in categorias.only('id', 'nombre', 'total_productos', 'productos_activos'):
+        guardado = (categoria.total_productos, categoria.productos_activos)
+        real = reales.get(categoria.id, (0, 0))
+        if guardado != real:
+            diferencias.append((categoria, guardado, real))
+
+    if corregir:
+        with transaction.atomic():
+            for categoria, _, (total, activos) in diferencias:
+                Categoria.objects.filter(pk=categoria.pk).update(total_productos=total, productos_activos=activos)
+    return diferencias
@@ -0,0 +1,39 @@
+# tienda/compras.py
+# Historial de compras de un cliente con paginación por cursor y su resumen histórico
+from decimal import Decimal
+
+from .models import ResumenCliente, Venta
+
+TAMANO_PAGINA_COMPRAS = 25
+
+
+def pagina_compras(cliente, antes=None, tamano=TAMANO_PAGINA_COMPRAS):
+    """
+    Compras del cliente de la más reciente a la más antigua.
+
+    `antes` es el id de la última compra de la página anterior: se filtra con
+    WHERE cliente_id = X AND id < antes sobre el índice (cliente, -id), así cualquier
+    página cuesta lo mismo aunque el cliente tenga miles de compras. El producto
+    se trae en el mismo SELECT (JOIN).
+
+    Regresa {'ventas': [...], 'siguiente': id para la siguiente página o None}
+    """
+    ventas = Venta.objects.filter(cliente=cliente).select_related('producto').order_by('-id')
+    if antes and str(antes).isdigit():
+        ventas = ventas.filter(id__lt=int(antes))
+
+    pagina = list(ventas[:tamano + 1])  # Una de más para saber si hay otra página
+    siguiente = None
+    if len(pagina) > tamano:
+        pagina = pagina[:tamano]
+        siguiente = pagina[-1].id
+    return {'ventas': pagina, 'siguiente': siguiente}
+
+
+def resumen_cliente(cliente):
+    """Totales históricos del cliente (leídos de ResumenCliente, sin recorrer sus ventas)"""
+    try:
+        resumen = cliente.resumen  # Ya viene en el JOIN si se usó select_related('resumen')
+    except ResumenCliente.DoesNotExist:
+        return {'num_ventas': 0, 'unidades': 0, 'gastado': Decimal('0')}  # Aún sin compras
+    return {'num_ventas': resumen.num_ventas, 'unidades': resumen.unidades, 'gastado': resumen.gastado}
@@ -0,0 +1,121 @@
+# tienda/contadores.py
+# Contadores del dashboard en caché, actualizados por señales (ver tienda/signals.py)
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Categoria, Cliente, Producto, Proveedor
+
+# Nombre del contador -> modelo que cuenta
+MODELOS = {
+    'productos': Producto,
+    'categorias': Categoria,
+    'proveedores': Proveedor,
+    'clientes': Cliente,
+}
+CLAVE_ACIERTOS = 'tienda:contadores:aciertos'
+CLAVE_FALLOS = 'tienda:contadores:fallos'
+
+
+def _duracion():
+    return getattr(settings, 'TIENDA_CONTADORES_CACHE_SEGUNDOS', 600)
+
+
+def clave_contador(nombre):
+    return f'tienda:contador:{nombre}'
+
+
+def clave_ventas_dia(fecha):
+    return f'tienda:contador:ventas_dia:{fecha:%Y%m%d}'
+
+
+def _incrementar(clave, delta=1):
+    """incr que no falla si la clave expiró (en ese caso se recalculará al leerla)"""
+    try:
+        cache.incr(clave, delta)
+    except ValueError:
+        pass
+
+
+def _registrar(aciertos, fallos):
+    """Lleva la cuenta de aciertos/fallos de la caché para la vista de estadísticas"""
+    for clave, cantidad in ((CLAVE_ACIERTOS, aciertos), (CLAVE_FALLOS, fallos)):
+        if cantidad:
+            cache.add(clave, 0, None)
+            _incrementar(clave, cantidad)
+
+
+# ============ LECTURA ============
+def obtener_contadores():
+    """Regresa {'productos': n, 'categorias': n, ...}; solo cuenta en la BD lo que no está en caché"""
+    claves = {clave_contador(nombre): nombre for nombre in MODELOS}
+    en_cache = cache.get_many(claves)
+
+    contadores = {}
+    nuevos = {}
+    for clave, nombre in claves.items():
+        if clave in en_cache:
+            contadores[nombre] = en_cache[clave]
+        else:
+            contadores[nombre] = nuevos[clave] = MODELOS[nombre].objects.count()
+    if nuevos:
+        cache.set_many(nuevos, _duracion())
+
+    _registrar(len(en_cache), len(nuevos))
+    return contadores
+
+
+def ventas_de_hoy():
+    """Total vendido hoy (zona local), leído de los resúmenes diarios y guardado en caché"""
+    from .resumenes import inicio_del_dia, resumen_periodo  # Import local: resumenes usa este módulo
+
+    hoy = timezone.localdate()
+    clave = clave_ventas_dia(hoy)
+    total = cache.get(clave)
+    if total is None:
+        total = resumen_periodo(inicio_del_dia(hoy), inicio_del_dia(hoy + timedelta(days=1)))['ingresos']
+        cache.set(clave, total, _duracion())
+        _registrar(0, 1)
+    else:
+        _registrar(1, 0)
+    return total
+
+
+def estadisticas():
+    """Aciertos, fallos y porcentaje de aciertos de la caché de contadores"""
+    aciertos = cache.get(CLAVE_ACIERTOS, 0)
+    fallos = cache.get(CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'porcentaje_aciertos': round(100 * aciertos / total, 2) if total else None,
+        'en_cache': {
+            nombre: cache.get(clave_contador(nombre)) for nombre in MODELOS
+        },
+    }
+
+
+# ============ ACTUALIZACIÓN ============
+def ajustar_contador(modelo, delta):
+    """
+    Suma/resta al contador del modelo (llamado desde post_save / post_delete).
+    El ajuste se hace después del commit: si la transacción se revierte la caché no cambia.
+    """
+    for nombre, clase in MODELOS.items():
+        if clase is modelo:
+            clave = clave_contador(nombre)
+            transaction.on_commit(lambda: _incrementar(clave, delta))
+
+
+def invalidar_contadores():
+    """Borra todos los contadores (para cargas masivas que no disparan señales)"""
+    cache.delete_many([clave_contador(nombre) for nombre in MODELOS])
+
+
+def invalidar_ventas_dia(fechas):
+    """Borra el total vendido en caché de los días indicados"""
+    cache.delete_many([clave_ventas_dia(fecha) for fecha in fechas])
@@ -0,0 +1,10 @@
+# tienda/context_processors.py
+# Variables disponibles en todos los templates
+from django.utils.functional import SimpleLazyObject
+
+from .roles import obtener_permisos
+
+
+def permisos(request):
+    """Expone {{ permisos }} precalculado (perezoso: no consulta nada si el template no lo usa)"""
+    return {'permisos': SimpleLazyObject(lambda: obtener_permisos(request))}
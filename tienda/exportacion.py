@@ -0,0 +1,99 @@
+# tienda/exportacion.py
+# Exportación de ventas a CSV / XLSX en memoria constante
+import csv
+import tempfile
+
+from django.db.models import Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Venta
+
+# (encabezado, campo) de las columnas exportadas; se leen con values_list, sin instanciar modelos
+COLUMNAS = (
+    ('ID', 'id'),
+    ('Ticket', 'ticket_id'),
+    ('Fecha', 'fecha_venta'),
+    ('Cliente', 'cliente__nombre'),
+    ('Apellido', 'cliente__apellido'),
+    ('Producto', 'producto__nombre'),
+    ('Cantidad', 'cantidad'),
+    ('Precio unitario', 'precio_unitario'),
+    ('Total', 'total'),
+    ('Vendedor', 'vendedor__username'),
+)
+TAMANO_LOTE = 2000
+POSICION_FECHA = 2
+
+
+class _Eco:
+    """Objeto tipo archivo que regresa lo que se le escribe (para que csv.writer genere texto por fila)"""
+
+    def write(self, valor):
+        return valor
+
+
+def filas_ventas(inicio, fin, tamano=TAMANO_LOTE):
+    """
+    Genera las filas de ventas del rango [inicio, fin) en lotes de `tamano`.
+    Cada lote es una consulta con cursor (fecha_venta, id) como pagina_ventas
+    (WHERE fecha_venta > f OR (fecha_venta = f AND id > i) ORDER BY fecha_venta, id LIMIT n):
+    una lectura acotada del índice por fecha, y la memoria no depende del tamaño del
+    rango aunque el driver traiga cada resultado completo al cliente.
+    """
+    campos = [campo for _, campo in COLUMNAS]
+    ventas = Venta.objects.filter(fecha_venta__gte=inicio, fecha_venta__lt=fin).order_by('fecha_venta', 'id')
+    siguientes = ventas
+    while True:
+        lote = list(siguientes.values_list(*campos)[:tamano])
+        if not lote:
+            return
+        for fila in lote:
+            fila = list(fila)
+            fila[POSICION_FECHA] = timezone.localtime(fila[POSICION_FECHA]).strftime('%Y-%m-%d %H:%M:%S')
+            yield fila
+        ultimo_id, ultima_fecha = lote[-1][0], lote[-1][POSICION_FECHA]
+        siguientes = ventas.filter(Q(fecha_venta__gt=ultima_fecha) | Q(fecha_venta=ultima_fecha, id__gt=ultimo_id))
+
+
+def nombre_archivo(inicio, fin, extension):
+    return f'ventas_{inicio:%Y-%m-%d}_{fin:%Y-%m-%d}.{extension}'
+
+
+def respuesta_csv(inicio, fin, fecha_fin):
+    """StreamingHttpResponse que escribe el CSV fila por fila mientras se envía"""
+    escritor = csv.writer(_Eco())
+
+    def contenido():
+        yield '\ufeff'  # BOM para que Excel reconozca los acentos (UTF-8)
+        yield escritor.writerow([encabezado for encabezado, _ in COLUMNAS])
+        for fila in filas_ventas(inicio, fin):
+            yield escritor.writerow(fila)
+
+    respuesta = StreamingHttpResponse(contenido(), content_type='text/csv; charset=utf-8')
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre_archivo(inicio, fecha_fin, "csv")}"'
+    return respuesta
+
+
+def respuesta_xlsx(inicio, fin, fecha_fin):
+    """
+    Libro XLSX generado con openpyxl en modo write_only (las filas se escriben a disco,
+    no se guardan en memoria). Lanza ImportError si openpyxl no está instalado.
+    """
+    from openpyxl import Workbook  # Dependencia opcional: solo se importa al exportar XLSX
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Ventas')
+    hoja.append([encabezado for encabezado, _ in COLUMNAS])
+    for fila in filas_ventas(inicio, fin):
+        hoja.append(fila)
+
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=nombre_archivo(inicio, fecha_fin, 'xlsx'),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
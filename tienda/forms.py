@@ -2,7 +2,34 @@
 # Importamos forms de Django para crear formularios
 from django import forms
 from .models import Producto, Categoria, Proveedor, Cliente, Venta, User  # Importamos nuestros modelos
-from django_select2.forms import Select2MultipleWidget 
+from django_select2.forms import ModelSelect2MultipleWidget, ModelSelect2Widget
+from .operaciones import OPERACIONES
+
+
+# ============ WIDGETS DE AUTOCOMPLETAR ============
+class AutocompletarMixin:
+    """
+    Select2 con AJAX contra las vistas de autocompletar (data_view='cliente_autocompletar', ...).
+    Solo se renderizan las opciones seleccionadas; las demás se piden mientras se escribe, así
+    el HTML del formulario no crece con el número de clientes, productos o proveedores.
+    """
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs=extra_attrs)
+        attrs.setdefault('data-width', '100%')  # Mismo ancho que los demás campos form-control
+        return attrs
+
+    def set_to_cache(self):
+        # Nuestras vistas no leen el widget de la caché (no se usa la vista auto-json de django_select2)
+        pass
+
+
+class AutocompletarWidget(AutocompletarMixin, ModelSelect2Widget):
+    """Selección de un solo registro"""
+
+
+class AutocompletarMultipleWidget(AutocompletarMixin, ModelSelect2MultipleWidget):
+    """Selección de varios registros (ej. proveedores de un producto)"""
 
 # ============ FORMULARIO PARA PRODUCTOS ============
 from django import forms
@@ -40,8 +67,9 @@ class ProductoForm(forms.ModelForm):
             'categoria': forms.Select(attrs={
                 'class': 'form-control'
             }),
-            'proveedores': Select2MultipleWidget(attrs={
-                'class': 'form-control'
+            'proveedores': AutocompletarMultipleWidget(data_view='proveedor_autocompletar', attrs={
+                'class': 'form-control',  # Busca proveedores con AJAX (solo se renderizan los elegidos)
+                'data-placeholder': 'Escriba el nombre o la empresa del proveedor',
             }),
             'activo': forms.CheckboxInput(attrs={
                 'class': 'form-check-input'
@@ -176,12 +204,14 @@ class VentaForm(forms.ModelForm):
         fields = ['cliente', 'producto', 'cantidad']  # Solo solicita cliente, producto y cantidad (el precio se toma automático)
 
         widgets = {
-            'cliente': forms.Select(attrs={
-                'class': 'form-control'  # Select (combobox) con clientes
+            'cliente': AutocompletarWidget(data_view='cliente_autocompletar', attrs={
+                'class': 'form-control',  # Combobox que busca clientes mientras se escribe
+                'data-placeholder': 'Escriba nombre, apellido o correo',
             }),
-            'producto': forms.Select(attrs={
+            'producto': AutocompletarWidget(data_view='producto_autocompletar', attrs={
                 'class': 'form-control',
-                'id': 'id_producto'  # ID para poder manipular con JavaScript si es necesario
+                'id': 'id_producto',  # ID para poder manipular con JavaScript si es necesario
+                'data-placeholder': 'Escriba el nombre del producto',
             }),
             'cantidad': forms.NumberInput(attrs={
                 'class': 'form-control',
@@ -196,6 +226,47 @@ class VentaForm(forms.ModelForm):
             'cantidad': 'Cantidad',
         }
 
+# ============ FORMULARIOS PARA TICKETS (VENTA DE VARIAS LÍNEAS) ============
+class TicketForm(forms.Form):
+    """Encabezado del ticket: solo el cliente (vendedor y fecha se asignan automáticamente)"""
+    cliente = forms.ModelChoiceField(
+        queryset=Cliente.objects.all(),
+        label='Cliente',
+        widget=AutocompletarWidget(data_view='cliente_autocompletar', attrs={
+            'class': 'form-control', 'data-placeholder': 'Escriba nombre, apellido o correo'
+        })
+    )
+
+
+class LineaTicketForm(forms.Form):
+    """
+    Línea del ticket. El producto se recibe como id y se valida junto con las demás
+    líneas en una sola consulta (ver tienda.tickets.crear_ticket), en lugar de una
+    consulta por línea como haría un ModelChoiceField.
+    """
+    producto = forms.IntegerField(
+        label='Producto',
+        widget=AutocompletarWidget(data_view='producto_autocompletar', attrs={
+            'class': 'form-control', 'data-placeholder': 'Escriba el nombre del producto'
+        })
+    )
+    cantidad = forms.IntegerField(
+        label='Cantidad',
+        min_value=1,
+        initial=1,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': '1'})
+    )
+
+    def __init__(self, *args, productos=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        # Solo las opciones ya elegidas (al volver a mostrar el formulario con errores);
+        # las demás llegan por AJAX. Se calculan una sola vez para todo el formset
+        self.fields['producto'].widget.choices = [('', '')] + list(productos)
+
+
+LineaTicketFormSet = forms.formset_factory(LineaTicketForm, extra=3, min_num=1, validate_min=True)
+
+
 class UserForm(forms.ModelForm):
     """Formulario para que un cliente edite su propio perfil"""
 
@@ -220,4 +291,80 @@ class UserForm(forms.ModelForm):
             'first_name': 'Nombre',
             'last_name': 'Apellido',
             'email': 'Correo Electrónico',
-        }
\ No newline at end of file
+        }
+
+# ============ FORMULARIO PARA IMPORTAR PRODUCTOS DESDE CSV ============
+class ImportarProductosForm(forms.Form):
+    """Archivo CSV de lista de precios (ver tienda.importacion para el formato)"""
+    archivo = forms.FileField(
+        label='Archivo CSV',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'})
+    )
+    delimitador = forms.ChoiceField(
+        label='Separador de columnas',
+        choices=[(',', 'Coma (,)'), (';', 'Punto y coma (;)'), ('\t', 'Tabulador')],
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    crear_faltantes = forms.BooleanField(
+        label='Crear categorías y proveedores que no existan',
+        required=False, initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    simular = forms.BooleanField(
+        label='Solo validar (no guardar cambios)',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+
+# ============ FORMULARIO PARA AJUSTES MASIVOS DE PRECIO Y STOCK ============
+class AjusteMasivoForm(forms.Form):
+    """Operación aritmética (ver tienda.operaciones) sobre los productos que cumplan los filtros"""
+    campo = forms.ChoiceField(
+        label='Campo',
+        choices=[('precio', 'Precio'), ('stock', 'Stock')],
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    operacion = forms.ChoiceField(
+        label='Operación',
+        choices=[('porcentaje', 'Porcentaje (%)'), ('sumar', 'Sumar/restar'), ('minimo', 'Reabastecer hasta (solo stock)'),
+                 ('fijar', 'Fijar valor')],
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    valor = forms.DecimalField(
+        label='Valor', max_digits=12, decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': 'Ej. 8 para +8%'})
+    )
+
+    def clean(self):
+        datos = super().clean()
+        campo, operacion = datos.get('campo'), datos.get('operacion')
+        if campo and operacion and operacion not in OPERACIONES[campo]:
+            raise forms.ValidationError(f'La operación seleccionada no aplica al {campo}')
+        if campo == 'stock' and datos.get('valor') is not None and datos['valor'] != int(datos['valor']):
+            self.add_error('valor', 'El stock se ajusta en unidades enteras')
+        return datos
+
+
+class FiltroAjusteForm(forms.Form):
+    """Productos a los que se aplica el ajuste masivo"""
+    categoria = forms.ModelChoiceField(
+        queryset=Categoria.objects.all(), required=False, label='Categoría', empty_label='Todas',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    proveedor = forms.ModelChoiceField(
+        queryset=Proveedor.objects.all(), required=False, label='Proveedor', empty_label='Todos',
+        widget=AutocompletarWidget(data_view='proveedor_autocompletar', attrs={'class': 'form-control'})
+    )
+    precio_min = forms.DecimalField(
+        label='Precio desde', required=False, max_digits=10, decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+    precio_max = forms.DecimalField(
+        label='Precio hasta', required=False, max_digits=10, decimal_places=2,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+    solo_activos = forms.BooleanField(
+        label='Solo productos activos', required=False, initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
@@ -0,0 +1,317 @@
+# tienda/importacion.py
+# Importación masiva de productos desde CSV: validación por fila y upsert por lotes
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .busqueda import indexar_productos
+from .categorias import DeltasCategorias
+from .contadores import invalidar_contadores
+from .models import Categoria, Producto, Proveedor
+
+# Columnas del archivo (las obligatorias deben venir en el encabezado)
+COLUMNAS_OBLIGATORIAS = ('nombre', 'precio', 'stock', 'categoria')
+COLUMNAS_OPCIONALES = ('proveedores', 'descripcion', 'activo')
+SEPARADOR_PROVEEDORES = '|'  # Varios proveedores en una celda: "Acme|Distribuidora Norte"
+TAMANO_LOTE = 2000
+
+VALORES_VERDADEROS = {'1', 'si', 'sí', 'true', 'verdadero', 'x', ''}  # Vacío = activo (valor por defecto)
+VALORES_FALSOS = {'0', 'no', 'false', 'falso'}
+
+PRECIO_MAXIMO = Decimal('99999999.99')  # max_digits=10, decimal_places=2
+
+
+class ErrorImportacion(Exception):
+    """El archivo no se puede procesar (encabezado inválido, no es CSV...)"""
+
+
+def clave(nombre):
+    """Clave para comparar nombres sin importar mayúsculas ni espacios extra"""
+    return ' '.join(nombre.split()).casefold()
+
+
+# ============ RESULTADO ============
+class ResultadoImportacion:
+    """Totales de la importación y errores por número de línea del archivo"""
+
+    def __init__(self):
+        self.filas = 0
+        self.creados = 0
+        self.actualizados = 0
+        self.sin_cambios = 0  # Productos existentes cuyos datos ya eran iguales
+        self.categorias_creadas = 0
+        self.proveedores_creados = 0
+        self.errores = []  # [(línea, mensaje)]
+
+    def agregar_error(self, linea, mensaje):
+        self.errores.append((linea, mensaje))
+
+    @property
+    def importados(self):
+        return self.creados + self.actualizados
+
+
+# ============ VALIDACIÓN DE CADA FILA ============
+def validar_fila(fila, columnas):
+    """Convierte una fila del CSV en un diccionario limpio o lanza ValueError con el motivo"""
+    nombre = ' '.join((fila.get('nombre') or '').split())
+    if not nombre:
+        raise ValueError('el nombre está vacío')
+    if len(nombre) > Producto._meta.get_field('nombre').max_length:
+        raise ValueError('el nombre excede 200 caracteres')
+
+    try:
+        precio = Decimal((fila.get('precio') or '').strip().replace('$', '').replace(',', ''))
+    except InvalidOperation:
+        raise ValueError(f'precio inválido: {fila.get("precio")!r}')
+    if not precio.is_finite() or precio < 0 or precio > PRECIO_MAXIMO:
+        raise ValueError(f'precio fuera de rango: {fila.get("precio")!r}')
+
+    try:
+        stock = int((fila.get('stock') or '').strip())
+    except ValueError:
+        raise ValueError(f'stock inválido: {fila.get("stock")!r}')
+    if stock < 0:
+        raise ValueError('el stock no puede ser negativo')
+
+    categoria = ' '.join((fila.get('categoria') or '').split())
+    if not categoria:
+        raise ValueError('la categoría está vacía')
+    if len(categoria) > Categoria._meta.get_field('nombre').max_length:
+        raise ValueError('el nombre de la categoría excede 100 caracteres')
+
+    datos = {
+        'nombre': nombre,
+        'precio': precio.quantize(Decimal('0.01')),
+        'stock': stock,
+        'categoria': categoria,
+        'proveedores': [],
+    }
+    if 'proveedores' in columnas:
+        datos['proveedores'] = [
+            ' '.join(p.split()) for p in (fila.get('proveedores') or '').split(SEPARADOR_PROVEEDORES) if p.strip()
+        ]
+        if any(len(p) > Proveedor._meta.get_field('nombre').max_length for p in datos['proveedores']):
+            raise ValueError('el nombre de un proveedor excede 150 caracteres')
+    if 'descripcion' in columnas:
+        datos['descripcion'] = (fila.get('descripcion') or '').strip()
+    if 'activo' in columnas:
+        valor = (fila.get('activo') or '').strip().lower()
+        if valor in VALORES_VERDADEROS:
+            datos['activo'] = True
+        elif valor in VALORES_FALSOS:
+            datos['activo'] = False
+        else:
+            raise ValueError(f'valor de activo inválido: {fila.get("activo")!r}')
+    return datos
+
+
+# ============ IMPORTACIÓN ============
+class ImportadorProductos:
+    """
+    Lee el CSV en lotes y hace upsert de productos por nombre.
+
+    Categorías, proveedores y productos existentes se cargan una sola vez en
+    diccionarios nombre -> id, así cada lote cuesta unas pocas consultas sin importar
+    su tamaño: un INSERT de categorías/proveedores nuevos, un upsert de los productos
+    existentes, un INSERT de los nuevos y un INSERT de las relaciones con proveedores.
+    """
+
+    def __init__(self, crear_faltantes=True, tamano_lote=TAMANO_LOTE):
+        self.crear_faltantes = crear_faltantes
+        self.tamano_lote = tamano_lote
+        self.resultado = ResultadoImportacion()
+        self.categorias = {clave(n): pk for pk, n in Categoria.objects.values_list('id', 'nombre')}
+        self.proveedores = {clave(n): pk for pk, n in Proveedor.objects.values_list('id', 'nombre')}
+        # Si hay nombres repetidos en la BD se actualiza el producto más antiguo
+        self.productos = {}
+        for pk, nombre in Producto.objects.order_by('-id').values_list('id', 'nombre').iterator(chunk_size=5000):
+            self.productos[clave(nombre)] = pk
+
+    def importar(self, archivo, delimitador=','):
+        """Procesa un archivo de texto abierto; regresa el ResultadoImportacion"""
+        lector = csv.DictReader(archivo, delimiter=delimitador)
+        if not lector.fieldnames:
+            raise ErrorImportacion('El archivo está vacío')
+        lector.fieldnames = [clave(columna) for columna in lector.fieldnames]
+        faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in lector.fieldnames]
+        if faltantes:
+            raise ErrorImportacion(f'Faltan columnas en el encabezado: {", ".join(faltantes)}')
+        self.columnas = set(lector.fieldnames)
+
+        lote = {}  # clave del producto -> (línea, datos); una fila posterior reemplaza a la anterior
+        for fila in lector:
+            self.resultado.filas += 1
+            linea = lector.line_num
+            try:
+                datos = validar_fila(fila, self.columnas)
+            except ValueError as error:
+                self.resultado.agregar_error(linea, str(error))
+                continue
+            lote[clave(datos['nombre'])] = (linea, datos)
+            if len(lote) >= self.tamano_lote:
+                self.guardar_lote(lote)
+                lote = {}
+        if lote:
+            self.guardar_lote(lote)
+
+        # Las inserciones masivas no disparan señales: los contadores del dashboard se recalculan
+        transaction.on_commit(invalidar_contadores)
+        return self.resultado
+
+    def guardar_lote(self, lote):
+        with transaction.atomic():
+            filas = self.resolver_relaciones(lote)
+            existentes = [(c, l, d) for c, l, d in filas if c in self.productos]
+            nuevos = [(c, l, d) for c, l, d in filas if c not in self.productos]
+            conteos = DeltasCategorias()
+            modificados = set(self.actualizar_existentes(existentes, conteos))
+            self.crear_nuevos(nuevos, conteos)
+            modificados.update(self.productos[c] for c, _, _ in nuevos)
+            modificados.update(self.enlazar_proveedores(filas))
+            # bulk_create no dispara señales ni llama a save: el índice de búsqueda
+            # y los conteos por categoría se actualizan aquí
+            indexar_productos(sorted(modificados))
+            conteos.aplicar()
+
+    def resolver_relaciones(self, lote):
+        """Crea (o rechaza) categorías y proveedores que no existen; regresa las filas válidas"""
+        if self.crear_faltantes:
+            categorias = {d['categoria'] for _, d in lote.values()}
+            proveedores = {p for _, d in lote.values() for p in d['proveedores']}
+            self.crear_catalogo(Categoria, self.categorias, categorias, 'categorias_creadas')
+            self.crear_catalogo(Proveedor, self.proveedores, proveedores, 'proveedores_creados')
+
+        filas = []
+        for clave_producto, (linea, datos) in lote.items():
+            if clave(datos['categoria']) not in self.categorias:
+                self.resultado.agregar_error(linea, f'la categoría {datos["categoria"]!r} no existe')
+                continue
+            desconocidos = [p for p in datos['proveedores'] if clave(p) not in self.proveedores]
+            if desconocidos:
+                self.resultado.agregar_error(linea, f'proveedor(es) inexistente(s): {", ".join(desconocidos)}')
+                continue
+            filas.append((clave_producto, linea, datos))
+        return filas
+
+    def crear_catalogo(self, modelo, mapa, nombres, contador):
+        """Inserta de una vez los nombres que no están en el mapa y agrega sus ids"""
+        nuevos = {}
+        for nombre in nombres:
+            nuevos.setdefault(clave(nombre), nombre)
+        for existente in mapa.keys() & nuevos.keys():
+            del nuevos[existente]
+        if not nuevos:
+            return
+        ultimo_id = modelo.objects.aggregate(m=Max('id'))['m'] or 0
+        modelo.objects.bulk_create([modelo(nombre=nombre) for nombre in nuevos.values()])
+        # MySQL no regresa los ids de bulk_create: se leen los recién insertados
+        for pk, nombre in modelo.objects.filter(id__gt=ultimo_id).values_list('id', 'nombre'):
+            mapa.setdefault(clave(nombre), pk)
+        setattr(self.resultado, contador, getattr(self.resultado, contador) + len(nuevos))
+
+    def campos_producto(self, datos):
+        campos = {
+            'nombre': datos['nombre'],
+            'precio': datos['precio'],
+            'stock': datos['stock'],
+            'categoria_id': self.categorias[clave(datos['categoria'])],
+        }
+        for opcional in ('descripcion', 'activo'):
+            if opcional in datos:
+                campos[opcional] = datos[opcional]
+        return campos
+
+    def actualizar_existentes(self, filas, conteos):
+        """
+        Upsert por llave primaria: un solo INSERT ... ON CONFLICT/ON DUPLICATE KEY UPDATE
+        por lote, solo con los productos cuyos datos cambiaron (re-importar la misma
+        lista casi no escribe nada).
+        """
+        if not filas:
+            return []
+        actualizar = ['nombre', 'precio', 'stock', 'categoria_id']
+        actualizar += [c for c in ('descripcion', 'activo') if c in self.columnas]
+        # activo se lee aunque no venga en el CSV: hace falta para los conteos por categoría
+        leer = actualizar + ([] if 'activo' in actualizar else ['activo'])
+        actuales, estados = {}, {}
+        for pk, *valores in (
+            Producto.objects.filter(pk__in=[self.productos[c] for c, _, _ in filas]).values_list('id', *leer)
+        ):
+            actuales[pk] = tuple(valores[:len(actualizar)])
+            estados[pk] = (valores[leer.index('categoria_id')], valores[leer.index('activo')])
+
+        ahora = timezone.now()  # bulk_create no aplica auto_now a las filas que solo se actualizan
+        objetos = []
+        for c, _, d in filas:
+            pk, campos = self.productos[c], self.campos_producto(d)
+            if actuales.get(pk) == tuple(campos[campo] for campo in actualizar):
+                self.resultado.sin_cambios += 1
+                continue
+            objetos.append(Producto(pk=pk, fecha_actualizacion=ahora, **campos))
+            anterior = estados.get(pk)  # None si el producto se eliminó mientras tanto (el upsert lo vuelve a crear)
+            conteos.mover(anterior, (campos['categoria_id'], campos.get('activo', anterior[1] if anterior else True)))
+        if not objetos:
+            return []
+
+        opciones = {'update_conflicts': True, 'update_fields': actualizar + ['fecha_actualizacion']}
+        if connection.features.supports_update_conflicts_with_target:
+            opciones['unique_fields'] = ['id']  # MySQL no acepta columnas de conflicto (usa la llave primaria)
+        Producto.objects.bulk_create(objetos, **opciones)
+        self.resultado.actualizados += len(objetos)
+        return [objeto.pk for objeto in objetos]
+
+    def crear_nuevos(self, filas, conteos):
+        if not filas:
+            return
+        ultimo_id = Producto.objects.aggregate(m=Max('id'))['m'] or 0
+        objetos = [Producto(**{'descripcion': '', **self.campos_producto(d)}) for _, _, d in filas]
+        Producto.objects.bulk_create(objetos)
+        for objeto in objetos:
+            conteos.mover(None, (objeto.categoria_id, objeto.activo))
+        creados = {clave(d['nombre']) for _, _, d in filas}
+        for pk, nombre in Producto.objects.filter(id__gt=ultimo_id).values_list('id', 'nombre'):
+            if clave(nombre) in creados:
+                self.productos.setdefault(clave(nombre), pk)
+        self.resultado.creados += len(objetos)
+
+    def enlazar_proveedores(self, filas):
+        """Agrega las relaciones producto-proveedor que falten; regresa los productos que cambiaron"""
+        Relacion = Producto.proveedores.through
+        relaciones = {
+            (self.productos[c], self.proveedores[clave(p)])
+            for c, _, d in filas for p in d['proveedores']
+        }
+        if not relaciones:
+            return set()
+        existentes = set(
+            Relacion.objects.filter(producto_id__in={producto for producto, _ in relaciones})
+            .values_list('producto_id', 'proveedor_id')
+        )
+        faltantes = relaciones - existentes
+        if faltantes:
+            Relacion.objects.bulk_create(
+                [Relacion(producto_id=producto, proveedor_id=proveedor) for producto, proveedor in faltantes],
+                ignore_conflicts=True,  # Por si otra importación simultánea creó la misma relación
+            )
+        return {producto for producto, _ in faltantes}
+
+
+def importar_productos(archivo, delimitador=',', crear_faltantes=True, tamano_lote=TAMANO_LOTE, simular=False):
+    """
+    Importa productos desde un CSV ya abierto en modo texto.
+    Cada lote se guarda en su propia transacción; con simular=True todo se ejecuta
+    dentro de una transacción que al final se revierte (sirve para ver los errores).
+    """
+    if not simular:
+        importador = ImportadorProductos(crear_faltantes=crear_faltantes, tamano_lote=tamano_lote)
+        return importador.importar(archivo, delimitador=delimitador)
+
+    with transaction.atomic():
+        importador = ImportadorProductos(crear_faltantes=crear_faltantes, tamano_lote=tamano_lote)
+        resultado = importador.importar(archivo, delimitador=delimitador)
+        transaction.set_rollback(True)
+    return resultado
@@ -0,0 +1,76 @@
+# tienda/inventario.py
+# Descuento de inventario sin condiciones de carrera (sin sobreventa)
+from django.db import transaction
+from django.db.models import F
+
+from .models import Producto
+
+
+class StockInsuficiente(Exception):
+    """Se lanza cuando un producto no tiene existencias suficientes para la venta"""
+
+    def __init__(self, producto_id, solicitado, disponible=None):
+        self.producto_id = producto_id
+        self.solicitado = solicitado
+        self.disponible = disponible
+        if disponible is None:
+            mensaje = f'El producto #{producto_id} no existe'
+        else:
+            mensaje = f'Stock insuficiente: se solicitaron {solicitado} y solo hay {disponible} disponibles'
+        super().__init__(mensaje)
+
+
+def validar_cantidad(cantidad):
+    """Una cantidad de cero o negativa sumaría stock (y guardaría una venta con total negativo)"""
+    if not isinstance(cantidad, int) or cantidad < 1:
+        raise ValueError(f'La cantidad debe ser un entero mayor a cero (se recibió {cantidad!r})')
+
+
+def descontar_stock(producto_id, cantidad):
+    """
+    Descuenta `cantidad` unidades con un solo UPDATE condicional:
+        UPDATE producto SET stock = stock - n WHERE id = X AND stock >= n
+    La BD evalúa la condición y la resta de forma atómica sobre la fila bloqueada,
+    así dos cajeros simultáneos nunca pueden dejar el stock en negativo.
+    Lanza ValueError si la cantidad es menor a 1.
+    """
+    validar_cantidad(cantidad)
+    actualizados = (
+        Producto.objects
+        .filter(pk=producto_id, stock__gte=cantidad)
+        .update(stock=F('stock') - cantidad)
+    )
+    if not actualizados:
+        disponible = Producto.objects.filter(pk=producto_id).values_list('stock', flat=True).first()
+        raise StockInsuficiente(producto_id, cantidad, disponible)
+
+
+def bloquear_productos(producto_ids):
+    """
+    Lee y bloquea (SELECT ... FOR UPDATE) varios productos en una sola consulta.
+    Se bloquean en orden de id para que dos tickets simultáneos no se interbloqueen.
+    Debe llamarse dentro de una transacción. Regresa {producto_id: producto}.
+    """
+    return Producto.objects.select_for_update().order_by('pk').in_bulk(list(producto_ids))
+
+
+def descontar_stock_lote(productos, cantidades):
+    """
+    Descuenta las cantidades de productos ya bloqueados con bloquear_productos
+    usando un solo bulk_update. cantidades: {producto_id: unidades}
+    """
+    for producto_id, cantidad in cantidades.items():
+        validar_cantidad(cantidad)
+        producto = productos[producto_id]
+        if producto.stock < cantidad:
+            raise StockInsuficiente(producto_id, cantidad, producto.stock)
+        producto.stock -= cantidad
+    Producto.objects.bulk_update([productos[pk] for pk in cantidades], ['stock'])
+
+
+def registrar_venta(venta):
+    """Descuenta el stock y guarda la venta en la misma transacción (todo o nada)"""
+    with transaction.atomic():
+        descontar_stock(venta.producto_id, venta.cantidad)
+        venta.save()
+    return venta
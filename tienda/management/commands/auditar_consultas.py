@@ -0,0 +1,153 @@
+# tienda/management/commands/auditar_consultas.py
+# Ejecuta EXPLAIN sobre todas las consultas de los reportes y falla si alguna recorre la tabla completa
+# Ejecutar con: python manage.py auditar_consultas --dias 30
+# (conviene correrlo con un volumen grande de datos; con tablas pequeñas la BD prefiere escanear)
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tienda.models import Cliente, Venta
+from tienda.reportes import DIMENSIONES_REPORTE, pagina_ventas, reporte_dimension, serie_ventas
+from tienda.resumenes import inicio_del_dia, resumen_periodo, top_dimension
+
+# Tablas grandes en las que un escaneo completo es un error
+TABLAS_AUDITADAS = ('tienda_venta', 'tienda_resumenventadiario')
+
+# Sin caché para que cada vista ejecute realmente sus consultas
+SIN_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Corre EXPLAIN sobre cada consulta de los reportes de ventas y detecta escaneos completos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=30, help='Días hacia atrás del periodo auditado')
+        parser.add_argument('--usuario', help='Superusuario con el que se recorren las vistas')
+        parser.add_argument('--minimo-ventas', type=int, default=100000,
+                            help='Avisa si hay menos ventas (los planes de tablas pequeñas no son representativos)')
+
+    def handle(self, *args, **options):
+        total_ventas = Venta.objects.count()
+        if total_ventas < options['minimo_ventas']:
+            self.stdout.write(self.style.WARNING(
+                f'Solo hay {total_ventas} ventas; genere un volumen mayor para que los planes sean representativos.'
+            ))
+
+        consultas = self.capturar_consultas(options)
+        self.stdout.write(f'{len(consultas)} consultas distintas capturadas\n')
+
+        escaneos = []
+        for nombre, sql, params in consultas:
+            tablas = self.tablas_escaneadas(sql, params)
+            estado = self.style.ERROR('ESCANEO ' + ', '.join(tablas)) if tablas else self.style.SUCCESS('ok')
+            self.stdout.write(f'[{nombre}] {estado}\n    {sql[:160]}')
+            if tablas:
+                escaneos.extend(nombre.split(', '))
+
+        if escaneos:
+            raise CommandError(f'{len(escaneos)} consulta(s) con escaneo completo: {", ".join(sorted(set(escaneos)))}')
+        self.stdout.write(self.style.SUCCESS('\n✓ Ninguna consulta de reportes recorre tablas completas'))
+
+    # ============ CAPTURA ============
+    def capturar_consultas(self, options):
+        """Ejecuta vistas y funciones de reportes y regresa [(orígenes, sql, params)] sin repetir SQL"""
+        if options['usuario']:
+            usuario = User.objects.get(username=options['usuario'])
+        else:
+            usuario = User.objects.filter(is_superuser=True).first()
+        if usuario is None:
+            raise CommandError('Se necesita un superusuario (o --usuario) para recorrer las vistas')
+
+        hoy = timezone.localdate()
+        desde = hoy - timedelta(days=options['dias'])
+        inicio, fin = inicio_del_dia(desde), inicio_del_dia(hoy + timedelta(days=1))
+        parcial = inicio + timedelta(hours=7)  # Rango que no empieza a medianoche: usa ventas sin resumir
+        rango = f'?inicio={desde}&fin={hoy}'
+        cliente = Cliente.objects.filter(ventas__isnull=False).first()
+
+        origenes = [
+            ('dashboard', lambda c: c.get(reverse('home'))),
+            ('reporte_ventas', lambda c: c.get(reverse('reporte_ventas') + rango + '&generar_reporte=1')),
+            ('reporte_grafica', lambda c: c.get(reverse('reporte_ventas_grafica') + rango)),
+            ('reporte_exportar', lambda c: b''.join(c.get(reverse('reporte_ventas_exportar') + rango).streaming_content)),
+            ('resumen_parcial', lambda c: resumen_periodo(parcial, fin)),
+            ('top_productos_parcial', lambda c: top_dimension('producto', parcial, fin)),
+            ('top_clientes_parcial', lambda c: top_dimension('cliente', parcial, fin)),
+            ('historial_cliente', lambda c: list(
+                Venta.objects.filter(cliente=cliente).select_related('producto').order_by('-id')[:50]
+            )),
+            ('reporte_serie', lambda c: c.get(reverse('reporte_ventas_serie') + rango + '&granularidad=dia')),
+            ('serie_ventas', lambda c: serie_ventas(inicio, fin, 'dia')),
+            ('serie_ventas_comparada', lambda c: serie_ventas(inicio, fin, 'semana', comparar=True)),
+            *[
+                (f'dimension_{dimension}', lambda c, dimension=dimension: reporte_dimension(dimension, inicio, fin))
+                for dimension in DIMENSIONES_REPORTE
+            ],
+            # La segunda página usa el cursor real de la primera (la consulta con Q(fecha_venta < ...))
+            ('pagina_ventas_siguiente', lambda c: pagina_ventas(
+                inicio, fin, pagina_ventas(inicio, fin)['siguiente']
+            )),
+        ]
+
+        capturadas = []
+        actual = {'origen': None}
+
+        def registrar(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                capturadas.append((actual['origen'], sql, params))
+            return execute(sql, params, many, context)
+
+        # El cliente de pruebas usa el host 'testserver' (sin setup_test_environment, que no se
+        # puede llamar dos veces y no se deshacía al terminar)
+        with override_settings(CACHES=SIN_CACHE, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            cliente_http = Client()
+            cliente_http.force_login(usuario)
+            with connection.execute_wrapper(registrar):
+                for origen, ejecutar in origenes:
+                    actual['origen'] = origen
+                    ejecutar(cliente_http)
+
+        # Cada SQL se revisa una vez, pero se reportan todos los orígenes que la ejecutan
+        unicas = {}
+        for origen, sql, params in capturadas:
+            origenes_sql = unicas.setdefault(sql, ([], params))[0]
+            if origen not in origenes_sql:
+                origenes_sql.append(origen)
+        return [(', '.join(origenes_sql), sql, params) for sql, (origenes_sql, params) in unicas.items()]
+
+    # ============ EXPLAIN ============
+    def tablas_escaneadas(self, sql, params):
+        """Tablas auditadas que el plan recorre completas, según el motor de BD"""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute('EXPLAIN ' + sql, params)
+                columnas = [c[0] for c in cursor.description]
+                filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+                return sorted({
+                    f['table'] for f in filas
+                    if f.get('type') == 'ALL' and f.get('table') in TABLAS_AUDITADAS
+                })
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                tablas = set()
+                for fila in cursor.fetchall():
+                    detalle = fila[-1]
+                    partes = detalle.split()
+                    if len(partes) >= 2 and partes[0] == 'SCAN' and 'INDEX' not in detalle:
+                        if partes[1] in TABLAS_AUDITADAS:
+                            tablas.add(partes[1])
+                return sorted(tablas)
+            if connection.vendor == 'postgresql':
+                cursor.execute('EXPLAIN ' + sql, params)
+                return sorted({
+                    tabla for (linea,) in cursor.fetchall() for tabla in TABLAS_AUDITADAS
+                    if f'Seq Scan on {tabla}' in linea
+                })
+        raise CommandError(f'Motor de BD no soportado: {connection.vendor}')
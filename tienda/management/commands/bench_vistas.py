@@ -0,0 +1,249 @@
+# tienda/management/commands/bench_vistas.py
+# Benchmark repetible de todas las vistas de tienda/urls.py con el cliente de pruebas de Django
+# Ejecutar con: python manage.py bench_vistas --salida base.json
+#          y luego: python manage.py bench_vistas --base base.json  (falla si hay regresiones)
+# (conviene correrlo sobre los datos de `python manage.py generar_datos`)
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from tienda import urls as urls_tienda
+from tienda.models import Categoria, Cliente, Producto, Proveedor
+
+# Rutas que no se miden (cambian la sesión del cliente de pruebas)
+RUTAS_OMITIDAS = {'login', 'logout'}
+
+# Rutas que solo puede ver un usuario con rol 'cliente'
+RUTAS_CLIENTE = {'mis_compras', 'cliente_mi_perfil'}
+
+# Modelo del que se toma el <pk> según el prefijo del nombre de la ruta
+MODELOS_POR_PREFIJO = {
+    'producto_': Producto,
+    'categoria_': Categoria,
+    'proveedor_': Proveedor,
+    'cliente_': Cliente,
+}
+
+# Variantes adicionales de algunas rutas: nombre -> [(sufijo de la etiqueta, query string)]
+# {rango} se sustituye por el periodo medido (?inicio=...&fin=...)
+ESCENARIOS = {
+    'producto_lista': [('', ''), ('precio_desc', '?orden=-precio')],
+    'reporte_ventas': [('', '{rango}'), ('generado', '{rango}&generar_reporte=1')],
+    'reporte_ventas_grafica': [('', '{rango}')],
+    'reporte_ventas_exportar': [('', '{rango}&formato=csv')],
+}
+
+# Sin caché para que cada petición ejecute realmente sus consultas (opcional)
+SIN_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempos, consultas y tamaño de respuesta de cada vista y compara contra una línea base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20, help='Peticiones medidas por vista')
+        parser.add_argument('--calentamiento', type=int, default=2, help='Peticiones previas que no se miden')
+        parser.add_argument('--dias', type=int, default=30, help='Días del periodo usado en los reportes')
+        parser.add_argument('--usuario', help='Superusuario con el que se recorren las vistas')
+        parser.add_argument('--usuario-cliente', help="Usuario con rol 'cliente' para mis_compras y mi perfil")
+        parser.add_argument('--solo', nargs='*', default=[], help='Medir solo estas rutas (nombres de URL)')
+        parser.add_argument('--sin-cache', action='store_true', help='Desactiva la caché durante la medición')
+        parser.add_argument('--salida', help='Archivo JSON donde se guarda el resultado (nueva línea base)')
+        parser.add_argument('--base', help='Línea base JSON contra la que se compara')
+        parser.add_argument('--umbral', type=float, default=0.25,
+                            help='Aumento relativo permitido en p95 y bytes (0.25 = 25%%)')
+        parser.add_argument('--margen-ms', type=float, default=5.0,
+                            help='Aumento absoluto de p95 por debajo del cual no se reporta regresión')
+        parser.add_argument('--consultas-extra', type=int, default=0,
+                            help='Consultas adicionales permitidas respecto a la línea base')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser al menos 1')
+
+        clientes_http = self.clientes_http(options)
+        rutas = self.rutas(options)
+
+        resultados = {}
+        cache = SIN_CACHE if options['sin_cache'] else settings.CACHES
+        # El cliente de pruebas se presenta como "testserver"
+        with override_settings(CACHES=cache, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for etiqueta, nombre, url in rutas:
+                cliente_http = clientes_http['cliente' if nombre in RUTAS_CLIENTE else 'staff']
+                if cliente_http is None:
+                    self.stdout.write(self.style.WARNING(f'{etiqueta}: omitida (no hay usuario con rol cliente)'))
+                    continue
+                resultados[etiqueta] = self.medir(cliente_http, url, options)
+                self.imprimir(etiqueta, resultados[etiqueta])
+
+        reporte = {
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'bd': connection.vendor,
+            'repeticiones': options['repeticiones'],
+            'sin_cache': options['sin_cache'],
+            'vistas': resultados,
+        }
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'\n✓ Resultados guardados en {options["salida"]}'))
+
+        if options['base']:
+            self.comparar(resultados, options)
+
+    # ============ PREPARACIÓN ============
+    def clientes_http(self, options):
+        """Clientes de pruebas con sesión iniciada: uno de staff y otro con rol cliente (si existe)"""
+        if options['usuario']:
+            staff = User.objects.filter(username=options['usuario']).first()
+        else:
+            staff = User.objects.filter(is_superuser=True).first()
+        if staff is None:
+            raise CommandError('Se necesita un superusuario (o --usuario) para recorrer las vistas')
+
+        if options['usuario_cliente']:
+            comprador = User.objects.filter(username=options['usuario_cliente']).first()
+        else:
+            comprador = User.objects.filter(perfil__rol='cliente', cliente__isnull=False).first()
+
+        clientes = {'staff': Client(), 'cliente': None}
+        clientes['staff'].force_login(staff)
+        if comprador:
+            clientes['cliente'] = Client()
+            clientes['cliente'].force_login(comprador)
+        return clientes
+
+    def rutas(self, options):
+        """Lista [(etiqueta, nombre, url)] de todas las rutas GET de la app"""
+        hoy = timezone.localdate()
+        rango = f'?inicio={hoy - timedelta(days=options["dias"])}&fin={hoy}'
+
+        rutas = []
+        for patron in urls_tienda.urlpatterns:
+            if not isinstance(patron, URLPattern) or not patron.name:
+                continue
+            nombre = patron.name
+            if nombre in RUTAS_OMITIDAS or (options['solo'] and nombre not in options['solo']):
+                continue
+
+            kwargs = {}
+            if 'pk' in patron.pattern.converters:
+                modelo = next((m for p, m in MODELOS_POR_PREFIJO.items() if nombre.startswith(p)), None)
+                pk = modelo.objects.order_by('pk').values_list('pk', flat=True).first() if modelo else None
+                if pk is None:
+                    self.stdout.write(self.style.WARNING(f'{nombre}: omitida (no hay registros para el <pk>)'))
+                    continue
+                kwargs['pk'] = pk
+
+            base = reverse(nombre, kwargs=kwargs)
+            for sufijo, query in ESCENARIOS.get(nombre, [('', '')]):
+                etiqueta = f'{nombre}:{sufijo}' if sufijo else nombre
+                rutas.append((etiqueta, nombre, base + query.format(rango=rango)))
+        return rutas
+
+    # ============ MEDICIÓN ============
+    def medir(self, cliente_http, url, options):
+        """Ejecuta la petición varias veces y regresa percentiles, consultas, tiempo SQL y bytes"""
+        sql = {'consultas': 0, 'segundos': 0.0}
+
+        def contar(execute, consulta, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(consulta, params, many, context)
+            finally:
+                sql['consultas'] += 1
+                sql['segundos'] += time.perf_counter() - inicio
+
+        for _ in range(options['calentamiento']):
+            self.peticion(cliente_http, url)
+
+        tiempos, consultas, tiempos_sql = [], [], []
+        estado, tamano = None, 0
+        with connection.execute_wrapper(contar):
+            for _ in range(options['repeticiones']):
+                sql['consultas'], sql['segundos'] = 0, 0.0
+                inicio = time.perf_counter()
+                estado, tamano = self.peticion(cliente_http, url)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                consultas.append(sql['consultas'])
+                tiempos_sql.append(sql['segundos'] * 1000)
+
+        return {
+            'url': url,
+            'estado': estado,
+            'p50_ms': round(percentil(tiempos, 50), 2),
+            'p95_ms': round(percentil(tiempos, 95), 2),
+            'p99_ms': round(percentil(tiempos, 99), 2),
+            # Se guarda el máximo: una consulta de más en cualquier repetición es regresión
+            'consultas': max(consultas),
+            'sql_ms': round(statistics.median(tiempos_sql), 2),
+            'bytes': tamano,
+        }
+
+    def peticion(self, cliente_http, url):
+        """GET completo (incluye consumir respuestas en streaming); regresa (estado, bytes)"""
+        respuesta = cliente_http.get(url)
+        if respuesta.streaming:
+            contenido = b''.join(respuesta.streaming_content)
+        else:
+            contenido = respuesta.content
+        return respuesta.status_code, len(contenido)
+
+    def imprimir(self, etiqueta, r):
+        estado = r['estado'] if r['estado'] == 200 else self.style.WARNING(str(r['estado']))
+        self.stdout.write(
+            f'{etiqueta:<34} {estado}  p50 {r["p50_ms"]:>8.2f} ms  p95 {r["p95_ms"]:>8.2f} ms  '
+            f'p99 {r["p99_ms"]:>8.2f} ms  {r["consultas"]:>4} consultas  '
+            f'SQL {r["sql_ms"]:>8.2f} ms  {r["bytes"]:>9} bytes'
+        )
+
+    # ============ COMPARACIÓN CON LA LÍNEA BASE ============
+    def comparar(self, resultados, options):
+        """Falla si alguna vista empeora más allá de los umbrales configurados"""
+        try:
+            with open(options['base'], encoding='utf-8') as archivo:
+                base = json.load(archivo)['vistas']
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'No se pudo leer la línea base {options["base"]}: {error}')
+
+        regresiones = []
+        for etiqueta, actual in resultados.items():
+            anterior = base.get(etiqueta)
+            if anterior is None:
+                continue  # Vista nueva: no hay contra qué comparar
+            if actual['estado'] != anterior['estado']:
+                regresiones.append(f'{etiqueta}: estado {anterior["estado"]} -> {actual["estado"]}')
+            if actual['consultas'] > anterior['consultas'] + options['consultas_extra']:
+                regresiones.append(f'{etiqueta}: consultas {anterior["consultas"]} -> {actual["consultas"]}')
+            limite = anterior['p95_ms'] * (1 + options['umbral'])
+            if actual['p95_ms'] > limite and actual['p95_ms'] - anterior['p95_ms'] > options['margen_ms']:
+                regresiones.append(f'{etiqueta}: p95 {anterior["p95_ms"]} ms -> {actual["p95_ms"]} ms')
+            if actual['bytes'] > anterior['bytes'] * (1 + options['umbral']):
+                regresiones.append(f'{etiqueta}: bytes {anterior["bytes"]} -> {actual["bytes"]}')
+
+        if regresiones:
+            raise CommandError(
+                f'{len(regresiones)} regresión(es) respecto a {options["base"]}:\n  ' + '\n  '.join(regresiones)
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ Sin regresiones respecto a {options["base"]}'))
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) con interpolación lineal entre los valores ordenados"""
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicion = (len(ordenados) - 1) * p / 100
+    abajo = int(posicion)
+    arriba = min(abajo + 1, len(ordenados) - 1)
+    return ordenados[abajo] + (ordenados[arriba] - ordenados[abajo]) * (posicion - abajo)
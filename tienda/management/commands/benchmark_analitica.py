@@ -0,0 +1,128 @@
+# tienda/management/commands/benchmark_analitica.py
+# Compara las estadísticas de un periodo calculadas con varias consultas agregadas (SQL)
+# contra una sola lectura a arreglos de NumPy (tienda/analitica.py)
+# Ejecutar con: python manage.py benchmark_analitica --dias 365
+# (para medir con 1M de ventas: python manage.py generar_datos --ventas 1000000 --limpiar)
+import importlib.util
+import math
+from decimal import Decimal
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tienda.models import Venta
+from tienda.resumenes import inicio_del_dia
+
+PERCENTILES = (50, 90, 99)
+DIMENSIONES = ('producto', 'cliente')
+
+
+def estadisticas_sql(inicio, fin, limite, intervalos):
+    """Enfoque de consultas: un aggregate o GROUP BY por cada dato del reporte"""
+    ventas = Venta.objects.filter(fecha_venta__gte=inicio, fecha_venta__lt=fin).order_by()
+    resumen = ventas.aggregate(num_ventas=Count('id'), unidades=Sum('cantidad'), ingresos=Sum('total'),
+                               minimo=Min('total'), maximo=Max('total'))
+    n = resumen['num_ventas']
+
+    tops = {
+        dimension: [
+            fila['clave'] for fila in
+            ventas.values(clave=F(f'{dimension}_id')).annotate(i=Sum('total')).order_by('-i', 'clave')[:limite]
+        ]
+        for dimension in DIMENSIONES
+    }
+
+    # Percentil 'lower': el importe en la posición floor((n - 1) * p / 100), una consulta por percentil
+    percentiles = [
+        ventas.order_by('total', 'id').values_list('total', flat=True)[math.floor((n - 1) * p / 100)]
+        for p in PERCENTILES
+    ] if n else []
+
+    histograma = []
+    if n:
+        ancho = (resumen['maximo'] - resumen['minimo']) / intervalos
+        limites = [resumen['minimo'] + ancho * i for i in range(intervalos)] + [resumen['maximo']]
+        # Un COUNT filtrado por intervalo (el último incluye el máximo, como np.histogram)
+        conteos = ventas.aggregate(**{
+            f'i{i}': Count('id', filter=Q(total__gte=limites[i]) & (
+                Q(total__lte=limites[i + 1]) if i == intervalos - 1 else Q(total__lt=limites[i + 1])
+            ))
+            for i in range(intervalos)
+        })
+        histograma = [conteos[f'i{i}'] for i in range(intervalos)]
+
+    return {
+        'num_ventas': n, 'unidades': resumen['unidades'] or 0,
+        # SQLite suma los decimales como flotantes: se redondea a centavos para comparar
+        'ingresos': Decimal(resumen['ingresos'] or 0).quantize(Decimal('0.01')),
+        'tops': tops, 'percentiles': percentiles, 'histograma': histograma,
+    }
+
+
+def estadisticas_numpy(inicio, fin, limite, intervalos):
+    """Enfoque vectorizado: una sola lectura de columnas y el resto en memoria"""
+    from tienda import analitica  # NumPy solo se importa al correr este benchmark
+
+    ventas = analitica.cargar_ventas(inicio, fin)
+    resumen = analitica.totales(ventas, PERCENTILES)
+    return {
+        'num_ventas': resumen['num_ventas'], 'unidades': resumen['unidades'], 'ingresos': resumen['ingresos'],
+        'tops': {d: [f['clave'] for f in analitica.top(ventas, d, limite=limite)] for d in DIMENSIONES},
+        'percentiles': list(resumen['percentiles'].values()) if resumen['num_ventas'] else [],
+        'histograma': analitica.histograma(ventas, intervalos)['conteos'],
+        'bytes': sum(arreglo.nbytes for arreglo in ventas.values()),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mide las estadísticas de ventas con varias consultas SQL contra NumPy y verifica que coincidan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=365, help='Días del periodo (terminando hoy)')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Mediciones por enfoque (se reporta la mediana)')
+        parser.add_argument('--limite', type=int, default=5, help='Tamaño de los top de productos y clientes')
+        parser.add_argument('--intervalos', type=int, default=10, help='Intervalos del histograma de importes')
+
+    def medir(self, funcion, inicio, fin, options):
+        tiempos, resultado, consultas = [], None, 0
+        for _ in range(options['repeticiones']):
+            with CaptureQueriesContext(connection) as capturadas:
+                comienzo = time.perf_counter()
+                resultado = funcion(inicio, fin, options['limite'], options['intervalos'])
+                tiempos.append(time.perf_counter() - comienzo)
+            consultas = len(capturadas)
+        return statistics.median(tiempos), consultas, resultado
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec('numpy') is None:
+            raise CommandError('El benchmark requiere NumPy, dependencia opcional (pip install numpy)')
+        fin = inicio_del_dia(timezone.localdate() + timedelta(days=1))
+        inicio = fin - timedelta(days=options['dias'])
+
+        t_sql, q_sql, sql = self.medir(estadisticas_sql, inicio, fin, options)
+        t_np, q_np, vectorizado = self.medir(estadisticas_numpy, inicio, fin, options)
+
+        self.stdout.write(f"Ventas en el periodo:  {sql['num_ventas']:,}")
+        self.stdout.write(f'Consultas SQL:         {t_sql * 1000:9.1f} ms  ({q_sql} consultas)')
+        self.stdout.write(f'NumPy:                 {t_np * 1000:9.1f} ms  ({q_np} consulta(s), '
+                          f"{vectorizado['bytes'] / 1024 ** 2:.1f} MB en arreglos)")
+        if t_np:
+            self.stdout.write(f'Relación SQL / NumPy:  {t_sql / t_np:9.2f}x')
+
+        # Los dos enfoques deben dar exactamente lo mismo (el histograma puede diferir en los
+        # bordes de los intervalos por redondeo, solo se compara el total de ventas que cuenta)
+        diferencias = [
+            campo for campo in ('num_ventas', 'unidades', 'ingresos', 'tops', 'percentiles')
+            if sql[campo] != vectorizado[campo]
+        ]
+        if sum(sql['histograma']) != sum(vectorizado['histograma']):
+            diferencias.append('histograma')
+        if diferencias:
+            raise CommandError(f"Los resultados no coinciden en: {', '.join(diferencias)}")
+        self.stdout.write(self.style.SUCCESS('✓ Ambos enfoques dan los mismos resultados'))
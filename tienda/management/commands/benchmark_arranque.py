@@ -0,0 +1,95 @@
+# tienda/management/commands/benchmark_arranque.py
+# Mide el costo de arranque de un proceso (django.setup + resolución de URLs)
+# Ejecutar con: python manage.py benchmark_arranque --max-ms 1500 --max-rss-mb 120
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Script que corre en un proceso nuevo, igual que un worker recién iniciado
+SCRIPT_ARRANQUE = """
+import json, resource, sys, time
+inicio = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+resolver = get_resolver()
+resolver.url_patterns           # Importa tienda.urls -> tienda.views
+resolver.reverse_dict           # Construye el índice de nombres de URL
+duracion = time.perf_counter() - inicio
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'ms': duracion * 1000, 'rss_kb': rss_kb, 'modulos': sorted(sys.modules)}))
+"""
+
+# Módulos pesados que no deben cargarse al arrancar (solo al generar reportes/exportaciones)
+PROHIBIDOS_POR_DEFECTO = ('pandas', 'plotly', 'numpy', 'openpyxl')
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo de importación y memoria (RSS) al arrancar Django y falla si hay regresiones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=3, help='Procesos a lanzar (se reporta la mediana)')
+        parser.add_argument('--max-ms', type=float, help='Falla si el arranque tarda más de estos milisegundos')
+        parser.add_argument('--max-rss-mb', type=float, help='Falla si la memoria máxima supera estos MB')
+        parser.add_argument('--prohibidos', nargs='*', default=PROHIBIDOS_POR_DEFECTO,
+                            help='Paquetes que no deben importarse al arrancar')
+        parser.add_argument('--top', type=int, default=10, help='Módulos más lentos a mostrar')
+
+    def handle(self, *args, **options):
+        entorno = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        mediciones = []
+        importtime = ''
+        for _ in range(options['repeticiones']):
+            proceso = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', SCRIPT_ARRANQUE],
+                cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True,
+            )
+            if proceso.returncode != 0:
+                raise CommandError(f'El proceso de arranque falló:\n{proceso.stderr[-2000:]}')
+            mediciones.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+            importtime = proceso.stderr
+
+        mediciones.sort(key=lambda m: m['ms'])
+        mediana = mediciones[len(mediciones) // 2]
+        rss_mb = mediana['rss_kb'] / 1024  # En Linux ru_maxrss viene en KB
+
+        self.stdout.write(f"Arranque (mediana de {len(mediciones)}): {mediana['ms']:.0f} ms")
+        self.stdout.write(f"Memoria máxima (RSS):   {rss_mb:.1f} MB")
+        self.stdout.write(f"Módulos importados:     {len(mediana['modulos'])}")
+
+        # Paquetes de primer nivel más costosos según -X importtime (tiempo acumulado)
+        self.stdout.write("\nImportaciones más lentas:")
+        for microsegundos, modulo in self.importaciones_lentas(importtime)[:options['top']]:
+            self.stdout.write(f"  {microsegundos / 1000:8.1f} ms  {modulo}")
+
+        errores = []
+        cargados = [
+            paquete for paquete in options['prohibidos']
+            if any(m == paquete or m.startswith(paquete + '.') for m in mediana['modulos'])
+        ]
+        if cargados:
+            errores.append(f"Se importan al arrancar: {', '.join(cargados)}")
+        if options['max_ms'] and mediana['ms'] > options['max_ms']:
+            errores.append(f"Arranque de {mediana['ms']:.0f} ms supera el límite de {options['max_ms']:.0f} ms")
+        if options['max_rss_mb'] and rss_mb > options['max_rss_mb']:
+            errores.append(f"RSS de {rss_mb:.1f} MB supera el límite de {options['max_rss_mb']:.1f} MB")
+
+        if errores:
+            raise CommandError('Regresión de arranque: ' + '; '.join(errores))
+        self.stdout.write(self.style.SUCCESS('\n✓ Arranque dentro de los límites'))
+
+    @staticmethod
+    def importaciones_lentas(salida):
+        """Lee la salida de -X importtime y regresa [(acumulado_us, paquete)] de primer nivel"""
+        resultado = []
+        for linea in salida.splitlines():
+            if not linea.startswith('import time:') or 'cumulative' in linea:
+                continue
+            _, acumulado, nombre = linea[len('import time:'):].split('|')
+            if not nombre.startswith('  '):  # Sin sangría extra = importado directamente
+                resultado.append((int(acumulado), nombre.strip()))
+        return sorted(resultado, reverse=True)
@@ -0,0 +1,84 @@
+# tienda/management/commands/benchmark_stock.py
+# Prueba de concurrencia del descuento de inventario
+# Ejecutar con: python manage.py benchmark_stock --ventas 500 --hilos 32 --stock 200
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, DatabaseError
+
+from tienda.inventario import registrar_venta, StockInsuficiente
+from tienda.models import Categoria, Cliente, Producto, Venta
+
+
+class Command(BaseCommand):
+    help = 'Lanza N ventas en paralelo contra un mismo producto y verifica que no haya sobreventa'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventas', type=int, default=500, help='Número de ventas que se intentan')
+        parser.add_argument('--hilos', type=int, default=16, help='Ventas simultáneas (cajeros)')
+        parser.add_argument('--stock', type=int, default=200, help='Stock inicial del producto de prueba')
+        parser.add_argument('--cantidad', type=int, default=1, help='Unidades por venta')
+
+    def handle(self, *args, **options):
+        stock_inicial = options['stock']
+        cantidad = options['cantidad']
+
+        # Datos temporales para la prueba (se eliminan al final)
+        categoria = Categoria.objects.create(nombre='__benchmark_stock__')
+        producto = Producto.objects.create(
+            nombre='__benchmark_stock__', descripcion='Producto temporal de benchmark',
+            precio=Decimal('10.00'), stock=stock_inicial, categoria=categoria,
+        )
+        cliente = Cliente.objects.create(
+            nombre='Benchmark', apellido='Stock', email=f'benchmark-stock-{producto.pk}@ejemplo.com',
+            telefono='0', direccion='-',
+        )
+
+        def vender(_):
+            # Cada hilo usa su propia conexión a la BD
+            try:
+                registrar_venta(Venta(
+                    cliente_id=cliente.pk, producto_id=producto.pk,
+                    cantidad=cantidad, precio_unitario=producto.precio,
+                ))
+                return 'ok'
+            except StockInsuficiente:
+                return 'sin_stock'
+            except DatabaseError:
+                return 'error'
+            finally:
+                connection.close()
+
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['hilos']) as pool:
+                resultados = list(pool.map(vender, range(options['ventas'])))
+            duracion = time.perf_counter() - inicio
+
+            exitosas = resultados.count('ok')
+            stock_final = Producto.objects.get(pk=producto.pk).stock
+            ventas_guardadas = Venta.objects.filter(producto=producto).count()
+
+            self.stdout.write(f"Ventas intentadas:     {len(resultados)}")
+            self.stdout.write(f"Ventas exitosas:       {exitosas}")
+            self.stdout.write(f"Rechazadas sin stock:  {resultados.count('sin_stock')}")
+            self.stdout.write(f"Errores de BD:         {resultados.count('error')}")
+            self.stdout.write(f"Stock inicial / final: {stock_inicial} / {stock_final}")
+            self.stdout.write(f"Tiempo total:          {duracion:.3f} s")
+            self.stdout.write(f"Rendimiento:           {len(resultados) / duracion:.1f} ventas/s")
+
+            # Verificaciones: el stock nunca es negativo y cuadra con las ventas guardadas
+            if stock_final < 0:
+                raise CommandError(f'Sobreventa detectada: stock final {stock_final}')
+            if stock_final != stock_inicial - exitosas * cantidad or ventas_guardadas != exitosas:
+                raise CommandError(
+                    f'Inconsistencia: {exitosas} ventas exitosas, {ventas_guardadas} guardadas, '
+                    f'stock final {stock_final}'
+                )
+            self.stdout.write(self.style.SUCCESS('✓ Sin sobreventa: stock y ventas cuadran'))
+        finally:
+            producto.delete()
+            categoria.delete()
+            cliente.delete()
@@ -0,0 +1,272 @@
+# tienda/management/commands/generar_datos.py
+# Genera datos sintéticos con volumen configurable para pruebas de carga
+# (reemplaza al antiguo script cargar_datos_ejemplo.py)
+#
+# Ejemplos:
+#   python manage.py generar_datos                       # Volumen pequeño de ejemplo
+#   python manage.py generar_datos --productos 1000000 --clientes 500000 --ventas 5000000
+#   python manage.py generar_datos --limpiar --semilla 7 # Borra los datos de la tienda y regenera
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from tienda.contadores import invalidar_contadores
+from tienda.models import (
+    Categoria, Cliente, Producto, Proveedor, ResumenCliente, ResumenVentaDiario, TerminoProducto, Ticket, Venta,
+)
+
+# ============ CATÁLOGOS PARA NOMBRES REALISTAS ============
+CATEGORIAS = [
+    'Electrónica', 'Ropa', 'Alimentos', 'Hogar', 'Deportes', 'Juguetes', 'Papelería', 'Ferretería',
+    'Belleza', 'Mascotas', 'Jardín', 'Automotriz', 'Bebés', 'Libros', 'Música', 'Farmacia',
+]
+ARTICULOS = [
+    'Laptop', 'Mouse', 'Teclado', 'Playera', 'Jeans', 'Café', 'Galletas', 'Sartén', 'Toalla', 'Balón',
+    'Muñeca', 'Cuaderno', 'Martillo', 'Shampoo', 'Croquetas', 'Maceta', 'Aceite', 'Pañales', 'Novela',
+    'Audífonos', 'Lámpara', 'Silla', 'Mochila', 'Reloj', 'Cargador', 'Taladro', 'Vaso', 'Sábana',
+]
+ADJETIVOS = [
+    'Premium', 'Básico', 'Pro', 'Eco', 'Clásico', 'Deluxe', 'Compacto', 'Inalámbrico', 'Grande',
+    'Mini', 'Azul', 'Negro', 'Rojo', 'Familiar', 'Gourmet', 'Deportivo', 'Infantil', 'Orgánico',
+]
+NOMBRES = [
+    'Ana', 'Pedro', 'Laura', 'Roberto', 'María', 'Juan', 'Carlos', 'Sofía', 'Luis', 'Fernanda',
+    'Jorge', 'Valeria', 'Miguel', 'Daniela', 'José', 'Camila', 'Diego', 'Lucía', 'Andrés', 'Paola',
+]
+APELLIDOS = [
+    'Martínez', 'Sánchez', 'Fernández', 'Torres', 'García', 'López', 'Pérez', 'Ramírez', 'Flores',
+    'Gómez', 'Díaz', 'Cruz', 'Morales', 'Reyes', 'Ortiz', 'Castillo', 'Vázquez', 'Romero',
+]
+
+# Estacionalidad: peso por mes (Buen Fin en noviembre, Navidad en diciembre) y por día de la semana
+PESO_MES = {1: 0.8, 2: 0.8, 3: 0.9, 4: 0.95, 5: 1.1, 6: 0.95, 7: 1.0, 8: 1.05, 9: 0.9, 10: 1.0, 11: 1.35, 12: 1.7}
+PESO_DIA_SEMANA = [0.9, 0.85, 0.9, 0.95, 1.15, 1.35, 1.2]  # Lunes .. domingo
+# Horas con más ventas: mediodía y salida del trabajo
+PESO_HORA = [0.05, 0.02, 0.01, 0.01, 0.01, 0.02, 0.1, 0.3, 0.6, 0.9, 1.1, 1.3,
+             1.6, 1.5, 1.2, 1.0, 1.0, 1.2, 1.5, 1.6, 1.3, 0.9, 0.5, 0.2]
+
+# Último día de ventas por defecto: fijo (no "hoy") para que una misma semilla genere
+# siempre los mismos datos sin importar el día en que se corre
+HASTA_POR_DEFECTO = date(2025, 12, 31)
+
+
+def pesos_zipf(n, s):
+    """Pesos acumulados de una distribución Zipf: el elemento k tiene peso 1 / k^s"""
+    acumulado = 0.0
+    pesos = []
+    for k in range(1, n + 1):
+        acumulado += 1.0 / (k ** s)
+        pesos.append(acumulado)
+    return pesos
+
+
+class Command(BaseCommand):
+    help = 'Genera categorías, proveedores, productos, clientes y ventas sintéticos con bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categorias', type=int, default=len(CATEGORIAS))
+        parser.add_argument('--proveedores', type=int, default=50)
+        parser.add_argument('--productos', type=int, default=2000)
+        parser.add_argument('--clientes', type=int, default=1000)
+        parser.add_argument('--ventas', type=int, default=50000)
+        parser.add_argument('--dias', type=int, default=365, help='Días de historial de ventas')
+        parser.add_argument('--hasta', type=date.fromisoformat, default=HASTA_POR_DEFECTO,
+                            help=f'Último día de ventas (AAAA-MM-DD, por defecto {HASTA_POR_DEFECTO})')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla para datos reproducibles')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas por bulk_create / transacción')
+        parser.add_argument('--zipf-productos', type=float, default=1.1, help='Sesgo de popularidad de productos')
+        parser.add_argument('--zipf-clientes', type=float, default=0.8, help='Sesgo de clientes frecuentes')
+        parser.add_argument('--limpiar', action='store_true', help='Borra antes los datos de la tienda (no los usuarios)')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['semilla'])
+        self.lote = options['lote']
+        inicio = time.perf_counter()
+
+        if options['limpiar']:
+            self.limpiar()
+
+        categorias = self.crear_categorias(options['categorias'])
+        proveedores = self.crear_proveedores(options['proveedores'])
+        precios = self.crear_productos(options['productos'], categorias, proveedores)
+        clientes = self.crear_clientes(options['clientes'])
+        self.crear_ventas(options, precios, clientes)
+
+        # Las cargas masivas no disparan señales: se recalculan los datos derivados
+        self.stdout.write('Reconstruyendo resúmenes diarios...')
+        call_command('reconstruir_resumenes', stdout=self.stdout)
+        self.stdout.write('Indexando productos para la búsqueda...')
+        call_command('reindexar_busqueda', stdout=self.stdout)
+        self.stdout.write('Contando productos por categoría...')
+        call_command('reconciliar_categorias', stdout=self.stdout)
+        invalidar_contadores()
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Datos generados en {time.perf_counter() - inicio:.1f} s'))
+
+    # ============ UTILIDADES ============
+    def insertar(self, modelo, objetos):
+        """bulk_create por lotes, cada lote en su propia transacción; regresa los ids creados en orden"""
+        ultimo_id = modelo.objects.aggregate(m=Max('id'))['m'] or 0
+        for i in range(0, len(objetos), self.lote):
+            with transaction.atomic():
+                modelo.objects.bulk_create(objetos[i:i + self.lote])
+        # MySQL no regresa los ids de bulk_create: se leen los recién insertados
+        return list(modelo.objects.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True))
+
+    def insertar_por_lotes(self, modelo, cantidad, fabricar):
+        """
+        Crea `cantidad` objetos con fabricar(i) de lote en lote (en memoria solo hay un lote
+        de instancias, no los cientos de miles de la corrida); regresa todos los ids creados
+        """
+        ids = []
+        for desde in range(0, cantidad, self.lote):
+            ids += self.insertar(modelo, [fabricar(i) for i in range(desde, min(desde + self.lote, cantidad))])
+        return ids
+
+    def limpiar(self):
+        self.stdout.write('Limpiando datos anteriores...')
+        # DELETE directo: evita que Django cargue millones de ventas para disparar señales
+        tablas = [
+            Producto.proveedores.through, Venta, Ticket, ResumenVentaDiario, ResumenCliente, TerminoProducto,
+            Producto, Categoria, Proveedor, Cliente,
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for modelo in tablas:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(modelo._meta.db_table)}')
+
+    # ============ CATÁLOGOS ============
+    def crear_categorias(self, cantidad):
+        ids = self.insertar_por_lotes(Categoria, cantidad, lambda i: Categoria(
+            nombre=CATEGORIAS[i % len(CATEGORIAS)] + ('' if i < len(CATEGORIAS) else f' {i // len(CATEGORIAS) + 1}'),
+            descripcion='Categoría generada',
+        ))
+        self.stdout.write(f'✓ {len(ids)} categorías')
+        return ids
+
+    def crear_proveedores(self, cantidad):
+        ids = self.insertar_por_lotes(Proveedor, cantidad, lambda i: Proveedor(
+            nombre=f'{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)}',
+            empresa=f'Distribuidora {self.rng.choice(APELLIDOS)} {i + 1}',
+            telefono=f'662-{self.rng.randint(100, 999)}-{self.rng.randint(1000, 9999)}',
+            email=f'proveedor{i + 1}@ejemplo.com',
+            direccion='Hermosillo, Sonora',
+        ))
+        self.stdout.write(f'✓ {len(ids)} proveedores')
+        return ids
+
+    def crear_productos(self, cantidad, categorias, proveedores):
+        """Crea los productos por lotes y regresa {producto_id: precio}"""
+        precios = {}
+        relacion = Producto.proveedores.through
+        # Unas pocas categorías concentran la mayoría de productos
+        pesos_categoria = pesos_zipf(len(categorias), 0.7)
+
+        for desde in range(0, cantidad, self.lote):
+            objetos = []
+            for i in range(desde, min(desde + self.lote, cantidad)):
+                # Precios con distribución log-normal: muchos baratos, pocos caros
+                precio = Decimal(str(round(min(self.rng.lognormvariate(5.3, 1.0), 99999), 2)))
+                objetos.append(Producto(
+                    nombre=f'{self.rng.choice(ARTICULOS)} {self.rng.choice(ADJETIVOS)} {i + 1}',
+                    descripcion='Producto generado para pruebas de carga',
+                    precio=precio,
+                    stock=self.rng.randint(0, 500),
+                    categoria_id=self.rng.choices(categorias, cum_weights=pesos_categoria)[0],
+                    activo=self.rng.random() > 0.05,
+                ))
+            ids = self.insertar(Producto, objetos)
+            for producto_id, producto in zip(ids, objetos):
+                precios[producto_id] = producto.precio
+
+            # Cada producto tiene de 0 a 3 proveedores
+            if proveedores:
+                enlaces = [
+                    relacion(producto_id=producto_id, proveedor_id=proveedor_id)
+                    for producto_id in ids
+                    for proveedor_id in self.rng.sample(proveedores, min(len(proveedores), self.rng.randint(0, 3)))
+                ]
+                with transaction.atomic():
+                    relacion.objects.bulk_create(enlaces, batch_size=self.lote)
+
+        self.stdout.write(f'✓ {len(precios)} productos')
+        return precios
+
+    def crear_clientes(self, cantidad):
+        base = Cliente.objects.aggregate(m=Max('id'))['m'] or 0  # Hace únicos los correos entre corridas
+        ids = self.insertar_por_lotes(Cliente, cantidad, lambda i: Cliente(
+            nombre=self.rng.choice(NOMBRES),
+            apellido=f'{self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}',
+            email=f'cliente{base + i + 1}@ejemplo.com',
+            telefono=f'662-{self.rng.randint(100, 999)}-{self.rng.randint(1000, 9999)}',
+            direccion='Hermosillo, Sonora',
+        ))
+        self.stdout.write(f'✓ {len(ids)} clientes')
+        return ids
+
+    # ============ VENTAS ============
+    def crear_ventas(self, options, precios, clientes):
+        cantidad = options['ventas']
+        if not cantidad or not precios or not clientes:
+            return
+
+        # Popularidad Zipf: se barajan los ids para que los más vendidos no sean siempre los primeros
+        productos = list(precios)
+        self.rng.shuffle(productos)
+        pesos_productos = pesos_zipf(len(productos), options['zipf_productos'])
+        clientes = list(clientes)
+        self.rng.shuffle(clientes)
+        pesos_clientes = pesos_zipf(len(clientes), options['zipf_clientes'])
+
+        # Días del historial con peso estacional (mes y día de la semana)
+        hasta = options['hasta']
+        dias = [hasta - timedelta(days=n) for n in range(options['dias'])]
+        acumulado = 0.0
+        pesos_dias = []
+        for dia in dias:
+            acumulado += PESO_MES[dia.month] * PESO_DIA_SEMANA[dia.weekday()]
+            pesos_dias.append(acumulado)
+
+        vendedores = list(
+            User.objects.filter(perfil__rol__in=['vendedor', 'gerente', 'administrador', 'admin'])
+            .values_list('id', flat=True)
+        ) or [None]
+
+        zona = timezone.get_current_timezone()
+        creadas = 0
+        while creadas < cantidad:
+            tamano = min(self.lote, cantidad - creadas)
+            elegidos = self.rng.choices(productos, cum_weights=pesos_productos, k=tamano)
+            compradores = self.rng.choices(clientes, cum_weights=pesos_clientes, k=tamano)
+            fechas = self.rng.choices(dias, cum_weights=pesos_dias, k=tamano)
+            horas = self.rng.choices(range(24), weights=PESO_HORA, k=tamano)
+
+            ventas = []
+            for producto_id, cliente_id, dia, hora in zip(elegidos, compradores, fechas, horas):
+                unidades = self.rng.choices((1, 2, 3, 4, 5), weights=(70, 18, 7, 3, 2))[0]
+                precio = precios[producto_id]
+                momento = datetime(dia.year, dia.month, dia.day, hora, self.rng.randrange(60), self.rng.randrange(60))
+                ventas.append(Venta(
+                    cliente_id=cliente_id,
+                    producto_id=producto_id,
+                    vendedor_id=self.rng.choice(vendedores),
+                    cantidad=unidades,
+                    precio_unitario=precio,
+                    total=unidades * precio,  # bulk_create no llama a Venta.save
+                    fecha_venta=timezone.make_aware(momento, zona),
+                ))
+            ventas.sort(key=lambda venta: venta.fecha_venta)
+
+            with transaction.atomic():
+                Venta.objects.bulk_create(ventas)
+            creadas += tamano
+            self.stdout.write(f'  {creadas}/{cantidad} ventas', ending='\r')
+
+        self.stdout.write(f'✓ {creadas} ventas' + ' ' * 20)
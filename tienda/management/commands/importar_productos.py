@@ -0,0 +1,51 @@
+# tienda/management/commands/importar_productos.py
+# Importa (crea o actualiza por nombre) productos desde un CSV de lista de precios
+# Ejecutar con: python manage.py importar_productos lista_precios.csv
+# Columnas: nombre, precio, stock, categoria y opcionalmente proveedores (separados por |), descripcion, activo
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tienda.importacion import ErrorImportacion, TAMANO_LOTE, importar_productos
+
+
+class Command(BaseCommand):
+    help = 'Importa productos desde un CSV (upsert por nombre) y reporta los errores por fila'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV (UTF-8, con encabezado)')
+        parser.add_argument('--delimitador', default=',', help='Separador de columnas (por defecto ",")')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por lote/transacción')
+        parser.add_argument('--no-crear', action='store_true',
+                            help='No crear categorías ni proveedores inexistentes (la fila se rechaza)')
+        parser.add_argument('--simular', action='store_true', help='Valida todo y revierte los cambios al final')
+        parser.add_argument('--max-errores', type=int, default=50, help='Errores que se muestran en pantalla')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        try:
+            # utf-8-sig: acepta archivos exportados desde Excel (con BOM)
+            with open(options['archivo'], encoding='utf-8-sig', newline='') as archivo:
+                resultado = importar_productos(
+                    archivo,
+                    delimitador=options['delimitador'],
+                    crear_faltantes=not options['no_crear'],
+                    tamano_lote=options['lote'],
+                    simular=options['simular'],
+                )
+        except (OSError, UnicodeDecodeError, ErrorImportacion) as error:
+            raise CommandError(f'No se pudo importar {options["archivo"]}: {error}')
+
+        for linea, mensaje in resultado.errores[:options['max_errores']]:
+            self.stdout.write(self.style.WARNING(f'  línea {linea}: {mensaje}'))
+        if len(resultado.errores) > options['max_errores']:
+            self.stdout.write(f'  ... y {len(resultado.errores) - options["max_errores"]} error(es) más')
+
+        prefijo = '[SIMULACIÓN] ' if options['simular'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefijo}✓ {resultado.filas} filas en {time.perf_counter() - inicio:.1f} s: '
+            f'{resultado.creados} productos creados, {resultado.actualizados} actualizados, '
+            f'{resultado.sin_cambios} sin cambios, '
+            f'{len(resultado.errores)} con error; '
+            f'{resultado.categorias_creadas} categorías y {resultado.proveedores_creados} proveedores nuevos'
+        ))
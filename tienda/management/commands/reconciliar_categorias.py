@@ -0,0 +1,34 @@
+# tienda/management/commands/reconciliar_categorias.py
+# Verifica (y corrige) los conteos de productos guardados en cada categoría
+# Ejecutar con: python manage.py reconciliar_categorias [--solo-verificar]
+from django.core.management.base import BaseCommand
+
+from tienda.categorias import reconciliar_categorias
+
+
+class Command(BaseCommand):
+    help = 'Compara total_productos/productos_activos de cada categoría con un conteo real y corrige las diferencias'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo-verificar', action='store_true',
+                            help='Solo reporta las diferencias, sin corregirlas')
+        parser.add_argument('--max-diferencias', type=int, default=50, help='Diferencias que se muestran en pantalla')
+
+    def handle(self, *args, **options):
+        corregir = not options['solo_verificar']
+        diferencias = reconciliar_categorias(corregir=corregir)
+
+        for categoria, (total, activos), (total_real, activos_real) in diferencias[:options['max_diferencias']]:
+            self.stdout.write(self.style.WARNING(
+                f'  {categoria.nombre} (#{categoria.pk}): guardado {total}/{activos} activos, '
+                f'real {total_real}/{activos_real} activos'
+            ))
+        if len(diferencias) > options['max_diferencias']:
+            self.stdout.write(f'  ... y {len(diferencias) - options["max_diferencias"]} categoría(s) más')
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('✓ Los conteos de todas las categorías son correctos'))
+        elif corregir:
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(diferencias)} categoría(s) corregida(s)'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(diferencias)} categoría(s) con conteos incorrectos'))
@@ -0,0 +1,39 @@
+# tienda/management/commands/reconstruir_resumenes.py
+# Reconstruye desde cero los resúmenes diarios de ventas y el acumulado por cliente
+# Ejecutar con: python manage.py reconstruir_resumenes
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tienda.models import ResumenVentaDiario, Venta
+from tienda.resumenes import filas_resumen_diario, reconstruir_resumen_clientes
+
+
+class Command(BaseCommand):
+    help = 'Borra y vuelve a calcular los resúmenes de ventas (diarios y por cliente) a partir de la tabla de ventas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias-por-bloque', type=int, default=31,
+                            help='Días que se agrupan en memoria a la vez (limita la memoria usada)')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Ventas leídas por consulta y filas por cada bulk_create')
+
+    def handle(self, *args, **options):
+        clientes = reconstruir_resumen_clientes(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Acumulado histórico de {clientes} clientes reconstruido'))
+
+        with transaction.atomic():
+            ResumenVentaDiario.objects.all().delete()
+            creados = 0
+            # Un bloque de días a la vez para no cargar todos los grupos en memoria
+            for filas in filas_resumen_diario(Venta.objects.all(), options['dias_por_bloque'], options['lote']):
+                ResumenVentaDiario.objects.bulk_create([
+                    ResumenVentaDiario(fecha=fecha, dimension=dimension, clave=clave,
+                                       num_ventas=num, unidades=unidades, ingresos=ingresos)
+                    for fecha, dimension, clave, num, unidades, ingresos in filas
+                ], batch_size=options['lote'])
+                creados += len(filas)
+            if not creados:
+                self.stdout.write(self.style.WARNING('No hay ventas registradas; resúmenes vacíos.'))
+                return
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {creados} filas de resumen reconstruidas'))
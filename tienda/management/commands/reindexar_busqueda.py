@@ -0,0 +1,25 @@
+# tienda/management/commands/reindexar_busqueda.py
+# Reconstruye desde cero el índice de búsqueda de productos
+# Ejecutar con: python manage.py reindexar_busqueda
+# (necesario después de cargas masivas que no disparan señales, o al instalar la búsqueda)
+import time
+
+from django.core.management.base import BaseCommand
+
+from tienda.busqueda import reindexar_todo
+from tienda.models import TerminoProducto
+
+
+class Command(BaseCommand):
+    help = 'Borra y vuelve a generar el índice invertido de búsqueda de productos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Productos que se indexan por transacción')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        productos = reindexar_todo(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {productos} productos indexados ({TerminoProducto.objects.count()} términos) '
+            f'en {time.perf_counter() - inicio:.1f} s'
+        ))
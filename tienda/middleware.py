@@ -0,0 +1,174 @@
+# tienda/middleware.py
+# Instrumentación por petición: consultas SQL, tiempos y detección de consultas repetidas (N+1)
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('tienda.instrumentacion')
+
+# Nombre con el que se agrupan las peticiones que no resolvieron ninguna ruta (404, estáticos)
+SIN_RUTA = '(sin ruta)'
+
+
+# ============ MEDICIÓN DE UNA PETICIÓN ============
+class MedicionSQL:
+    """Envoltura para connection.execute_wrapper que cuenta, cronometra y agrupa las consultas"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.sentencias = Counter()  # SQL con marcadores (%s) -> veces que se ejecutó
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+            # Se agrupa por el SQL sin valores: el mismo SELECT con distinto id es la huella de un N+1.
+            # Solo lecturas: varias escrituras con el mismo SQL (p. ej. los resúmenes de una venta)
+            # no son un N+1 y solo generarían avisos falsos
+            if sql.lstrip()[:6].upper() == 'SELECT':
+                self.sentencias[sql] += 1
+
+    def repetidas(self, minimo):
+        """SELECT ejecutados `minimo` veces o más en la misma petición"""
+        return {sql: veces for sql, veces in self.sentencias.most_common() if veces >= minimo}
+
+
+# ============ AGREGADO EN MEMORIA POR RUTA ============
+class AgregadoRutas:
+    """
+    Estadísticas acumuladas por nombre de ruta dentro del proceso.
+    Cada proceso del servidor lleva su propio agregado (se pierde al reiniciar).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rutas = {}
+
+    def registrar(self, ruta, total_ms, sql_ms, consultas, repetidas):
+        muestras = getattr(settings, 'TIENDA_INSTRUMENTACION_MUESTRAS', 500)
+        with self._lock:
+            datos = self._rutas.get(ruta)
+            if datos is None:
+                datos = self._rutas[ruta] = {
+                    'peticiones': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'sql_ms': 0.0,
+                    'consultas': 0, 'max_consultas': 0, 'con_repetidas': 0, 'ultima_repetida': '',
+                    'latencias': deque(maxlen=muestras),  # Ventana móvil para los percentiles
+                }
+            datos['peticiones'] += 1
+            datos['total_ms'] += total_ms
+            datos['max_ms'] = max(datos['max_ms'], total_ms)
+            datos['sql_ms'] += sql_ms
+            datos['consultas'] += consultas
+            datos['max_consultas'] = max(datos['max_consultas'], consultas)
+            datos['latencias'].append(total_ms)
+            if repetidas:
+                datos['con_repetidas'] += 1
+                datos['ultima_repetida'] = next(iter(repetidas))
+
+    def resumen(self):
+        """Lista de diccionarios por ruta, de la más lenta (p95) a la más rápida"""
+        with self._lock:
+            copia = {ruta: dict(datos, latencias=sorted(datos['latencias'])) for ruta, datos in self._rutas.items()}
+
+        filas = []
+        for ruta, datos in copia.items():
+            n = datos['peticiones']
+            latencias = datos['latencias']
+            filas.append({
+                'ruta': ruta,
+                'peticiones': n,
+                'promedio_ms': round(datos['total_ms'] / n, 2),
+                'p50_ms': round(latencias[int((len(latencias) - 1) * 0.50)], 2),
+                'p95_ms': round(latencias[int((len(latencias) - 1) * 0.95)], 2),
+                'max_ms': round(datos['max_ms'], 2),
+                'sql_promedio_ms': round(datos['sql_ms'] / n, 2),
+                'consultas_promedio': round(datos['consultas'] / n, 1),
+                'max_consultas': datos['max_consultas'],
+                'con_repetidas': datos['con_repetidas'],
+                'ultima_repetida': datos['ultima_repetida'],
+            })
+        return sorted(filas, key=lambda fila: fila['p95_ms'], reverse=True)
+
+    def reiniciar(self):
+        with self._lock:
+            self._rutas.clear()
+
+
+agregado = AgregadoRutas()
+
+
+# ============ MIDDLEWARE ============
+class InstrumentacionMiddleware:
+    """
+    Mide cada petición y agrega el encabezado Server-Timing (visible en las
+    herramientas de desarrollo del navegador):
+
+        sql    tiempo total en la BD (desc = número de consultas)
+        vista  tiempo de la vista, incluye consultas y render de la plantilla
+        render tiempo de la vista fuera de la BD (Python y plantillas)
+        total  latencia completa, incluye el resto de los middlewares
+
+    Si una misma sentencia se repite TIENDA_INSTRUMENTACION_REPETIDAS veces o más
+    se registra una advertencia en el logger 'tienda.instrumentacion'.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.activo = getattr(settings, 'TIENDA_INSTRUMENTACION', True)
+
+    def __call__(self, request):
+        if not self.activo:
+            return self.get_response(request)
+
+        medicion = MedicionSQL()
+        request._instrumentacion = {'medicion': medicion, 'vista_inicio': None, 'sql_antes_vista': 0.0}
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for alias in connections:
+                pila.enter_context(connections[alias].execute_wrapper(medicion))
+            response = self.get_response(request)
+        fin = time.perf_counter()
+        total = fin - inicio
+
+        marcas = request._instrumentacion
+        if marcas['vista_inicio'] is not None:
+            # Desde process_view hasta que la respuesta vuelve a este middleware
+            vista = fin - marcas['vista_inicio']
+            render = max(vista - (medicion.segundos - marcas['sql_antes_vista']), 0.0)
+        else:
+            vista = render = 0.0  # La petición no llegó a la vista (404, respuesta de otro middleware)
+
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={medicion.segundos * 1000:.2f};desc="{medicion.consultas} consultas"',
+            f'vista;dur={vista * 1000:.2f}',
+            f'render;dur={render * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+        minimo = getattr(settings, 'TIENDA_INSTRUMENTACION_REPETIDAS', 3)
+        repetidas = medicion.repetidas(minimo)
+        ruta = request.resolver_match.view_name if request.resolver_match else SIN_RUTA
+        if repetidas:
+            sql, veces = next(iter(repetidas.items()))
+            logger.warning('%s: %d sentencia(s) repetidas; la más frecuente %d veces: %s',
+                           ruta, len(repetidas), veces, sql[:300])
+
+        agregado.registrar(ruta, total * 1000, medicion.segundos * 1000, medicion.consultas, repetidas)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Marca el momento en que empieza la vista y el tiempo SQL acumulado hasta entonces"""
+        marcas = getattr(request, '_instrumentacion', None)
+        if marcas is not None:
+            marcas['vista_inicio'] = time.perf_counter()
+            marcas['sql_antes_vista'] = marcas['medicion'].segundos
+        return None
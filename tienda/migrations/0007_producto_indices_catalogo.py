@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0006_alter_perfilusuario_rol"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="producto",
+            index=models.Index(fields=["nombre", "id"], name="producto_nombre_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="producto",
+            index=models.Index(fields=["precio", "id"], name="producto_precio_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="producto",
+            index=models.Index(fields=["stock", "id"], name="producto_stock_id_idx"),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:38
+
+from django.db import migrations, models
+
+from tienda.resumenes import filas_resumen_diario
+
+
+def resumir_ventas(apps, schema_editor):
+    """
+    Llena los resúmenes con las ventas existentes. El día se calcula en Python con
+    dia_local (como el mantenimiento incremental), no con TruncDate en la BD.
+    """
+    ResumenVentaDiario = apps.get_model("tienda", "ResumenVentaDiario")
+    Venta = apps.get_model("tienda", "Venta")
+    for filas in filas_resumen_diario(Venta.objects.all()):
+        ResumenVentaDiario.objects.bulk_create(
+            [
+                ResumenVentaDiario(
+                    fecha=fecha, dimension=dimension, clave=clave,
+                    num_ventas=num, unidades=unidades, ingresos=ingresos,
+                )
+                for fecha, dimension, clave, num, unidades, ingresos in filas
+            ],
+            batch_size=5000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0007_producto_indices_catalogo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenVentaDiario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField()),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("total", "Total del día"),
+                            ("producto", "Producto"),
+                            ("cliente", "Cliente"),
+                            ("vendedor", "Vendedor"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("clave", models.BigIntegerField(default=0)),
+                ("num_ventas", models.IntegerField(default=0)),
+                ("unidades", models.IntegerField(default=0)),
+                (
+                    "ingresos",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen diario de ventas",
+                "verbose_name_plural": "Resúmenes diarios de ventas",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("dimension", "fecha", "clave"),
+                        name="resumen_dimension_fecha_clave_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(resumir_ventas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0009_ticket"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="venta",
+            index=models.Index(
+                fields=["fecha_venta", "producto"], name="venta_fecha_producto_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="venta",
+            index=models.Index(fields=["cliente", "-id"], name="venta_cliente_id_idx"),
+        ),
+    ]
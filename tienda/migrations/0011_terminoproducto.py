@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-18 10:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0010_venta_indices"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TerminoProducto",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("termino", models.CharField(max_length=40)),
+                ("peso", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "producto",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terminos",
+                        to="tienda.producto",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Término de búsqueda",
+                "verbose_name_plural": "Términos de búsqueda",
+                "indexes": [
+                    models.Index(
+                        fields=["termino", "producto"], name="termino_producto_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("producto", "termino"), name="termino_producto_uniq"
+                    )
+                ],
+            },
+        ),
+    ]
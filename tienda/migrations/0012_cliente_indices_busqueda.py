@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0011_terminoproducto"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cliente",
+            index=models.Index(
+                fields=["apellido", "nombre", "id"], name="cliente_apellido_nombre_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cliente",
+            index=models.Index(fields=["nombre"], name="cliente_nombre_idx"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0012_cliente_indices_busqueda"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="proveedor",
+            index=models.Index(fields=["nombre", "id"], name="proveedor_nombre_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="proveedor",
+            index=models.Index(fields=["empresa"], name="proveedor_empresa_idx"),
+        ),
+    ]
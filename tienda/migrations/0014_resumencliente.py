@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def acumular_clientes(apps, schema_editor):
+    """Llena el acumulado histórico de los clientes que ya tienen ventas (un solo GROUP BY)"""
+    ResumenCliente = apps.get_model("tienda", "ResumenCliente")
+    Venta = apps.get_model("tienda", "Venta")
+    grupos = (
+        Venta.objects.order_by()
+        .values("cliente_id")
+        .annotate(n=Count("id"), u=Sum("cantidad"), g=Sum("total"))
+    )
+    filas = [
+        ResumenCliente(cliente_id=grupo["cliente_id"], num_ventas=grupo["n"],
+                       unidades=grupo["u"] or 0, gastado=grupo["g"] or 0)
+        for grupo in grupos.iterator()
+    ]
+    ResumenCliente.objects.bulk_create(filas, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0013_proveedor_indices_busqueda"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenCliente",
+            fields=[
+                (
+                    "cliente",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="resumen",
+                        serialize=False,
+                        to="tienda.cliente",
+                    ),
+                ),
+                ("num_ventas", models.IntegerField(default=0)),
+                ("unidades", models.IntegerField(default=0)),
+                (
+                    "gastado",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen de cliente",
+                "verbose_name_plural": "Resúmenes de clientes",
+            },
+        ),
+        migrations.RunPython(acumular_clientes, migrations.RunPython.noop),
+    ]
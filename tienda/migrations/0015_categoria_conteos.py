@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:08
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def contar_productos(apps, schema_editor):
+    """Llena los conteos de las categorías existentes (un GROUP BY y un UPDATE por categoría)"""
+    Categoria = apps.get_model("tienda", "Categoria")
+    Producto = apps.get_model("tienda", "Producto")
+    filas = (
+        Producto.objects.order_by()
+        .values("categoria_id")
+        .annotate(total=Count("id"), activos=Count("id", filter=Q(activo=True)))
+    )
+    for fila in filas:
+        Categoria.objects.filter(pk=fila["categoria_id"]).update(
+            total_productos=fila["total"], productos_activos=fila["activos"]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0014_resumencliente"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="categoria",
+            name="productos_activos",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="categoria",
+            name="total_productos",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(contar_productos, migrations.RunPython.noop),
+    ]
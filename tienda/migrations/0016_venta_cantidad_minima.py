@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:28
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tienda", "0015_categoria_conteos"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="venta",
+            name="cantidad",
+            field=models.IntegerField(
+                default=1, validators=[django.core.validators.MinValueValidator(1)]
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # El modelo ya usaba default=timezone.now (antes auto_now_add) sin una migración que lo
+    # registrara. Solo cambia el valor por defecto que pone Django: en MySQL no genera SQL
+
+    dependencies = [
+        ("tienda", "0016_venta_cantidad_minima"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="venta",
+            name="fecha_venta",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
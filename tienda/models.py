@@ -1,5 +1,6 @@
 # tienda/models.py
-from django.db import models
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -62,10 +63,34 @@ class Categoria(models.Model):
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField(blank=True, null=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Conteos desnormalizados (tienda.categorias): se ajustan al guardar/eliminar productos
+    # y se corrigen con: python manage.py reconciliar_categorias
+    total_productos = models.IntegerField(default=0, editable=False)
+    productos_activos = models.IntegerField(default=0, editable=False)
+
+    CAMPOS_CONTEO = ('total_productos', 'productos_activos')
 
     def __str__(self):
         return self.nombre
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Nombre leído de la BD: solo si cambia se reindexan los productos (signals.py)
+        instancia = super().from_db(db, field_names, values)
+        if 'nombre' in field_names:
+            instancia._nombre_original = instancia.nombre
+        return instancia
+
+    def save(self, *args, **kwargs):
+        # Al editar la categoría no se reescriben los conteos leídos antes (podrían haber
+        # cambiado mientras tanto); solo se modifican con UPDATE ... = campo + n
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                campo.name for campo in self._meta.concrete_fields
+                if not campo.primary_key and campo.name not in self.CAMPOS_CONTEO
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Categoría"
         verbose_name_plural = "Categorías"
@@ -84,10 +109,23 @@ class Proveedor(models.Model):
     def __str__(self):
         return self.nombre
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Igual que en Categoria: el nombre forma parte del índice de búsqueda de sus productos
+        instancia = super().from_db(db, field_names, values)
+        if 'nombre' in field_names:
+            instancia._nombre_original = instancia.nombre
+        return instancia
+
     class Meta:
         verbose_name = "Proveedor"
         verbose_name_plural = "Proveedores"
         ordering = ['empresa']
+        indexes = [
+            # Búsqueda por prefijo del selector de proveedores (LIKE 'ac%'), en orden alfabético
+            models.Index(fields=['nombre', 'id'], name='proveedor_nombre_id_idx'),
+            models.Index(fields=['empresa'], name='proveedor_empresa_idx'),
+        ]
 
 
 # ============ MODELO PRODUCTO ============
@@ -115,6 +153,33 @@ class Producto(models.Model):
     def __str__(self):
         return f"{self.nombre} - ${self.precio}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Categoría y estado leídos de la BD, para mover el producto en los conteos por categoría
+        from .categorias import estado_conteo  # Import local: categorias importa este módulo
+        instancia = super().from_db(db, field_names, values)
+        instancia._conteo_original = estado_conteo(instancia)
+        return instancia
+
+    def save(self, *args, **kwargs):
+        # El producto y los conteos de su categoría se guardan en la misma transacción
+        from .categorias import ajustar_conteos, estado_conteo, estado_guardado
+        with transaction.atomic():
+            anterior = None
+            if not self._state.adding:
+                anterior = getattr(self, '_conteo_original', None) or estado_guardado(self.pk)
+            super().save(*args, **kwargs)
+            self._conteo_original = estado_conteo(self)
+            ajustar_conteos(anterior, self._conteo_original)
+
+    class Meta:
+        # Índices compuestos (campo, id) para la paginación por cursor del catálogo
+        indexes = [
+            models.Index(fields=['nombre', 'id'], name='producto_nombre_id_idx'),
+            models.Index(fields=['precio', 'id'], name='producto_precio_id_idx'),
+            models.Index(fields=['stock', 'id'], name='producto_stock_id_idx'),
+        ]
+
 
 class Cliente(models.Model):
     usuario = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -132,14 +197,43 @@ class Cliente(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['apellido', 'nombre']
+        indexes = [
+            # Búsqueda por prefijo del combobox de ventas (LIKE 'pe%'), ya en el orden de la lista
+            models.Index(fields=['apellido', 'nombre', 'id'], name='cliente_apellido_nombre_idx'),
+            models.Index(fields=['nombre'], name='cliente_nombre_idx'),
+        ]
+
+
+# ============ MODELO TICKET (ENCABEZADO DE VENTA) ============
+class Ticket(models.Model):
+    """Encabezado de una compra con varias líneas (cada línea es una Venta)"""
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='tickets')
+    vendedor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='tickets_realizados')
+    fecha = models.DateTimeField(default=timezone.now)
+    total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Ticket #{self.id} - {self.cliente} - ${self.total}"
+
+    class Meta:
+        verbose_name = "Ticket"
+        verbose_name_plural = "Tickets"
+        ordering = ['-fecha']
 
 
 # ============ MODELO VENTA ============
 class Venta(models.Model):
+    ticket = models.ForeignKey(                   # Ticket al que pertenece la línea (opcional)
+        Ticket,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='lineas'                     # ticket.lineas.all()
+    )
     cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='ventas')
     vendedor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='ventas_realizadas')
     producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='ventas')
-    cantidad = models.IntegerField(default=1)
+    cantidad = models.IntegerField(default=1, validators=[MinValueValidator(1)])  # Al menos una unidad
     precio_unitario = models.DecimalField(max_digits=10, decimal_places=2)
     total = models.DecimalField(max_digits=10, decimal_places=2)
     fecha_venta = models.DateTimeField(default=timezone.now)  # ✅
@@ -148,16 +242,122 @@ class Venta(models.Model):
     def __str__(self):
         return f"Venta #{self.id} - {self.producto.nombre} - ${self.total}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Guardamos los valores leídos de la BD para poder restar la versión anterior de los resúmenes
+        from .resumenes import huella_venta  # Import local: resumenes importa este módulo
+        instancia = super().from_db(db, field_names, values)
+        instancia._huella_original = huella_venta(instancia)
+        return instancia
+
     def save(self, *args, **kwargs):
         # Si no hay precio_unitario, tomarlo del producto
-        if not self.precio_unitario and self.producto:
-            self.precio_unitario = self.producto.precio_venta  # Usa tu campo correcto
+        if not self.precio_unitario and self.producto_id:
+            self.precio_unitario = self.producto.precio
 
         # Calcula total
         self.total = (self.cantidad or 0) * (self.precio_unitario or 0)
-        super().save(*args, **kwargs)
+
+        # La venta y sus resúmenes diarios se guardan en la misma transacción
+        from .resumenes import aplicar_ventas, huella_guardada, huella_venta
+        with transaction.atomic():
+            anterior = None
+            if not self._state.adding:
+                anterior = getattr(self, '_huella_original', None) or huella_guardada(self.pk)
+            super().save(*args, **kwargs)
+            if anterior:
+                aplicar_ventas([anterior], signo=-1)
+            self._huella_original = huella_venta(self)
+            aplicar_ventas([self._huella_original])
 
     class Meta:
         verbose_name = "Venta"
         verbose_name_plural = "Ventas"
         ordering = ['-fecha_venta']
+        # Índices de los filtros más usados (auditados con: python manage.py auditar_consultas)
+        indexes = [
+            # Rangos de fechas de reportes/dashboard y agrupación por producto dentro del rango
+            models.Index(fields=['fecha_venta', 'producto'], name='venta_fecha_producto_idx'),
+            # Historial de compras de un cliente (mis_compras), más recientes primero
+            models.Index(fields=['cliente', '-id'], name='venta_cliente_id_idx'),
+        ]
+
+
+# ============ MODELO RESUMEN DIARIO DE VENTAS ============
+class ResumenVentaDiario(models.Model):
+    """
+    Acumulados de ventas por día local y por dimensión (total, producto, cliente, vendedor).
+    Se actualiza de forma incremental desde Venta.save / eliminación de ventas
+    y se puede reconstruir con: python manage.py reconstruir_resumenes
+    """
+    DIMENSIONES = (
+        ('total', 'Total del día'),
+        ('producto', 'Producto'),
+        ('cliente', 'Cliente'),
+        ('vendedor', 'Vendedor'),
+    )
+
+    fecha = models.DateField()                                  # Día en la zona horaria local
+    dimension = models.CharField(max_length=10, choices=DIMENSIONES)
+    clave = models.BigIntegerField(default=0)                   # id del producto/cliente/vendedor (0 = total o sin vendedor)
+    num_ventas = models.IntegerField(default=0)
+    unidades = models.IntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.fecha} - {self.dimension} #{self.clave} - ${self.ingresos}"
+
+    class Meta:
+        verbose_name = "Resumen diario de ventas"
+        verbose_name_plural = "Resúmenes diarios de ventas"
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'fecha', 'clave'], name='resumen_dimension_fecha_clave_uniq'),
+        ]
+
+
+# ============ MODELO RESUMEN HISTÓRICO POR CLIENTE ============
+class ResumenCliente(models.Model):
+    """
+    Acumulado de todas las compras de un cliente (ventas, unidades y monto gastado).
+    Se actualiza de forma incremental junto con los resúmenes diarios (tienda.resumenes)
+    y se reconstruye con: python manage.py reconstruir_resumenes
+    """
+    cliente = models.OneToOneField(Cliente, on_delete=models.CASCADE, primary_key=True, related_name='resumen')
+    num_ventas = models.IntegerField(default=0)
+    unidades = models.IntegerField(default=0)
+    gastado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.cliente_id} - {self.num_ventas} compras - ${self.gastado}"
+
+    class Meta:
+        verbose_name = "Resumen de cliente"
+        verbose_name_plural = "Resúmenes de clientes"
+
+
+# ============ MODELO ÍNDICE DE BÚSQUEDA DE PRODUCTOS ============
+class TerminoProducto(models.Model):
+    """
+    Índice invertido para la búsqueda de productos: una fila por (término, producto).
+    Los términos son palabras normalizadas (minúsculas, sin acentos) del nombre,
+    descripción, categoría y proveedores; el peso indica en qué campos aparece.
+    Se mantiene con señales (tienda/signals.py) y se reconstruye con:
+    python manage.py reindexar_busqueda
+    """
+    termino = models.CharField(max_length=40)
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='terminos')
+    peso = models.PositiveSmallIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.termino} -> #{self.producto_id} ({self.peso})"
+
+    class Meta:
+        verbose_name = "Término de búsqueda"
+        verbose_name_plural = "Términos de búsqueda"
+        # (termino, producto): la búsqueda por prefijo recorre solo un rango del índice
+        indexes = [
+            models.Index(fields=['termino', 'producto'], name='termino_producto_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'termino'], name='termino_producto_uniq'),
+        ]
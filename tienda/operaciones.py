@@ -0,0 +1,120 @@
+# tienda/operaciones.py
+# Ajustes masivos de precio y stock con un solo UPDATE en la base de datos
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import DecimalField, F, IntegerField, Value
+from django.db.models.functions import Greatest, Least, Round
+from django.utils import timezone
+
+from .models import Producto
+
+# Campo -> operaciones permitidas (clave: etiqueta)
+OPERACIONES = {
+    'precio': {
+        'porcentaje': 'Aumentar/disminuir un porcentaje',
+        'sumar': 'Sumar/restar una cantidad',
+        'fijar': 'Fijar un precio',
+    },
+    'stock': {
+        'sumar': 'Sumar/restar unidades',
+        'minimo': 'Reabastecer hasta un mínimo',
+        'fijar': 'Fijar el stock',
+    },
+}
+
+PRECIO_MAXIMO = Decimal('99999999.99')  # max_digits=10, decimal_places=2
+LIMITE_VISTA_PREVIA = 20
+
+
+# ============ FILTRO DE PRODUCTOS ============
+def filtrar_productos(productos=None, categoria=None, proveedor=None, precio_min=None, precio_max=None,
+                      solo_activos=False):
+    """
+    Productos a los que se aplica el ajuste. El proveedor se filtra con una subconsulta
+    sobre la tabla intermedia (no con JOIN) para que el UPDATE siga siendo una sola
+    sentencia también en MySQL, que no permite un UPDATE con JOIN a la misma tabla.
+    """
+    if productos is None:
+        productos = Producto.objects.all()
+    if categoria:
+        productos = productos.filter(categoria=categoria)
+    if proveedor:
+        Relacion = Producto.proveedores.through
+        productos = productos.filter(
+            id__in=Relacion.objects.filter(proveedor=proveedor).values('producto_id')
+        )
+    if precio_min is not None:
+        productos = productos.filter(precio__gte=precio_min)
+    if precio_max is not None:
+        productos = productos.filter(precio__lte=precio_max)
+    if solo_activos:
+        productos = productos.filter(activo=True)
+    return productos
+
+
+# ============ EXPRESIÓN DEL AJUSTE ============
+def expresion_ajuste(campo, operacion, valor):
+    """Expresión F() con el nuevo valor del campo (la calcula la BD, fila por fila)"""
+    if operacion not in OPERACIONES.get(campo, {}):
+        raise ValidationError(f'Operación no válida para {campo}: {operacion}')
+
+    cantidad = Decimal(valor)
+    if campo == 'precio':
+        decimal = DecimalField(max_digits=10, decimal_places=2)
+        if operacion == 'porcentaje':
+            factor = Value(1 + cantidad / 100, output_field=DecimalField(max_digits=12, decimal_places=6))
+            nuevo = Round(F('precio') * factor, 2, output_field=decimal)
+        elif operacion == 'sumar':
+            nuevo = F('precio') + Value(cantidad, output_field=decimal)
+        else:
+            nuevo = Value(cantidad, output_field=decimal)
+        # Nunca negativo ni mayor a lo que cabe en la columna
+        return Least(Greatest(nuevo, Value(Decimal('0.00'), output_field=decimal)),
+                     Value(PRECIO_MAXIMO, output_field=decimal), output_field=decimal)
+
+    if cantidad != int(cantidad):
+        raise ValidationError('El stock se ajusta en unidades enteras')
+    valor = Value(int(cantidad), output_field=IntegerField())
+    if operacion == 'sumar':
+        nuevo = F('stock') + valor
+    elif operacion == 'minimo':
+        nuevo = Greatest(F('stock'), valor)
+    else:
+        nuevo = valor
+    return Greatest(nuevo, Value(0), output_field=IntegerField())
+
+
+# ============ APLICAR / SIMULAR ============
+def ajustar_productos(productos, campo, operacion, valor, simular=False, limite_vista=LIMITE_VISTA_PREVIA):
+    """
+    Aplica el ajuste a todos los productos del queryset con un solo UPDATE
+    (los productos nunca se cargan en Python).
+
+    Con simular=True no se modifica nada: la vista previa calcula el nuevo valor
+    con la misma expresión, en la BD, para los primeros `limite_vista` productos.
+
+    Regresa {'afectados': n, 'vista_previa': [{id, nombre, actual, nuevo}, ...]}
+    """
+    nuevo = expresion_ajuste(campo, operacion, valor)
+
+    if simular:
+        vista = (
+            productos.order_by('id')
+            .annotate(nuevo_valor=nuevo)
+            .values('id', 'nombre', campo, 'nuevo_valor')[:limite_vista]
+        )
+        redondear = (lambda x: Decimal(x).quantize(Decimal('0.01'))) if campo == 'precio' else int
+        return {
+            'afectados': productos.count(),
+            'vista_previa': [
+                {'id': fila['id'], 'nombre': fila['nombre'], 'actual': fila[campo], 'nuevo': redondear(fila['nuevo_valor'])}
+                for fila in vista
+            ],
+        }
+
+    with transaction.atomic():
+        # update() no aplica auto_now: la fecha de actualización se asigna aquí
+        afectados = productos.update(**{campo: nuevo, 'fecha_actualizacion': timezone.now()})
+    return {'afectados': afectados, 'vista_previa': []}
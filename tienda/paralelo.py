@@ -0,0 +1,109 @@
+# tienda/paralelo.py
+# Agregados de periodos largos divididos en meses y calculados en varios procesos
+# (TIENDA_REPORTE_PROCESOS). Cada proceso abre su propia conexión a la BD.
+import multiprocessing
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+
+from .resumenes import dia_local, inicio_del_dia
+
+CENTAVO = Decimal('0.01')
+
+_pool = None
+_candado = threading.Lock()
+
+
+def dividir_por_mes(inicio, fin):
+    """Divide [inicio, fin) en fragmentos que no cruzan el inicio de un mes (hora local)"""
+    fragmentos = []
+    desde = inicio
+    while desde < fin:
+        dia = dia_local(desde)
+        siguiente_mes = date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+        hasta = min(inicio_del_dia(siguiente_mes), fin)
+        fragmentos.append((desde, hasta))
+        desde = hasta
+    return fragmentos
+
+
+# ============ PROCESOS ============
+def _procesos():
+    return max(int(getattr(settings, 'TIENDA_REPORTE_PROCESOS', 1)), 1)
+
+
+def _obtener_pool():
+    """
+    Pool de procesos compartido (se crea en la primera petición y se reutiliza).
+    Se usa 'spawn' y no 'fork': el servidor tiene hilos y conexiones abiertas que un
+    fork copiaría a medias.
+    """
+    global _pool
+    with _candado:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_procesos(),
+                mp_context=multiprocessing.get_context('spawn'),
+                # Cada proceso nuevo configura Django antes de recibir fragmentos (no se usa una
+                # función de este módulo: importarlo carga los modelos antes de django.setup)
+                initializer=django.setup,
+            )
+        return _pool
+
+
+def _agregar_fragmento(dimension, desde, hasta):
+    """
+    Agregados de un fragmento por clave: {clave: (num_ventas, unidades, ingresos)}.
+    Se regresan todas las claves (no solo un top) para que la suma de fragmentos sea exacta.
+    """
+    from .reportes import _agrupar_ventas  # Import diferido: reportes importa este módulo
+
+    # Los ingresos se redondean a centavos: SQLite suma los decimales como flotantes y el
+    # error cambiaría según cómo se dividió el periodo (en MySQL no tiene efecto)
+    return {
+        fila['clave']: (fila['num_ventas'], fila['unidades'] or 0, Decimal(fila['ingresos'] or 0).quantize(CENTAVO))
+        for fila in _agrupar_ventas(dimension, desde, hasta)
+    }
+
+
+def _agregar_en_proceso(dimension, desde, hasta):
+    """Tarea que corre en el pool: el proceso vive mucho, se descartan conexiones caídas o vencidas"""
+    close_old_connections()
+    return _agregar_fragmento(dimension, desde, hasta)
+
+
+# ============ COMBINACIÓN ============
+def agregar_dimension(dimension, inicio, fin):
+    """
+    Filas {clave, num_ventas, unidades, ingresos} de TODAS las claves de la dimensión en
+    [inicio, fin). Con más de un mes y TIENDA_REPORTE_PROCESOS > 1 cada mes se calcula en un
+    proceso del pool y los parciales se suman; si no, se calcula aquí con una consulta.
+    """
+    fragmentos = dividir_por_mes(inicio, fin)
+    if _procesos() > 1 and len(fragmentos) > 1:
+        pool = _obtener_pool()
+        parciales = pool.map(_agregar_en_proceso, *zip(*[(dimension, desde, hasta) for desde, hasta in fragmentos]))
+    else:
+        parciales = [_agregar_fragmento(dimension, inicio, fin)]
+    return combinar(parciales)
+
+
+def combinar(parciales):
+    """Suma los agregados por clave de varios fragmentos (sumas y conteos: el resultado es exacto)"""
+    totales = defaultdict(lambda: [0, 0, Decimal('0')])
+    for parcial in parciales:
+        for clave, (num_ventas, unidades, ingresos) in parcial.items():
+            total = totales[clave]
+            total[0] += num_ventas
+            total[1] += unidades
+            total[2] += ingresos
+    return [
+        {'clave': clave, 'num_ventas': num_ventas, 'unidades': unidades, 'ingresos': ingresos}
+        for clave, (num_ventas, unidades, ingresos) in totales.items()
+    ]
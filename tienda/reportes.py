@@ -0,0 +1,286 @@
+# tienda/reportes.py
+# Datos de los reportes de ventas (detalle paginado, listas "top" y series para gráficas)
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.core.cache import cache
+from django.utils import timezone
+
+from .catalogo import codificar_cursor, decodificar_cursor
+from .models import Categoria, Cliente, Producto, Venta
+from .paralelo import agregar_dimension
+from .resumenes import DIMENSIONES, top_dimension
+
+TAMANO_PAGINA_VENTAS = 50
+
+# Columnas que muestra la tabla del reporte (solo estas se leen de la BD)
+COLUMNAS_VENTAS = (
+    'id', 'ticket_id', 'cantidad', 'fecha_venta', 'precio_unitario', 'total',
+    'cliente__nombre', 'cliente__apellido', 'producto__nombre', 'vendedor__username',
+)
+
+
+def pagina_ventas(inicio, fin, cursor=None, tamano=TAMANO_PAGINA_VENTAS):
+    """
+    Una página del detalle de ventas del rango [inicio, fin), de la más reciente a la más
+    antigua, con cursor (fecha_venta, id) como en el catálogo: cualquier página cuesta lo
+    mismo aunque el rango tenga cientos de miles de ventas. Las filas son diccionarios con
+    solo COLUMNAS_VENTAS (values()), sin crear instancias de Venta, Cliente ni Producto.
+
+    Regresa {'ventas': [...], 'siguiente': cursor de la siguiente página o None}
+    """
+    ventas = Venta.objects.filter(fecha_venta__gte=inicio, fecha_venta__lt=fin)
+
+    posicion = decodificar_cursor(cursor)
+    if posicion:
+        valor, ultimo_id = posicion
+        try:
+            fecha = datetime.fromisoformat(valor)
+        except ValueError:
+            fecha = None
+        if fecha is not None:
+            ventas = ventas.filter(Q(fecha_venta__lt=fecha) | Q(fecha_venta=fecha, id__lt=ultimo_id))
+
+    pagina = list(ventas.order_by('-fecha_venta', '-id').values(*COLUMNAS_VENTAS)[:tamano + 1])
+    siguiente = None
+    if len(pagina) > tamano:
+        pagina = pagina[:tamano]
+        siguiente = codificar_cursor(pagina[-1]['fecha_venta'].isoformat(), pagina[-1]['id'])
+    return {'ventas': pagina, 'siguiente': siguiente}
+
+
+def top_productos(inicio, fin, limite=5):
+    """Productos con más unidades vendidas en el rango"""
+    top = top_dimension('producto', inicio, fin, limite=limite, orden='unidades')
+    productos = Producto.objects.only('nombre').in_bulk([p['clave'] for p in top])
+    return [
+        {
+            'producto__nombre': productos[p['clave']].nombre if p['clave'] in productos else 'Producto eliminado',
+            'cantidad_total': p['unidades'],
+        }
+        for p in top
+    ]
+
+
+# ============ REPORTE POR DIMENSIONES ============
+# Dimensión -> título de la sección en el reporte
+DIMENSIONES_REPORTE = {
+    'cliente': 'Clientes',
+    'producto': 'Productos',
+    'categoria': 'Categorías',
+    'vendedor': 'Vendedores',
+    'hora': 'Hora del día',
+    'dia_semana': 'Día de la semana',
+}
+DIMENSIONES_POR_DEFECTO = ('cliente', 'producto')
+ORDENES_REPORTE = {'ingresos': 'Ingresos', 'unidades': 'Unidades', 'num_ventas': 'Número de ventas'}
+
+# Dimensiones que no están en los resúmenes diarios: expresión de agrupación sobre Venta
+# (siempre una llave foránea o una parte de la fecha, nunca un texto como el nombre)
+AGRUPACIONES = {
+    'categoria': F('producto__categoria_id'),
+    'hora': ExtractHour('fecha_venta'),               # En la zona horaria local (TIME_ZONE)
+    'dia_semana': ExtractIsoWeekDay('fecha_venta'),   # 1 = lunes ... 7 = domingo
+}
+# Las dimensiones de tiempo se muestran completas y en orden (no como "top")
+DIMENSIONES_TIEMPO = ('hora', 'dia_semana')
+DIAS_SEMANA = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+
+
+def _agrupar_ventas(dimension, inicio, fin):
+    """Un GROUP BY sobre las ventas del rango por la expresión de la dimensión"""
+    return (
+        Venta.objects
+        .filter(fecha_venta__gte=inicio, fecha_venta__lt=fin)
+        .order_by()
+        .values(clave=AGRUPACIONES[dimension])
+        .annotate(num_ventas=Count('id'), unidades=Sum('cantidad'), ingresos=Sum('total'))
+    )
+
+
+def _nombres(dimension, claves):
+    """Nombre a mostrar de cada clave; los registros se leen con un solo in_bulk"""
+    if dimension == 'hora':
+        return {clave: f'{clave:02d}:00 - {clave:02d}:59' for clave in claves}
+    if dimension == 'dia_semana':
+        return {clave: DIAS_SEMANA[clave - 1] for clave in claves}
+    if dimension == 'cliente':
+        clientes = Cliente.objects.only('nombre', 'apellido').in_bulk(claves)
+        return {pk: f'{c.nombre} {c.apellido}' for pk, c in clientes.items()}
+    modelo, campo = {
+        'producto': (Producto, 'nombre'),
+        'categoria': (Categoria, 'nombre'),
+        'vendedor': (User, 'username'),
+    }[dimension]
+    return {pk: getattr(obj, campo) for pk, obj in modelo.objects.only(campo).in_bulk(claves).items()}
+
+
+def reporte_dimension(dimension, inicio, fin, limite=5, orden='ingresos'):
+    """
+    Filas {clave, nombre, num_ventas, unidades, ingresos} de una dimensión en [inicio, fin).
+    Se agrupa por la llave (id o parte de la fecha): cliente, producto y vendedor salen de los
+    resúmenes diarios cuando el rango son días completos; las demás, de las ventas (ver paralelo.py).
+    Las dimensiones de tiempo regresan todos sus valores ordenados; las demás, el top `limite`.
+    """
+    if orden not in ORDENES_REPORTE:
+        orden = 'ingresos'
+    if dimension in DIMENSIONES:
+        filas = top_dimension(dimension, inicio, fin, limite=limite, orden=orden)
+    else:
+        # Sin resumen diario: se agrupan las ventas (por mes en varios procesos si el rango es largo)
+        filas = agregar_dimension(dimension, inicio, fin)
+        if dimension in DIMENSIONES_TIEMPO:
+            filas.sort(key=lambda fila: fila['clave'])
+        else:
+            filas = sorted(filas, key=lambda fila: (-fila[orden], fila['clave']))[:limite]
+
+    nombres = _nombres(dimension, [fila['clave'] for fila in filas if fila['clave'] is not None])
+    return [
+        {**fila, 'nombre': nombres.get(fila['clave'], 'Sin vendedor' if dimension == 'vendedor' else 'Eliminado')}
+        for fila in filas
+    ]
+
+
+def reporte_dimensiones(inicio, fin, dimensiones=DIMENSIONES_POR_DEFECTO, limite=5, orden='ingresos'):
+    """Una sección por dimensión pedida (las desconocidas se ignoran): [{dimension, titulo, filas}]"""
+    return [
+        {
+            'dimension': dimension,
+            'titulo': DIMENSIONES_REPORTE[dimension],
+            'filas': reporte_dimension(dimension, inicio, fin, limite=limite, orden=orden),
+        }
+        for dimension in DIMENSIONES_REPORTE if dimension in dimensiones
+    ]
+
+
+def periodo_abierto(fin):
+    """Un periodo que llega hasta ahora sigue cambiando con cada venta (no se guarda en caché)"""
+    return fin > timezone.now()
+
+
+def serie_top_productos(inicio, fin):
+    """
+    Serie compacta para la gráfica de productos más vendidos:
+        {"titulo": ..., "etiquetas": [...], "valores": [...]}
+    La dibuja en el navegador static/js/graficas.js (sin pandas ni plotly en el servidor).
+    Se guarda en caché por rango de fechas, salvo si el periodo incluye hoy.
+    """
+    abierto = periodo_abierto(fin)
+    clave = f'tienda:grafica:top_productos:{inicio:%Y%m%d}:{fin:%Y%m%d}'
+    serie = None if abierto else cache.get(clave)
+    if serie is None:
+        filas = top_productos(inicio, fin)
+        serie = {
+            'titulo': 'Ventas por Producto',
+            'etiqueta_valor': 'Cantidad Vendida',
+            'etiquetas': [fila['producto__nombre'] for fila in filas],
+            'valores': [fila['cantidad_total'] for fila in filas],
+        }
+        if not abierto:
+            cache.set(clave, serie, getattr(settings, 'TIENDA_GRAFICAS_CACHE_SEGUNDOS', 300))
+    return serie
+
+
+# ============ SERIES DE TIEMPO ============
+GRANULARIDADES = ('hora', 'dia', 'semana', 'mes')  # Intervalos en la zona horaria local (TIME_ZONE)
+TAMANO_LOTE_SERIE = 5000
+MAXIMO_PUNTOS_SERIE = 1000  # Un año por hora serían 8760 puntos: se pide una granularidad mayor
+
+
+def _truncar(momento, granularidad):
+    """Inicio (local, sin tzinfo) del intervalo que contiene `momento` (como dia_local en los resúmenes)"""
+    momento = timezone.localtime(momento).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    if granularidad == 'hora':
+        return momento
+    momento = momento.replace(hour=0)
+    if granularidad == 'semana':
+        return momento - timedelta(days=momento.weekday())  # Semanas ISO: inician en lunes
+    if granularidad == 'mes':
+        return momento.replace(day=1)
+    return momento
+
+
+def _siguiente(momento, granularidad):
+    if granularidad == 'hora':
+        return momento + timedelta(hours=1)
+    if granularidad == 'semana':
+        return momento + timedelta(weeks=1)
+    if granularidad == 'mes':
+        return momento.replace(year=momento.year + momento.month // 12, month=momento.month % 12 + 1)
+    return momento + timedelta(days=1)
+
+
+def _intervalos(inicio, fin, granularidad):
+    """Todos los intervalos del rango [inicio, fin), también los que no tienen ventas"""
+    intervalos = []
+    actual = _truncar(inicio, granularidad)
+    ultimo = timezone.localtime(fin).replace(tzinfo=None)
+    while actual < ultimo:
+        intervalos.append(actual)
+        if len(intervalos) > MAXIMO_PUNTOS_SERIE:
+            raise ValueError(f'El rango tiene más de {MAXIMO_PUNTOS_SERIE} intervalos; usa una granularidad mayor')
+        actual = _siguiente(actual, granularidad)
+    return intervalos
+
+
+def _serie(intervalos, valores):
+    """Rellena con ceros los intervalos sin ventas: {'etiquetas', 'ingresos', 'unidades', 'num_ventas'}"""
+    ceros = (0, 0, 0)
+    filas = [valores.get(intervalo, ceros) for intervalo in intervalos]
+    return {
+        'etiquetas': [intervalo.isoformat() for intervalo in intervalos],
+        'num_ventas': [fila[0] for fila in filas],
+        'unidades': [fila[1] for fila in filas],
+        'ingresos': [float(fila[2]) for fila in filas],
+    }
+
+
+def serie_ventas(inicio, fin, granularidad='dia', comparar=False):
+    """
+    Ingresos, unidades y número de ventas del rango [inicio, fin) por hora, día, semana o mes.
+
+    Se leen solo (fecha_venta, cantidad, total) en una consulta por lotes y cada venta se
+    asigna a su intervalo con _truncar, como dia_local en los resúmenes: no se usa Trunc* en
+    la BD porque MySQL sin las tablas de zonas horarias cargadas regresa NULL. Los intervalos
+    sin ventas se rellenan con ceros. Con `comparar` la misma consulta abarca también el
+    periodo anterior de igual duración y se regresa en 'anterior', alineado por posición con
+    la serie actual. Se guarda en caché como la gráfica de productos (salvo si incluye hoy).
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f'Granularidad inválida: {granularidad}')
+    intervalos = _intervalos(inicio, fin, granularidad)
+
+    abierto = periodo_abierto(fin)
+    clave = f'tienda:grafica:serie:{granularidad}:{int(comparar)}:{inicio.timestamp():.0f}:{fin.timestamp():.0f}'
+    serie = None if abierto else cache.get(clave)
+    if serie is not None:
+        return serie
+
+    desde = inicio - (fin - inicio) if comparar else inicio
+    filas = (
+        Venta.objects
+        .filter(fecha_venta__gte=desde, fecha_venta__lt=fin)
+        .order_by()
+        .values_list('fecha_venta', 'cantidad', 'total')
+        .iterator(chunk_size=TAMANO_LOTE_SERIE)
+    )
+    # El periodo se decide por venta: una semana o un mes puede quedar partido en la
+    # frontera entre el periodo anterior y el actual
+    valores = {True: defaultdict(lambda: [0, 0, Decimal('0')]), False: defaultdict(lambda: [0, 0, Decimal('0')])}
+    for fecha_venta, cantidad, total in filas:
+        acumulado = valores[fecha_venta >= inicio][_truncar(fecha_venta, granularidad)]
+        acumulado[0] += 1
+        acumulado[1] += cantidad
+        acumulado[2] += total
+
+    serie = {'granularidad': granularidad, **_serie(intervalos, valores[True])}
+    if comparar:
+        serie['anterior'] = _serie(_intervalos(desde, inicio, granularidad), valores[False])
+    if not abierto:
+        cache.set(clave, serie, getattr(settings, 'TIENDA_GRAFICAS_CACHE_SEGUNDOS', 300))
+    return serie
@@ -0,0 +1,339 @@
+# tienda/resumenes.py
+# Resúmenes (rollups) de ventas: diarios y por cliente (histórico); mantenimiento incremental y lectura
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Min, Q, Sum, Value, When
+from django.utils import timezone
+
+from .contadores import invalidar_ventas_dia
+from .models import ResumenCliente, ResumenVentaDiario, Venta
+
+# Campos de Venta que alimentan los resúmenes
+CAMPOS_HUELLA = ('fecha_venta', 'producto_id', 'cliente_id', 'vendedor_id', 'cantidad', 'total')
+
+# Campos acumulados de cada tabla de resumen
+CAMPOS_DIARIOS = ('num_ventas', 'unidades', 'ingresos')
+CAMPOS_CLIENTE = ('num_ventas', 'unidades', 'gastado')
+
+# Dimensión del resumen -> campo de Venta que sirve como clave
+DIMENSIONES = {
+    'producto': 'producto_id',
+    'cliente': 'cliente_id',
+    'vendedor': 'vendedor_id',
+}
+
+
+# ============ MANTENIMIENTO INCREMENTAL ============
+def huella_venta(venta):
+    """Valores de la venta que afectan los resúmenes (None si faltan campos diferidos)"""
+    if any(campo in venta.get_deferred_fields() for campo in CAMPOS_HUELLA):
+        return None
+    return {campo: getattr(venta, campo) for campo in CAMPOS_HUELLA}
+
+
+def huella_guardada(pk):
+    """Lee de la BD la huella de una venta ya guardada"""
+    return Venta.objects.filter(pk=pk).values(*CAMPOS_HUELLA).first()
+
+
+def dia_local(fecha):
+    """Día (zona horaria local) al que pertenece una fecha/hora"""
+    if timezone.is_aware(fecha):
+        fecha = timezone.localtime(fecha)
+    return fecha.date()
+
+
+def acumular_diarios(deltas, huellas, signo=1):
+    """
+    Suma las huellas a deltas {(fecha, dimension, clave): [num, unidades, ingresos]}.
+    El día se calcula con dia_local: lo usan el mantenimiento incremental, la reconstrucción
+    y la migración que llena la tabla, así los tres agrupan las ventas igual.
+    """
+    for huella in huellas:
+        fecha = dia_local(huella['fecha_venta'])
+        claves = [('total', 0)] + [
+            (dimension, huella[campo] or 0) for dimension, campo in DIMENSIONES.items()
+        ]
+        for dimension, clave in claves:
+            delta = deltas[(fecha, dimension, clave)]
+            delta[0] += signo
+            delta[1] += signo * (huella['cantidad'] or 0)
+            delta[2] += signo * (huella['total'] or 0)
+
+
+def aplicar_ventas(huellas, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) un grupo de ventas a los resúmenes diarios y por cliente.
+    Primero se acumulan los cambios en memoria y después cada tabla se actualiza con pocas
+    consultas sin importar cuántas filas toque (ver _aplicar_diarios / _aplicar_clientes).
+    """
+    huellas = [huella for huella in huellas if huella]
+    deltas = defaultdict(lambda: [0, 0, Decimal('0')])
+    por_cliente = defaultdict(lambda: [0, 0, Decimal('0')])
+    acumular_diarios(deltas, huellas, signo)
+    for huella in huellas:
+        cliente = por_cliente[huella['cliente_id']]
+        cliente[0] += signo
+        cliente[1] += signo * (huella['cantidad'] or 0)
+        cliente[2] += signo * (huella['total'] or 0)
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        _aplicar_diarios(deltas)
+        _aplicar_clientes(por_cliente)
+
+        # El total del día en caché del dashboard se recalcula después del commit
+        fechas = {fecha for fecha, _, _ in deltas}
+        transaction.on_commit(lambda: invalidar_ventas_dia(fechas))
+
+
+def _sumar_por_pk(modelo, campos, deltas_por_pk):
+    """
+    Un solo UPDATE para todas las filas existentes:
+        SET campo = campo + CASE pk WHEN 1 THEN d1 WHEN 7 THEN d7 ... END WHERE pk IN (...)
+    La suma la hace la BD sobre el valor actual (como F()), así dos ventas simultáneas
+    no se pisan.
+    """
+    if not deltas_por_pk:
+        return
+    cambios = {}
+    for posicion, campo in enumerate(campos):
+        salida = modelo._meta.get_field(campo).clone()
+        cambios[campo] = F(campo) + Case(
+            *[When(pk=pk, then=Value(delta[posicion], output_field=salida)) for pk, delta in deltas_por_pk.items()],
+            output_field=salida,
+        )
+    modelo.objects.filter(pk__in=list(deltas_por_pk)).update(**cambios)
+
+
+def _crear_filas(modelo, filas, sumar_una):
+    """
+    INSERT masivo de las filas que aún no existían. Si otra transacción creó alguna al
+    mismo tiempo (IntegrityError) se vuelve al camino de una fila a la vez.
+    """
+    if not filas:
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.bulk_create(filas)
+    except IntegrityError:
+        for fila in filas:
+            sumar_una(fila)
+
+
+def _aplicar_diarios(deltas):
+    """deltas: {(fecha, dimension, clave): [num, unidades, ingresos]}; SELECT + UPDATE + INSERT"""
+    existentes = {
+        (fecha, dimension, clave): pk
+        for fecha, dimension, clave, pk in ResumenVentaDiario.objects.filter(
+            fecha__in={llave[0] for llave in deltas},
+            dimension__in={llave[1] for llave in deltas},
+            clave__in={llave[2] for llave in deltas},
+        ).values_list('fecha', 'dimension', 'clave', 'pk')
+    }
+    _sumar_por_pk(ResumenVentaDiario, CAMPOS_DIARIOS,
+                  {existentes[llave]: delta for llave, delta in deltas.items() if llave in existentes})
+    _crear_filas(
+        ResumenVentaDiario,
+        [
+            ResumenVentaDiario(fecha=fecha, dimension=dimension, clave=clave,
+                               num_ventas=num, unidades=unidades, ingresos=ingresos)
+            for (fecha, dimension, clave), (num, unidades, ingresos) in deltas.items()
+            if (fecha, dimension, clave) not in existentes
+        ],
+        lambda fila: _sumar_fila(fila.fecha, fila.dimension, fila.clave,
+                                 fila.num_ventas, fila.unidades, fila.ingresos),
+    )
+
+
+def _aplicar_clientes(por_cliente):
+    """por_cliente: {cliente_id: [num, unidades, gastado]}; igual que _aplicar_diarios"""
+    existentes = set(ResumenCliente.objects.filter(cliente_id__in=list(por_cliente)).values_list('pk', flat=True))
+    _sumar_por_pk(ResumenCliente, CAMPOS_CLIENTE,
+                  {pk: delta for pk, delta in por_cliente.items() if pk in existentes})
+    _crear_filas(
+        ResumenCliente,
+        [
+            ResumenCliente(cliente_id=pk, num_ventas=num, unidades=unidades, gastado=gastado)
+            for pk, (num, unidades, gastado) in por_cliente.items()
+            # Si no hay fila que restar es porque el cliente se está eliminando (borrado en cascada)
+            if pk not in existentes and num > 0
+        ],
+        lambda fila: _sumar_cliente(fila.cliente_id, fila.num_ventas, fila.unidades, fila.gastado),
+    )
+
+
+def _sumar_fila(fecha, dimension, clave, num, unidades, ingresos):
+    """Una sola fila: UPDATE atómico con F(); si la fila aún no existe se crea"""
+    filtro = {'fecha': fecha, 'dimension': dimension, 'clave': clave}
+    cambios = {
+        'num_ventas': F('num_ventas') + num,
+        'unidades': F('unidades') + unidades,
+        'ingresos': F('ingresos') + ingresos,
+    }
+    if ResumenVentaDiario.objects.filter(**filtro).update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            ResumenVentaDiario.objects.create(num_ventas=num, unidades=unidades, ingresos=ingresos, **filtro)
+    except IntegrityError:
+        # Otra transacción creó la fila al mismo tiempo: ahora sí existe
+        ResumenVentaDiario.objects.filter(**filtro).update(**cambios)
+
+
+def _sumar_cliente(cliente_id, num, unidades, gastado):
+    """Igual que _sumar_fila, para el acumulado histórico del cliente"""
+    cambios = {
+        'num_ventas': F('num_ventas') + num,
+        'unidades': F('unidades') + unidades,
+        'gastado': F('gastado') + gastado,
+    }
+    if ResumenCliente.objects.filter(cliente_id=cliente_id).update(**cambios) or num <= 0:
+        # Si no hay fila que restar es porque el cliente se está eliminando (borrado en cascada)
+        return
+    try:
+        with transaction.atomic():
+            ResumenCliente.objects.create(cliente_id=cliente_id, num_ventas=num, unidades=unidades, gastado=gastado)
+    except IntegrityError:
+        ResumenCliente.objects.filter(cliente_id=cliente_id).update(**cambios)
+
+
+def reconstruir_resumen_clientes(lote=5000):
+    """Borra y recalcula el acumulado de todos los clientes con un solo GROUP BY; regresa las filas creadas"""
+    grupos = (
+        Venta.objects.order_by()
+        .values('cliente_id')
+        .annotate(n=Count('id'), u=Sum('cantidad'), g=Sum('total'))
+    )
+    with transaction.atomic():
+        ResumenCliente.objects.all().delete()
+        filas = [
+            ResumenCliente(cliente_id=grupo['cliente_id'], num_ventas=grupo['n'],
+                           unidades=grupo['u'] or 0, gastado=grupo['g'] or 0)
+            for grupo in grupos.iterator()
+        ]
+        ResumenCliente.objects.bulk_create(filas, batch_size=lote)
+    return len(filas)
+
+
+def filas_resumen_diario(ventas, dias_por_bloque=31, lote=5000):
+    """
+    Genera, por bloques de días, las filas del resumen diario de un queryset de ventas:
+    listas de (fecha, dimension, clave, num_ventas, unidades, ingresos).
+    Cada bloque se lee en lotes con cursor (fecha_venta, id) y se agrupa con acumular_diarios,
+    sin truncar la fecha en la BD (TruncDate regresa NULL en MySQL sin tablas de zonas horarias).
+    Recibe el queryset para servir también a la migración (modelos históricos).
+    """
+    rango = ventas.aggregate(primera=Min('fecha_venta'), ultima=Max('fecha_venta'))
+    if not rango['primera']:
+        return
+    dia, ultimo_dia = dia_local(rango['primera']), dia_local(rango['ultima'])
+    bloque = timedelta(days=dias_por_bloque)
+    while dia <= ultimo_dia:
+        en_bloque = ventas.filter(
+            fecha_venta__gte=inicio_del_dia(dia), fecha_venta__lt=inicio_del_dia(dia + bloque),
+        ).order_by('fecha_venta', 'pk')
+        deltas = defaultdict(lambda: [0, 0, Decimal('0')])
+        siguientes = en_bloque
+        while True:
+            huellas = list(siguientes.values('pk', *CAMPOS_HUELLA)[:lote])
+            if not huellas:
+                break
+            acumular_diarios(deltas, huellas)
+            ultima = huellas[-1]
+            siguientes = en_bloque.filter(
+                Q(fecha_venta__gt=ultima['fecha_venta']) | Q(fecha_venta=ultima['fecha_venta'], pk__gt=ultima['pk'])
+            )
+        yield [(fecha, dimension, clave, *valores) for (fecha, dimension, clave), valores in deltas.items()]
+        dia += bloque
+
+
+# ============ LECTURA POR PERIODO ============
+def inicio_del_dia(fecha):
+    """Medianoche local (aware) de un día"""
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def dividir_periodo(inicio, fin):
+    """
+    Divide el rango [inicio, fin) en días completos y fragmentos parciales.
+    Regresa (primer_dia, dia_final_exclusivo, fragmentos) donde los fragmentos son
+    rangos de fecha/hora que deben leerse de las ventas sin resumir.
+    """
+    primer_dia = dia_local(inicio)
+    if inicio_del_dia(primer_dia) < inicio:
+        primer_dia += timedelta(days=1)
+    dia_final = dia_local(fin)
+
+    if primer_dia >= dia_final:
+        return None, None, [(inicio, fin)]
+
+    fragmentos = []
+    if inicio < inicio_del_dia(primer_dia):
+        fragmentos.append((inicio, inicio_del_dia(primer_dia)))
+    if inicio_del_dia(dia_final) < fin:
+        fragmentos.append((inicio_del_dia(dia_final), fin))
+    return primer_dia, dia_final, fragmentos
+
+
+def resumen_periodo(inicio, fin):
+    """
+    Totales del rango [inicio, fin): número de ventas, unidades e ingresos.
+    Los días completos se leen de los resúmenes y solo los extremos parciales
+    se calculan con las ventas sin resumir.
+    """
+    primer_dia, dia_final, fragmentos = dividir_periodo(inicio, fin)
+    totales = {'num_ventas': 0, 'unidades': 0, 'ingresos': Decimal('0')}
+
+    if primer_dia:
+        resumen = ResumenVentaDiario.objects.filter(
+            dimension='total', fecha__gte=primer_dia, fecha__lt=dia_final,
+        ).aggregate(num_ventas=Sum('num_ventas'), unidades=Sum('unidades'), ingresos=Sum('ingresos'))
+        _acumular(totales, resumen)
+
+    for desde, hasta in fragmentos:
+        resumen = Venta.objects.filter(fecha_venta__gte=desde, fecha_venta__lt=hasta).aggregate(
+            num_ventas=Count('id'), unidades=Sum('cantidad'), ingresos=Sum('total'),
+        )
+        _acumular(totales, resumen)
+
+    return totales
+
+
+def top_dimension(dimension, inicio, fin, limite=5, orden='ingresos'):
+    """
+    Los `limite` productos/clientes/vendedores con mayor `orden` (num_ventas, unidades
+    o ingresos) en el rango [inicio, fin). Si el rango son días completos se agrupan
+    los resúmenes; si no, las ventas. Regresa diccionarios con clave, num_ventas,
+    unidades e ingresos.
+    """
+    primer_dia, dia_final, fragmentos = dividir_periodo(inicio, fin)
+    if primer_dia and not fragmentos:
+        filas = (
+            ResumenVentaDiario.objects
+            .filter(dimension=dimension, fecha__gte=primer_dia, fecha__lt=dia_final)
+            .values('clave')
+            .annotate(n=Sum('num_ventas'), u=Sum('unidades'), i=Sum('ingresos'))
+        )
+    else:
+        filas = (
+            Venta.objects
+            .filter(fecha_venta__gte=inicio, fecha_venta__lt=fin)
+            .values(clave=F(DIMENSIONES[dimension]))
+            .annotate(n=Count('id'), u=Sum('cantidad'), i=Sum('total'))
+        )
+
+    columna = {'num_ventas': 'n', 'unidades': 'u', 'ingresos': 'i'}[orden]
+    return [
+        {'clave': fila['clave'], 'num_ventas': fila['n'], 'unidades': fila['u'], 'ingresos': fila['i']}
+        for fila in filas.order_by(f'-{columna}')[:limite]
+    ]
+
+
+def _acumular(totales, resumen):
+    for campo in totales:
+        totales[campo] += resumen[campo] or 0
@@ -0,0 +1,69 @@
+# tienda/roles.py
+# Resolución de roles y permisos con caché (una sola búsqueda del perfil por usuario)
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PerfilUsuario
+
+# Métodos de PerfilUsuario que se precalculan como permisos
+METODOS_PERMISO = (
+    'es_vendedor', 'es_gerente', 'es_administrador', 'es_cliente',
+    'tiene_permiso_lectura', 'tiene_permiso_escritura', 'tiene_permiso_eliminacion',
+    'puede_ver_productos', 'puede_ver_clientes', 'puede_ver_ventas', 'puede_editar_perfil_propio',
+)
+
+SIN_PERFIL = ''  # Se guarda en caché para no volver a consultar usuarios sin perfil
+
+
+class Permisos:
+    """
+    Conjunto de permisos precalculado de un usuario.
+    Se usa en vistas ('es_gerente' in permisos) y en templates ({% if permisos.es_gerente %}).
+    """
+
+    def __init__(self, rol=None):
+        self.rol = rol or None
+        self.conjunto = frozenset()
+        if self.rol:
+            perfil = PerfilUsuario(rol=self.rol)  # Instancia sin guardar: solo para evaluar los métodos
+            self.conjunto = frozenset(metodo for metodo in METODOS_PERMISO if getattr(perfil, metodo)())
+
+    def __contains__(self, permiso):
+        return permiso in self.conjunto
+
+    def __getattr__(self, permiso):
+        if permiso in METODOS_PERMISO:
+            return permiso in self.conjunto
+        raise AttributeError(permiso)
+
+    def __bool__(self):
+        return self.rol is not None
+
+
+def clave_cache(user_id):
+    return f'tienda:rol:{user_id}'
+
+
+def rol_de_usuario(user):
+    """Rol del usuario (None si no tiene perfil); usa la caché de procesos/compartida"""
+    clave = clave_cache(user.pk)
+    rol = cache.get(clave)
+    if rol is None:
+        rol = PerfilUsuario.objects.filter(user_id=user.pk).values_list('rol', flat=True).first() or SIN_PERFIL
+        cache.set(clave, rol, getattr(settings, 'TIENDA_ROLES_CACHE_SEGUNDOS', 300))
+    return rol or None
+
+
+def obtener_permisos(request):
+    """Permisos del usuario de la petición; se calculan una sola vez por petición"""
+    if not hasattr(request, '_permisos_tienda'):
+        if request.user.is_authenticated:
+            request._permisos_tienda = Permisos(rol_de_usuario(request.user))
+        else:
+            request._permisos_tienda = Permisos()
+    return request._permisos_tienda
+
+
+def invalidar_rol(user_id):
+    """Borra el rol en caché (se llama al guardar o eliminar un perfil)"""
+    cache.delete(clave_cache(user_id))
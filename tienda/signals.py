@@ -0,0 +1,107 @@
+# tienda/signals.py
+# Señales que mantienen al día los datos derivados de los modelos
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .busqueda import indexar_productos, indexar_productos_de
+from .categorias import ajustar_conteos, estado_conteo
+from .contadores import ajustar_contador, MODELOS as MODELOS_CONTADOS
+from .models import Categoria, PerfilUsuario, Producto, Proveedor, Venta
+from .resumenes import aplicar_ventas, huella_venta
+from .roles import invalidar_rol
+
+
+# ============ RESÚMENES DIARIOS DE VENTAS ============
+@receiver(post_delete, sender=Venta)
+def restar_venta_eliminada(sender, instance, **kwargs):
+    """Resta la venta eliminada (también en borrados en cascada) de los resúmenes"""
+    huella = getattr(instance, '_huella_original', None) or huella_venta(instance)
+    aplicar_ventas([huella], signo=-1)
+
+
+# ============ CONTEO DE PRODUCTOS POR CATEGORÍA ============
+@receiver(post_delete, sender=Producto)
+def descontar_producto_de_categoria(sender, instance, **kwargs):
+    """Las altas y los cambios se cuentan en Producto.save; aquí las bajas (también en cascada)"""
+    ajustar_conteos(getattr(instance, '_conteo_original', None) or estado_conteo(instance), None)
+
+
+# ============ CACHÉ DE ROLES ============
+@receiver(post_save, sender=PerfilUsuario)
+@receiver(post_delete, sender=PerfilUsuario)
+def invalidar_rol_en_cache(sender, instance, **kwargs):
+    """El siguiente request vuelve a leer el rol del perfil modificado"""
+    invalidar_rol(instance.user_id)
+
+
+# ============ CONTADORES DEL DASHBOARD ============
+def contar_creado(sender, instance, created, **kwargs):
+    if created:
+        ajustar_contador(sender, 1)
+
+
+def descontar_eliminado(sender, instance, **kwargs):
+    ajustar_contador(sender, -1)
+
+
+for modelo in MODELOS_CONTADOS.values():
+    post_save.connect(contar_creado, sender=modelo, dispatch_uid=f'contador_creado_{modelo.__name__}')
+    post_delete.connect(descontar_eliminado, sender=modelo, dispatch_uid=f'contador_eliminado_{modelo.__name__}')
+
+
+# ============ ÍNDICE DE BÚSQUEDA DE PRODUCTOS ============
+@receiver(post_save, sender=Producto)
+def indexar_producto_guardado(sender, instance, **kwargs):
+    indexar_productos([instance.pk])
+
+
+def _nombre_cambio(instance, created):
+    """True si el nombre de una categoría/proveedor ya existente cambió desde que se leyó"""
+    cambio = not created and getattr(instance, '_nombre_original', None) != instance.nombre
+    instance._nombre_original = instance.nombre
+    return cambio
+
+
+@receiver(post_save, sender=Categoria)
+def indexar_productos_de_categoria(sender, instance, created, **kwargs):
+    """
+    El nombre de la categoría forma parte del índice de sus productos: si cambió se
+    reindexan por lotes después del commit (no dentro de la petición del admin)
+    """
+    if _nombre_cambio(instance, created):
+        productos = Producto.objects.filter(categoria_id=instance.pk)
+        transaction.on_commit(lambda: indexar_productos_de(productos))
+
+
+@receiver(post_save, sender=Proveedor)
+def indexar_productos_de_proveedor(sender, instance, created, **kwargs):
+    if _nombre_cambio(instance, created):
+        productos = Producto.objects.filter(proveedores=instance.pk)
+        transaction.on_commit(lambda: indexar_productos_de(productos))
+
+
+@receiver(pre_delete, sender=Proveedor)
+def indexar_productos_de_proveedor_eliminado(sender, instance, **kwargs):
+    """
+    Al eliminar el proveedor su tabla intermedia se borra en cascada sin m2m_changed:
+    se guardan aquí sus productos y se reindexan cuando ya no existe (después del commit)
+    """
+    ids = list(instance.producto_set.values_list('id', flat=True))
+    if ids:
+        transaction.on_commit(lambda: indexar_productos(ids))
+
+
+@receiver(m2m_changed, sender=Producto.proveedores.through)
+def indexar_cambio_de_proveedores(sender, instance, action, reverse, pk_set, **kwargs):
+    """Proveedores agregados o quitados, desde el producto o desde el proveedor"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            indexar_productos([instance.pk])
+    elif action == 'pre_clear':
+        # Después del clear ya no se sabe qué productos tenía el proveedor
+        instance._productos_antes_de_limpiar = list(instance.producto_set.values_list('id', flat=True))
+    elif action == 'post_clear':
+        indexar_productos(getattr(instance, '_productos_antes_de_limpiar', []))
+    elif action in ('post_add', 'post_remove'):
+        indexar_productos(pk_set or [])
@@ -1,3 +1,1215 @@
-from django.test import TestCase
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .autocompletar import MAXIMO_PAGINAS, autocompletar_clientes
+from .busqueda import buscar_productos, tokenizar
+from .catalogo import codificar_cursor, pagina_catalogo
+from .compras import pagina_compras
+from .contadores import obtener_contadores
+from .exportacion import filas_ventas
+from .reportes import pagina_ventas, reporte_dimension, serie_ventas
+from .importacion import importar_productos
+from .inventario import StockInsuficiente, descontar_stock, registrar_venta
+from .middleware import InstrumentacionMiddleware, agregado
+from .operaciones import ajustar_productos, filtrar_productos
+from .paralelo import _agregar_fragmento, agregar_dimension, combinar, dividir_por_mes
+from .models import (
+    Categoria, Cliente, PerfilUsuario, Producto, Proveedor, ResumenCliente, ResumenVentaDiario, Ticket, Venta,
+)
+from .resumenes import inicio_del_dia
+from .roles import obtener_permisos
+from .tickets import crear_ticket
+from .views import rol_requerido
+
+
+# ============ PRUEBAS DE RESOLUCIÓN DE ROLES ============
+class RolesEnCacheTest(TestCase):
+    """El perfil se consulta una sola vez sin importar cuántas verificaciones de rol haya"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('gerente_prueba', password='clave-segura-123')
+        PerfilUsuario.objects.create(user=self.usuario, rol='gerente')
+
+    def vista_protegida(self, verificaciones):
+        """Vista con `verificaciones` decoradores rol_requerido y el mismo número de chequeos en el template"""
+        template = engines['django'].from_string(
+            '{% for i in rango %}{% if permisos.es_gerente or permisos.es_administrador %}x{% endif %}{% endfor %}'
+        )
+
+        def vista(request):
+            return HttpResponse(template.render({'rango': range(verificaciones)}, request))
+
+        for _ in range(verificaciones):
+            vista = rol_requerido('gerente', 'administrador')(vista)
+        return vista
+
+    def consultas(self, verificaciones):
+        request = RequestFactory().get('/')
+        request.user = self.usuario
+        with CaptureQueriesContext(connection) as capturadas:
+            respuesta = self.vista_protegida(verificaciones)(request)
+        self.assertEqual(respuesta.content, b'x' * verificaciones)
+        return len(capturadas)
+
+    def test_consultas_no_crecen_con_verificaciones(self):
+        self.assertEqual(self.consultas(1), 1)  # Primera petición: se lee el perfil
+        cache.clear()
+        self.assertEqual(self.consultas(25), 1)  # Mismo costo con 25 verificaciones
+
+    def test_rol_se_lee_de_cache(self):
+        self.consultas(1)
+        self.assertEqual(self.consultas(10), 0)
+
+    def test_cambio_de_rol_invalida_cache(self):
+        request = RequestFactory().get('/')
+        request.user = self.usuario
+        self.assertIn('es_gerente', obtener_permisos(request))
+
+        perfil = PerfilUsuario.objects.get(user=self.usuario)
+        perfil.rol = 'cliente'
+        perfil.save()
+
+        request = RequestFactory().get('/')
+        request.user = self.usuario
+        permisos = obtener_permisos(request)
+        self.assertEqual(permisos.rol, 'cliente')
+        self.assertNotIn('es_gerente', permisos)
+
+
+# ============ PRUEBAS DEL BENCHMARK DE VISTAS ============
+class BenchmarkVistasTest(TestCase):
+    """bench_vistas genera una línea base y falla cuando una vista hace más consultas"""
+
+    def setUp(self):
+        User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        producto = Producto.objects.create(
+            nombre='Agua', descripcion='1 litro', precio=Decimal('10.00'), stock=50, categoria=categoria,
+        )
+        cliente = Cliente.objects.create(
+            nombre='Ana', apellido='López', email='ana@ejemplo.com', telefono='0', direccion='-',
+        )
+        Venta.objects.create(cliente=cliente, producto=producto, cantidad=2, precio_unitario=producto.precio)
+        self.carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(self.carpeta.cleanup)
+
+    def correr(self, **opciones):
+        call_command('bench_vistas', repeticiones=1, calentamiento=1, stdout=open(os.devnull, 'w'), **opciones)
+
+    def test_genera_linea_base_de_todas_las_vistas(self):
+        salida = os.path.join(self.carpeta.name, 'base.json')
+        self.correr(salida=salida)
+        with open(salida, encoding='utf-8') as archivo:
+            vistas = json.load(archivo)['vistas']
+        for etiqueta in ('producto_lista', 'categoria_lista', 'reporte_ventas:generado'):
+            self.assertEqual(vistas[etiqueta]['estado'], 200)
+            self.assertGreater(vistas[etiqueta]['consultas'], 0)
+            self.assertGreater(vistas[etiqueta]['bytes'], 0)
+
+    def test_consultas_extra_son_regresion(self):
+        salida = os.path.join(self.carpeta.name, 'base.json')
+        self.correr(salida=salida, solo=['producto_lista'])
+        self.correr(base=salida, solo=['producto_lista'])  # Misma carga: sin regresión
+
+        # Simula una línea base con una consulta menos (p. ej. antes de un N+1)
+        with open(salida, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        base['vistas']['producto_lista']['consultas'] -= 1
+        with open(salida, 'w', encoding='utf-8') as archivo:
+            json.dump(base, archivo)
+
+        with self.assertRaisesMessage(CommandError, 'producto_lista: consultas'):
+            self.correr(base=salida, solo=['producto_lista'])
+
+
+# ============ PRUEBAS DEL GENERADOR DE DATOS ============
+class GenerarDatosTest(TestCase):
+    """generar_datos: la misma semilla produce los mismos datos en cualquier corrida"""
+
+    def generar(self, semilla=7):
+        call_command('generar_datos', categorias=3, proveedores=2, productos=20, clientes=10, ventas=200, dias=30,
+                     lote=7, semilla=semilla, limpiar=True, stdout=io.StringIO())
+        return {
+            'categorias': list(Categoria.objects.order_by('id').values_list('nombre', 'productos_activos')),
+            'proveedores': list(Proveedor.objects.order_by('id').values_list('nombre', 'empresa', 'telefono')),
+            'productos': list(Producto.objects.order_by('id').values_list(
+                'nombre', 'precio', 'stock', 'activo', 'categoria__nombre')),
+            'clientes': list(Cliente.objects.order_by('id').values_list('nombre', 'apellido', 'telefono')),
+            'ventas': list(Venta.objects.order_by('id').values_list(
+                'producto__nombre', 'cliente__telefono', 'cantidad', 'total', 'fecha_venta')),
+        }
+
+    def test_misma_semilla_mismos_datos(self):
+        primera = self.generar()
+        self.assertEqual([len(primera[tabla]) for tabla in primera], [3, 2, 20, 10, 200])
+        self.assertEqual(timezone.localtime(max(venta[-1] for venta in primera['ventas'])).date(), date(2025, 12, 31))
+        self.assertEqual(ResumenVentaDiario.objects.filter(dimension='total').aggregate(n=Sum('num_ventas'))['n'], 200)
+
+        self.assertEqual(self.generar(), primera)
+        self.assertNotEqual(self.generar(semilla=8)['ventas'], primera['ventas'])
+
+
+# ============ PRUEBAS DEL MIDDLEWARE DE INSTRUMENTACIÓN ============
+class InstrumentacionTest(TestCase):
+    """Server-Timing en cada respuesta y detección de la misma consulta repetida (N+1)"""
+
+    def setUp(self):
+        agregado.reiniciar()
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        self.ids = [
+            Producto.objects.create(nombre=f'Producto {i}', descripcion='-', precio=Decimal('5.00'),
+                                    stock=1, categoria=categoria).pk
+            for i in range(5)
+        ]
+
+    def test_encabezado_server_timing(self):
+        User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        self.client.force_login(User.objects.get(username='admin_prueba'))
+        respuesta = self.client.get(reverse('producto_lista'))
+        for metrica in ('sql;dur=', 'consultas"', 'vista;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(metrica, respuesta['Server-Timing'])
+        self.assertIn('producto_lista', [fila['ruta'] for fila in agregado.resumen()])
+
+    def test_detecta_consultas_repetidas(self):
+        def vista_n_mas_1(request):
+            nombres = [Producto.objects.get(pk=pk).nombre for pk in self.ids]  # Una consulta por producto
+            return HttpResponse(', '.join(nombres))
+
+        middleware = InstrumentacionMiddleware(vista_n_mas_1)
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with self.assertLogs('tienda.instrumentacion', 'WARNING') as avisos:
+            respuesta = middleware(request)
+
+        self.assertIn('desc="5 consultas"', respuesta['Server-Timing'])
+        self.assertIn('5 veces', avisos.output[0])
+        fila = agregado.resumen()[0]
+        self.assertEqual(fila['con_repetidas'], 1)
+        self.assertIn('tienda_producto', fila['ultima_repetida'])
+
+    def test_escrituras_repetidas_no_son_n_mas_1(self):
+        def vista_con_escrituras(request):
+            for pk in self.ids:  # Mismo UPDATE con distinto id
+                Producto.objects.filter(pk=pk).update(stock=2)
+            return HttpResponse('ok')
+
+        request = RequestFactory().get('/')
+        request.resolver_match = None
+        with self.assertNoLogs('tienda.instrumentacion', 'WARNING'):
+            InstrumentacionMiddleware(vista_con_escrituras)(request)
+        self.assertEqual(agregado.resumen()[0]['con_repetidas'], 0)
+
+        # Registrar una venta (varios UPDATE de resúmenes) tampoco se reporta
+        usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                         telefono='1', direccion='-')
+        self.client.force_login(usuario)
+        with self.assertNoLogs('tienda.instrumentacion', 'WARNING'):
+            self.client.post(reverse('venta_crear'), {'cliente': cliente.pk, 'producto': self.ids[0], 'cantidad': 1})
+        self.assertTrue(Venta.objects.exists())
+
+
+# ============ PRUEBAS DE LA IMPORTACIÓN DE PRODUCTOS ============
+class ImportacionProductosTest(TestCase):
+    """Upsert por nombre, creación de categorías/proveedores y errores por fila"""
+
+    def setUp(self):
+        self.bebidas = Categoria.objects.create(nombre='Bebidas')
+        self.acme = Proveedor.objects.create(nombre='Acme')
+        self.agua = Producto.objects.create(
+            nombre='Agua 1L', descripcion='Botella', precio=Decimal('10.00'), stock=5, categoria=self.bebidas,
+        )
+
+    def importar(self, texto, **opciones):
+        return importar_productos(io.StringIO(texto), **opciones)
+
+    def test_crea_actualiza_y_reporta_errores(self):
+        resultado = self.importar(
+            'nombre,precio,stock,categoria,proveedores\n'
+            'agua  1l,12.50,40,bebidas,Acme|Distribuidora Norte\n'  # Mismo producto (sin distinguir mayúsculas)
+            'Galletas,"$1,234.00",3,Botanas,\n'
+            'Refresco,abc,3,Bebidas,\n'
+            'Jugo,15,-1,Bebidas,\n'
+        )
+        self.assertEqual((resultado.creados, resultado.actualizados), (1, 1))
+        self.assertEqual([linea for linea, _ in resultado.errores], [4, 5])
+        self.assertEqual((resultado.categorias_creadas, resultado.proveedores_creados), (1, 1))
+
+        self.agua.refresh_from_db()
+        self.assertEqual((self.agua.precio, self.agua.stock, self.agua.descripcion), (Decimal('12.50'), 40, 'Botella'))
+        self.assertEqual(sorted(self.agua.proveedores.values_list('nombre', flat=True)), ['Acme', 'Distribuidora Norte'])
+        galletas = Producto.objects.get(nombre='Galletas')
+        self.assertEqual((galletas.precio, galletas.categoria.nombre), (Decimal('1234.00'), 'Botanas'))
+
+        # La misma lista otra vez no escribe nada
+        repetida = self.importar('nombre,precio,stock,categoria\nagua 1l,12.50,40,Bebidas\n')
+        self.assertEqual((repetida.actualizados, repetida.sin_cambios), (0, 1))
+
+    def test_simular_y_no_crear_faltantes(self):
+        resultado = self.importar('nombre,precio,stock,categoria\nNuevo,1,1,Bebidas\nOtro,1,1,Lácteos\n',
+                                  crear_faltantes=False, simular=True)
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual(resultado.errores, [(3, "la categoría 'Lácteos' no existe")])
+        self.assertFalse(Producto.objects.filter(nombre='Nuevo').exists())  # La simulación se revirtió
+
+
+# ============ PRUEBAS DE LOS AJUSTES MASIVOS ============
+class AjusteMasivoTest(TestCase):
+    """El ajuste se aplica con un solo UPDATE y la simulación no modifica nada"""
+
+    def setUp(self):
+        bebidas = Categoria.objects.create(nombre='Bebidas')
+        botanas = Categoria.objects.create(nombre='Botanas')
+        self.acme = Proveedor.objects.create(nombre='Acme')
+        self.productos = []
+        for i, (categoria, precio) in enumerate([(bebidas, '10.00'), (bebidas, '19.99'), (botanas, '10.00')]):
+            producto = Producto.objects.create(nombre=f'P{i}', descripcion='-', precio=Decimal(precio),
+                                               stock=3, categoria=categoria)
+            producto.proveedores.add(self.acme)
+            self.productos.append(producto)
+        self.bebidas = bebidas
+
+    def precios(self):
+        return [p.precio for p in Producto.objects.order_by('id')]
+
+    def test_porcentaje_por_categoria_y_proveedor(self):
+        productos = filtrar_productos(categoria=self.bebidas, proveedor=self.acme)
+        vista = ajustar_productos(productos, 'precio', 'porcentaje', Decimal('8'), simular=True)
+        self.assertEqual(vista['afectados'], 2)
+        self.assertEqual([f['nuevo'] for f in vista['vista_previa']], [Decimal('10.80'), Decimal('21.59')])
+        self.assertEqual(self.precios(), [Decimal('10.00'), Decimal('19.99'), Decimal('10.00')])  # Sin cambios
+
+        with CaptureQueriesContext(connection) as capturadas:
+            resultado = ajustar_productos(productos, 'precio', 'porcentaje', Decimal('8'))
+        self.assertEqual(resultado['afectados'], 2)
+        self.assertEqual([q['sql'].split()[0] for q in capturadas].count('UPDATE'), 1)
+        self.assertEqual(self.precios(), [Decimal('10.80'), Decimal('21.59'), Decimal('10.00')])
+
+    def test_stock_nunca_negativo_y_reabasto(self):
+        ajustar_productos(filtrar_productos(precio_max=Decimal('15')), 'stock', 'sumar', -10)
+        ajustar_productos(filtrar_productos(precio_min=Decimal('15')), 'stock', 'minimo', 20)
+        self.assertEqual(list(Producto.objects.order_by('id').values_list('stock', flat=True)), [0, 20, 0])
+
+
+# ============ PRUEBAS DE LA BÚSQUEDA DE PRODUCTOS ============
+class BusquedaProductosTest(TestCase):
+    """Índice invertido: acentos, prefijos, todas las palabras, relevancia y actualización con señales"""
+
+    def setUp(self):
+        self.higiene = Categoria.objects.create(nombre='Higiene')
+        self.panales = Producto.objects.create(nombre='Pañales Ecológicos', descripcion='Paquete de 40',
+                                               precio=Decimal('199.00'), stock=5, categoria=self.higiene)
+        self.toallas = Producto.objects.create(nombre='Toallas húmedas', descripcion='Ideales para pañales',
+                                               precio=Decimal('45.00'), stock=5, categoria=self.higiene)
+
+    def nombres(self, texto):
+        return [p.nombre for p in buscar_productos(texto)['productos']]
+
+    def test_tokenizacion_sin_acentos_ni_plurales(self):
+        self.assertEqual(tokenizar('Pañales ECOLÓGICOS para bebé'), ['panal', 'ecologico', 'bebe'])
+
+    def test_prefijo_todas_las_palabras_y_relevancia(self):
+        self.assertEqual(self.nombres('panal'), ['Pañales Ecológicos', 'Toallas húmedas'])  # Nombre antes que descripción
+        self.assertEqual(self.nombres('pañal ecol'), ['Pañales Ecológicos'])
+        self.assertEqual(self.nombres('humed'), ['Toallas húmedas'])
+        self.assertEqual(self.nombres('pañal inexistente'), [])
+
+    def test_indice_se_actualiza_con_senales(self):
+        self.higiene.nombre = 'Cuidado del bebé'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.higiene.save()
+        self.assertEqual(len(self.nombres('bebe')), 2)
+
+        acme = Proveedor.objects.create(nombre='Acme')
+        acme.producto_set.add(self.toallas)  # Desde el lado del proveedor
+        self.assertEqual(self.nombres('acme'), ['Toallas húmedas'])
+        acme.nombre = 'Bimbo'
+        with self.captureOnCommitCallbacks(execute=True):
+            acme.save()
+        self.assertEqual((self.nombres('acme'), self.nombres('bimbo')), ([], ['Toallas húmedas']))
+        acme.producto_set.clear()
+        self.assertEqual(self.nombres('bimbo'), [])
+
+    def test_guardar_sin_renombrar_no_reindexa(self):
+        categoria = Categoria.objects.get(pk=self.higiene.pk)
+        categoria.descripcion = 'Otra descripción'
+        with self.captureOnCommitCallbacks() as pendientes:
+            categoria.save()
+        self.assertEqual(pendientes, [])
+
+        categoria.nombre = 'Cuidado del bebé'
+        with self.captureOnCommitCallbacks() as pendientes:
+            categoria.save()
+        self.assertEqual(len(pendientes), 1)  # Se reindexa después del commit, no en el save
+        self.assertEqual(self.nombres('bebe'), [])
+
+    def test_eliminar_proveedor_reindexa_sus_productos(self):
+        alpura = Proveedor.objects.create(nombre='Alpura')
+        self.panales.proveedores.add(alpura)
+        self.assertEqual(self.nombres('alpu'), ['Pañales Ecológicos'])
+        with self.captureOnCommitCallbacks(execute=True):
+            alpura.delete()
+        self.assertEqual(self.nombres('alpu'), [])
+        self.assertEqual(self.nombres('pañal ecol'), ['Pañales Ecológicos'])  # El resto del índice sigue
+
+
+# ============ PRUEBAS DE AUTOCOMPLETAR (COMBOBOX CON AJAX) ============
+class AutocompletarTest(TestCase):
+    """Sugerencias por prefijo en JSON y formularios de venta que no cargan todas las opciones"""
+
+    def setUp(self):
+        cache.clear()
+        usuario = User.objects.create_user('gerente_prueba', password='clave-segura-123')
+        PerfilUsuario.objects.create(user=usuario, rol='gerente')
+        self.client.force_login(usuario)
+        self.juan = Cliente.objects.create(nombre='Juan', apellido='Pérez', email='jp@correo.com',
+                                           telefono='1', direccion='-')
+        Cliente.objects.create(nombre='Julia', apellido='Ramos', email='julia@correo.com', telefono='2', direccion='-')
+        bebidas = Categoria.objects.create(nombre='Bebidas')
+        self.refresco = Producto.objects.create(nombre='Refresco de cola', descripcion='-', precio=Decimal('18.50'),
+                                                stock=4, categoria=bebidas)
+        Producto.objects.create(nombre='Refresco light', descripcion='-', precio=Decimal('19.00'), stock=1,
+                                categoria=bebidas, activo=False)
+
+    def sugerencias(self, nombre_url, term):
+        respuesta = self.client.get(reverse(nombre_url), {'term': term})
+        self.assertEqual(respuesta.status_code, 200)
+        return [fila['text'] for fila in respuesta.json()['results']]
+
+    def test_clientes_por_prefijo(self):
+        self.assertEqual(self.sugerencias('cliente_autocompletar', 'ju'),
+                         ['Juan Pérez (jp@correo.com)', 'Julia Ramos (julia@correo.com)'])
+        self.assertEqual(self.sugerencias('cliente_autocompletar', 'ju ram'), ['Julia Ramos (julia@correo.com)'])
+        self.assertEqual(self.sugerencias('cliente_autocompletar', 'uan'), [])  # Solo prefijos
+        with self.assertNumQueries(0):
+            self.assertEqual(autocompletar_clientes(' j ')['results'], [])  # Muy corto: sin consulta
+
+    def test_productos_activos_y_cache(self):
+        self.assertEqual(self.sugerencias('producto_autocompletar', 'refres'), ['Refresco de cola - $18.50'])
+        self.refresco.nombre = 'Agua mineral'
+        self.refresco.save()
+        # La respuesta se reutiliza durante unos segundos
+        self.assertEqual(self.sugerencias('producto_autocompletar', 'refres'), ['Refresco de cola - $18.50'])
+
+    def test_formularios_solo_renderizan_lo_seleccionado(self):
+        html = self.client.get(reverse('venta_crear')).content.decode()
+        self.assertIn(reverse('cliente_autocompletar'), html)
+        self.assertNotIn('Julia', html)
+        self.assertNotIn('Refresco', html)
+
+        respuesta = self.client.post(reverse('venta_ticket'), {
+            'cliente': self.juan.pk,
+            'form-TOTAL_FORMS': 1, 'form-INITIAL_FORMS': 0, 'form-MIN_NUM_FORMS': 1, 'form-MAX_NUM_FORMS': 1000,
+            'form-0-producto': self.refresco.pk, 'form-0-cantidad': 99,  # Más que el stock: se vuelve a mostrar
+        })
+        html = respuesta.content.decode()
+        self.assertIn('Refresco de cola - $18.50', html)
+        self.assertIn('Juan Pérez', html)
+        self.assertNotIn('Julia', html)
+
+    def test_proveedores_paginados_y_solo_los_elegidos_en_el_producto(self):
+        Proveedor.objects.bulk_create(Proveedor(nombre=f'Acme {i:02d}', empresa='Acme SA') for i in range(25))
+        pagina = self.client.get(reverse('proveedor_autocompletar'), {'term': 'acme'}).json()
+        self.assertEqual((len(pagina['results']), pagina['more']), (20, True))
+        pagina = self.client.get(reverse('proveedor_autocompletar'), {'term': 'acme', 'page': 2}).json()
+        self.assertEqual((len(pagina['results']), pagina['more']), (5, False))
+
+        self.refresco.proveedores.add(Proveedor.objects.get(nombre='Acme 03'))
+        html = self.client.get(reverse('producto_editar', args=[self.refresco.pk])).content.decode()
+        self.assertIn('Acme 03', html)
+        self.assertNotIn('Acme 04', html)
+
+    def test_paginas_acotadas(self):
+        Cliente.objects.bulk_create(
+            Cliente(nombre='Juan', apellido=f'Zamora {i:03d}', email=f'z{i}@correo.com', telefono='1', direccion='-')
+            for i in range(MAXIMO_PAGINAS * 20 + 5)
+        )
+        self.assertTrue(autocompletar_clientes('juan', MAXIMO_PAGINAS - 1)['more'])
+        ultima = autocompletar_clientes('juan', MAXIMO_PAGINAS)
+        self.assertEqual((len(ultima['results']), ultima['more']), (20, False))
+        with self.assertNumQueries(0):
+            self.assertEqual(autocompletar_clientes('juan', 1000000), {'results': [], 'more': False})
+
+
+# ============ PRUEBAS DEL HISTORIAL DE COMPRAS ============
+class HistorialComprasTest(TestCase):
+    """mis_compras por páginas con consultas constantes y resumen histórico incremental"""
+
+    def setUp(self):
+        usuario = User.objects.create_user('cliente_prueba', password='clave-segura-123')
+        PerfilUsuario.objects.create(user=usuario, rol='cliente')
+        self.client.force_login(usuario)
+        self.cliente = Cliente.objects.create(usuario=usuario, nombre='Ana', apellido='López',
+                                              email='ana@correo.com', telefono='1', direccion='-')
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        self.producto = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'),
+                                                stock=100, categoria=categoria)
+
+    def comprar(self, veces, cantidad=1):
+        for _ in range(veces):
+            Venta.objects.create(cliente=self.cliente, producto=self.producto, cantidad=cantidad,
+                                 precio_unitario=self.producto.precio)
+
+    def resumen(self):
+        resumen = ResumenCliente.objects.get(cliente=self.cliente)
+        return resumen.num_ventas, resumen.unidades, resumen.gastado
+
+    def test_resumen_incremental(self):
+        self.comprar(2, cantidad=3)
+        crear_ticket(self.cliente, None, [(self.producto.pk, 2)])
+        self.assertEqual(self.resumen(), (3, 8, Decimal('80.00')))
+
+        Venta.objects.filter(ticket__isnull=False).first().delete()
+        self.assertEqual(self.resumen(), (2, 6, Decimal('60.00')))
+
+        call_command('reconstruir_resumenes', stdout=io.StringIO())
+        self.assertEqual(self.resumen(), (2, 6, Decimal('60.00')))
+
+    def test_paginas_por_cursor(self):
+        self.comprar(5)
+        ids = list(Venta.objects.order_by('-id').values_list('id', flat=True))
+        primera = pagina_compras(self.cliente, tamano=2)
+        self.assertEqual([v.id for v in primera['ventas']], ids[:2])
+        ultima = pagina_compras(self.cliente, antes=ids[3], tamano=2)
+        self.assertEqual(([v.id for v in ultima['ventas']], ultima['siguiente']), (ids[4:], None))
+
+    def test_consultas_constantes_y_precio_guardado(self):
+        self.comprar(3)
+        self.producto.precio = Decimal('99.00')  # El precio cambia después de la compra
+        self.producto.save()
+        self.client.get(reverse('mis_compras'))  # El rol queda en caché desde la primera petición
+        with CaptureQueriesContext(connection) as pocas:
+            respuesta = self.client.get(reverse('mis_compras'))
+        self.assertContains(respuesta, '$10.00')
+        self.assertNotContains(respuesta, '$99.00')
+
+        self.comprar(20)
+        with CaptureQueriesContext(connection) as muchas:
+            self.client.get(reverse('mis_compras'))
+        self.assertEqual(len(pocas), len(muchas))
+
+
+# ============ PRUEBAS DE LOS CONTEOS POR CATEGORÍA ============
+class ConteoCategoriasTest(TestCase):
+    """total_productos/productos_activos al día con altas, cambios, bajas, importación y reconciliación"""
+
+    def setUp(self):
+        self.bebidas = Categoria.objects.create(nombre='Bebidas')
+        self.botanas = Categoria.objects.create(nombre='Botanas')
+        self.agua = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'),
+                                            stock=1, categoria=self.bebidas)
+        Producto.objects.create(nombre='Jugo', descripcion='-', precio=Decimal('15.00'), stock=1,
+                                categoria=self.bebidas, activo=False)
+
+    def conteos(self):
+        return {c.nombre: (c.total_productos, c.productos_activos) for c in Categoria.objects.all()}
+
+    def test_altas_cambios_y_bajas(self):
+        self.assertEqual(self.conteos(), {'Bebidas': (2, 1), 'Botanas': (0, 0)})
+
+        agua = Producto.objects.get(pk=self.agua.pk)
+        agua.categoria = self.botanas
+        agua.activo = False
+        agua.save()
+        self.assertEqual(self.conteos(), {'Bebidas': (1, 0), 'Botanas': (1, 0)})
+
+        self.bebidas.nombre = 'Refrescos'  # Editar la categoría no reescribe los conteos
+        self.bebidas.save()
+        agua.delete()
+        self.assertEqual(self.conteos(), {'Refrescos': (1, 0), 'Botanas': (0, 0)})
+
+    def test_importacion_y_reconciliacion(self):
+        importar_productos(io.StringIO(
+            'nombre,precio,stock,categoria\n'
+            'Agua,10,1,Botanas\n'  # Cambia de categoría (sigue activo)
+            'Papas,20,1,Botanas\n'
+        ))
+        self.assertEqual(self.conteos(), {'Bebidas': (1, 0), 'Botanas': (2, 2)})
+
+        Categoria.objects.filter(pk=self.bebidas.pk).update(total_productos=7)
+        salida = io.StringIO()
+        call_command('reconciliar_categorias', stdout=salida)
+        self.assertIn('1 categoría(s) corregida(s)', salida.getvalue())
+        self.assertEqual(self.conteos()['Bebidas'], (1, 0))
+
+    def test_lista_sin_contar_productos(self):
+        User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        self.client.force_login(User.objects.get(username='admin_prueba'))
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('categoria_lista'))
+        self.assertContains(respuesta, '2 productos')
+        self.assertFalse(any('COUNT(' in consulta['sql'] for consulta in consultas.captured_queries))
+
+
+# ============ PRUEBAS DEL DETALLE DEL REPORTE DE VENTAS ============
+class ReporteVentasTest(TestCase):
+    """Detalle por cursor con values() y consultas que no crecen con el número de ventas"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        self.cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                              telefono='1', direccion='-')
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        self.producto = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'),
+                                                stock=100, categoria=categoria)
+        self.ahora = timezone.now().replace(microsecond=0)
+
+    def vender(self, cantidad, fecha):
+        Venta.objects.bulk_create([
+            Venta(cliente=self.cliente, producto=self.producto, vendedor=self.usuario, cantidad=1,
+                  precio_unitario=Decimal('10.00'), total=Decimal('10.00'), fecha_venta=fecha)
+            for _ in range(cantidad)
+        ])
+
+    def test_cursor_recorre_todo_sin_repetir(self):
+        self.vender(3, self.ahora)  # Misma fecha: el id desempata
+        self.vender(2, self.ahora - timedelta(minutes=5))
+        esperado = list(Venta.objects.order_by('-fecha_venta', '-id').values_list('id', flat=True))
+
+        vistos, cursor = [], None
+        while True:
+            pagina = pagina_ventas(self.ahora - timedelta(days=1), self.ahora + timedelta(days=1), cursor, tamano=2)
+            vistos += [venta['id'] for venta in pagina['ventas']]
+            cursor = pagina['siguiente']
+            if not cursor:
+                break
+        self.assertEqual(vistos, esperado)
+        self.assertEqual(set(pagina['ventas'][0]), {
+            'id', 'ticket_id', 'cantidad', 'fecha_venta', 'precio_unitario', 'total',
+            'cliente__nombre', 'cliente__apellido', 'producto__nombre', 'vendedor__username',
+        })
+
+    def test_consultas_constantes(self):
+        self.client.force_login(self.usuario)
+        hoy = timezone.localdate()
+        url = f"{reverse('reporte_ventas')}?inicio={hoy - timedelta(days=30)}&fin={hoy}"
+        self.vender(3, self.ahora)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get(url)
+        self.vender(120, self.ahora)
+        with CaptureQueriesContext(connection) as muchas:
+            respuesta = self.client.get(url)
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertEqual(len(respuesta.context['ventas']), 50)
+        self.assertIsNotNone(respuesta.context['siguiente_pagina'])
+
+
+class AuditoriaConsultasTest(TestCase):
+    """auditar_consultas recorre todos los reportes y revisa el plan de cada consulta"""
+
+    def test_reporta_todos_los_origenes(self):
+        usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                         telefono='1', direccion='-')
+        producto = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'), stock=100,
+                                           categoria=Categoria.objects.create(nombre='Bebidas'))
+        ahora = timezone.now()
+        # Más de una página del detalle para que la segunda use un cursor real
+        Venta.objects.bulk_create([
+            Venta(cliente=cliente, producto=producto, vendedor=usuario, cantidad=1, precio_unitario=Decimal('10.00'),
+                  total=Decimal('10.00'), fecha_venta=ahora - timedelta(hours=i))
+            for i in range(60)
+        ])
+
+        salida = io.StringIO()
+        try:
+            call_command('auditar_consultas', minimo_ventas=0, stdout=salida)
+        except CommandError:
+            pass  # En SQLite y con pocas filas el plan puede preferir un escaneo: aquí solo importa la cobertura
+        reportados = {
+            origen
+            for linea in salida.getvalue().splitlines() if linea.startswith('[')
+            for origen in linea[1:linea.index(']')].split(', ')
+        }
+        self.assertLessEqual({
+            'dashboard', 'reporte_serie', 'serie_ventas', 'serie_ventas_comparada', 'dimension_cliente',
+            'dimension_producto', 'dimension_categoria', 'dimension_vendedor', 'dimension_hora',
+            'dimension_dia_semana', 'pagina_ventas_siguiente',
+        }, reportados)
+
+
+class ReporteDimensionesTest(TestCase):
+    """Top-N por dimensión agrupando por id (no por nombre) y dimensiones de tiempo"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        # Dos clientes homónimos: no deben mezclarse en el reporte
+        self.ana1 = Cliente.objects.create(nombre='Ana', apellido='López', email='ana1@correo.com',
+                                           telefono='1', direccion='-')
+        self.ana2 = Cliente.objects.create(nombre='Ana', apellido='López', email='ana2@correo.com',
+                                           telefono='2', direccion='-')
+        self.bebidas = Categoria.objects.create(nombre='Bebidas')
+        self.agua = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'),
+                                            stock=100, categoria=self.bebidas)
+        self.fecha = timezone.localtime().replace(hour=9, minute=30, second=0, microsecond=0)
+        for cliente, cantidad in ((self.ana1, 3), (self.ana2, 1)):
+            Venta.objects.create(cliente=cliente, producto=self.agua, vendedor=self.usuario, cantidad=cantidad,
+                                 precio_unitario=Decimal('10.00'), total=Decimal('10.00') * cantidad,
+                                 fecha_venta=self.fecha)
+        self.inicio = self.fecha.replace(hour=0, minute=0)
+        self.fin = self.inicio + timedelta(days=1)
+
+    def test_clientes_homonimos_separados(self):
+        filas = reporte_dimension('cliente', self.inicio, self.fin, orden='unidades')
+        self.assertEqual([(f['clave'], f['unidades']) for f in filas], [(self.ana1.pk, 3), (self.ana2.pk, 1)])
+        self.assertEqual(filas[0]['nombre'], 'Ana López')
+
+    def test_categoria_y_tiempo(self):
+        categorias = reporte_dimension('categoria', self.inicio, self.fin)
+        self.assertEqual([(f['nombre'], f['ingresos']) for f in categorias], [('Bebidas', Decimal('40.00'))])
+        horas = reporte_dimension('hora', self.inicio, self.fin)
+        self.assertEqual([(f['clave'], f['num_ventas']) for f in horas], [(9, 2)])
+        dias = reporte_dimension('dia_semana', self.inicio, self.fin)
+        self.assertEqual(dias[0]['clave'], self.fecha.isoweekday())
+
+    def test_vista_con_dimensiones(self):
+        self.client.force_login(self.usuario)
+        dia = self.fecha.date()
+        respuesta = self.client.get(reverse('reporte_ventas'), {
+            'inicio': dia, 'fin': dia, 'generar_reporte': 1,
+            'dimensiones': ['vendedor', 'hora', 'inventada'], 'orden': 'unidades',
+        })
+        self.assertEqual([r['dimension'] for r in respuesta.context['reportes']], ['vendedor', 'hora'])
+        self.assertEqual(respuesta.context['reportes'][0]['filas'][0]['nombre'], 'admin_prueba')
+        self.assertNotIn('url_grafica', respuesta.context)  # Sin 'producto' no hay gráfica
+
+
+class GraficaTopProductosTest(TestCase):
+    """Serie JSON de la gráfica de productos: forma, validación, permisos y caché"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('gerente_prueba', password='clave-segura-123')
+        PerfilUsuario.objects.create(user=self.usuario, rol='gerente')
+        self.client.force_login(self.usuario)
+        cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                         telefono='1', direccion='-')
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        self.productos = {
+            nombre: Producto.objects.create(nombre=nombre, descripcion='-', precio=Decimal('10.00'), stock=100,
+                                            categoria=categoria)
+            for nombre in ('Agua', 'Café', 'Té')
+        }
+        self.hoy = timezone.localdate()
+        self.ayer = self.hoy - timedelta(days=1)
+        for nombre, cantidad in (('Agua', 2), ('Café', 5), ('Agua', 1), ('Té', 1)):
+            self.vender(cliente, nombre, cantidad, inicio_del_dia(self.ayer) + timedelta(hours=10))
+
+    def vender(self, cliente, nombre, cantidad, fecha):
+        Venta.objects.create(cliente=cliente, producto=self.productos[nombre], cantidad=cantidad,
+                             precio_unitario=Decimal('10.00'), fecha_venta=fecha)
+
+    def grafica(self, inicio, fin):
+        return self.client.get(reverse('reporte_ventas_grafica'), {'inicio': inicio, 'fin': fin})
+
+    def test_forma_y_valores(self):
+        respuesta = self.grafica(self.ayer, self.ayer)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {
+            'titulo': 'Ventas por Producto',
+            'etiqueta_valor': 'Cantidad Vendida',
+            'etiquetas': ['Café', 'Agua', 'Té'],
+            'valores': [5, 3, 1],
+        })
+        self.assertIn('max-age=300', respuesta['Cache-Control'])
+
+    def test_fechas_invalidas(self):
+        self.assertEqual(self.grafica('ayer', self.hoy).status_code, 400)
+        self.assertEqual(self.grafica(self.hoy, self.ayer).status_code, 400)
+
+    def test_solo_administrador_y_gerente(self):
+        vendedor = User.objects.create_user('vendedor_prueba', password='clave-segura-123')
+        PerfilUsuario.objects.create(user=vendedor, rol='vendedor')
+        self.client.force_login(vendedor)
+        respuesta = self.grafica(self.ayer, self.ayer)
+        self.assertRedirects(respuesta, reverse('home'), fetch_redirect_response=False)
+
+    def test_periodo_con_hoy_no_se_guarda(self):
+        self.assertEqual(self.grafica(self.ayer, self.hoy).json()['valores'], [5, 3, 1])
+        self.vender(Cliente.objects.get(), 'Té', 9, timezone.now())
+        respuesta = self.grafica(self.ayer, self.hoy)
+        self.assertEqual(respuesta.json()['etiquetas'][0], 'Té')
+        self.assertIn('max-age=0', respuesta['Cache-Control'])
+
+
+class SerieVentasTest(TestCase):
+    """Serie por intervalos en una sola consulta, con ceros y periodo anterior"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                         telefono='1', direccion='-')
+        producto = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'), stock=100,
+                                           categoria=Categoria.objects.create(nombre='Bebidas'))
+        self.hoy = timezone.localdate()
+        self.inicio = inicio_del_dia(self.hoy - timedelta(days=2))
+        self.fin = inicio_del_dia(self.hoy + timedelta(days=1))
+        # Dos ventas antier, ninguna ayer, una hoy y una en el periodo anterior
+        for dias, cantidad in ((2, 1), (2, 2), (0, 3), (4, 5)):
+            Venta.objects.create(cliente=cliente, producto=producto, vendedor=self.usuario, cantidad=cantidad,
+                                 precio_unitario=Decimal('10.00'), total=Decimal('10.00') * cantidad,
+                                 fecha_venta=inicio_del_dia(self.hoy - timedelta(days=dias)) + timedelta(hours=10))
+
+    def test_dias_con_ceros_y_comparacion(self):
+        with self.assertNumQueries(1):
+            serie = serie_ventas(self.inicio, self.fin, 'dia', comparar=True)
+        self.assertEqual(serie['etiquetas'][0], f'{self.hoy - timedelta(days=2)}T00:00:00')
+        self.assertEqual(serie['num_ventas'], [2, 0, 1])
+        self.assertEqual(serie['unidades'], [3, 0, 3])
+        self.assertEqual(serie['ingresos'], [30.0, 0.0, 30.0])
+        self.assertEqual(serie['anterior']['unidades'], [0, 5, 0])
+
+    def test_intervalos_locales_sin_truncar_en_la_bd(self):
+        # 23:30 local de ayer: en UTC ya es otro día, debe quedar en la última hora de ayer
+        tarde = inicio_del_dia(self.hoy) - timedelta(minutes=30)
+        Venta.objects.create(cliente=Cliente.objects.get(), producto=Producto.objects.get(), vendedor=self.usuario,
+                             cantidad=4, precio_unitario=Decimal('10.00'), total=Decimal('40.00'), fecha_venta=tarde)
+        with CaptureQueriesContext(connection) as consultas:
+            por_dia = serie_ventas(self.inicio, self.fin, 'dia')
+            por_hora = serie_ventas(self.inicio, self.fin, 'hora')
+        self.assertFalse(any('trunc' in consulta['sql'].lower() for consulta in consultas.captured_queries))
+        self.assertEqual(por_dia['unidades'], [3, 4, 3])
+        self.assertEqual(por_hora['unidades'][47], 4)
+        self.assertEqual(por_hora['etiquetas'][47], f'{self.hoy - timedelta(days=1)}T23:00:00')
+
+    def test_vista_valida_granularidad(self):
+        self.client.force_login(self.usuario)
+        parametros = {'inicio': self.hoy - timedelta(days=2), 'fin': self.hoy}
+        respuesta = self.client.get(reverse('reporte_ventas_serie'), {**parametros, 'granularidad': 'mes'})
+        self.assertEqual(sum(respuesta.json()['num_ventas']), 3)
+        self.assertNotIn('anterior', respuesta.json())
+        respuesta = self.client.get(reverse('reporte_ventas_serie'), {**parametros, 'granularidad': 'siglo'})
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_periodo_con_hoy_no_se_guarda(self):
+        serie_ventas(self.inicio, self.fin, 'dia')
+        Venta.objects.create(cliente=Cliente.objects.get(), producto=Producto.objects.get(), cantidad=4,
+                             precio_unitario=Decimal('10.00'), fecha_venta=timezone.now())
+        self.assertEqual(serie_ventas(self.inicio, self.fin, 'dia')['unidades'][-1], 7)
+
+
+@unittest.skipUnless(importlib.util.find_spec('numpy'), 'NumPy no está instalado (dependencia opcional)')
+class AnaliticaTest(TestCase):
+    """Estadísticas con NumPy: mismos resultados que las consultas agregadas"""
+
+    def setUp(self):
+        from . import analitica
+        self.analitica = analitica
+        usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        self.clientes = [
+            Cliente.objects.create(nombre=f'C{i}', apellido='-', email=f'c{i}@correo.com', telefono='1', direccion='-')
+            for i in range(2)
+        ]
+        self.productos = [
+            Producto.objects.create(nombre=f'P{i}', descripcion='-', precio=Decimal('0.10'), stock=100,
+                                    categoria=categoria)
+            for i in range(3)
+        ]
+        ahora = timezone.now()
+        # Importes con centavos que no son exactos en binario (0.10, 0.30...)
+        for i, (producto, cantidad) in enumerate(((0, 1), (1, 3), (1, 2), (2, 7), (0, 1))):
+            Venta.objects.create(cliente=self.clientes[i % 2], producto=self.productos[producto], vendedor=usuario,
+                                 cantidad=cantidad, precio_unitario=Decimal('0.10'),
+                                 total=Decimal('0.10') * cantidad, fecha_venta=ahora)
+        self.rango = (ahora - timedelta(hours=1), ahora + timedelta(hours=1))
+
+    def test_totales_top_e_histograma(self):
+        with self.assertNumQueries(1):
+            ventas = self.analitica.cargar_ventas(*self.rango, lote=2)  # Varios lotes
+        self.assertEqual(len(ventas['id']), 5)
+
+        resumen = self.analitica.totales(ventas, percentiles=(50, 100))
+        self.assertEqual((resumen['num_ventas'], resumen['unidades']), (5, 14))
+        self.assertEqual(resumen['ingresos'], Decimal('1.40'))
+        self.assertEqual(resumen['promedio'], Decimal('0.28'))
+        self.assertEqual(resumen['percentiles'], {50: Decimal('0.20'), 100: Decimal('0.70')})
+
+        top = self.analitica.top(ventas, 'producto', orden='unidades', limite=2)
+        self.assertEqual([(f['clave'], f['unidades']) for f in top],
+                         [(self.productos[2].pk, 7), (self.productos[1].pk, 5)])
+        self.assertEqual(top[1]['ingresos'], Decimal('0.50'))
+
+        self.assertEqual(sum(self.analitica.histograma(ventas, intervalos=3)['conteos']), 5)
+
+    def test_periodo_sin_ventas(self):
+        ventas = self.analitica.cargar_ventas(self.rango[1], self.rango[1] + timedelta(days=1))
+        self.assertEqual(self.analitica.totales(ventas)['ingresos'], Decimal('0.00'))
+        self.assertEqual(self.analitica.top(ventas), [])
+
+
+class ReporteParaleloTest(TestCase):
+    """Periodos largos divididos por mes: la suma de los fragmentos es igual al total"""
+
+    def setUp(self):
+        usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                         telefono='1', direccion='-')
+        bebidas, snacks = Categoria.objects.create(nombre='Bebidas'), Categoria.objects.create(nombre='Snacks')
+        productos = [
+            Producto.objects.create(nombre=f'P{i}', descripcion='-', precio=Decimal('0.10'), stock=100,
+                                    categoria=categoria)
+            for i, categoria in enumerate((bebidas, snacks, bebidas))
+        ]
+        self.inicio = inicio_del_dia(date(2025, 1, 15))
+        self.fin = inicio_del_dia(date(2025, 4, 10))
+        # Ventas en enero, febrero (incluye el último minuto del mes) y abril
+        fechas = (date(2025, 1, 20), date(2025, 2, 28), date(2025, 3, 1), date(2025, 4, 9))
+        for i, dia in enumerate(fechas):
+            for producto in productos[:i + 1]:
+                Venta.objects.create(cliente=cliente, producto=producto, vendedor=usuario, cantidad=i + 1,
+                                     precio_unitario=Decimal('0.10'), total=Decimal('0.10') * (i + 1),
+                                     fecha_venta=inicio_del_dia(dia) - timedelta(minutes=1 if i == 2 else -600))
+
+    def test_dividir_por_mes(self):
+        fragmentos = dividir_por_mes(self.inicio, self.fin)
+        self.assertEqual([(timezone.localtime(d).date(), timezone.localtime(h).date()) for d, h in fragmentos], [
+            (date(2025, 1, 15), date(2025, 2, 1)), (date(2025, 2, 1), date(2025, 3, 1)),
+            (date(2025, 3, 1), date(2025, 4, 1)), (date(2025, 4, 1), date(2025, 4, 10)),
+        ])
+
+    def test_fragmentos_suman_lo_mismo(self):
+        for dimension in ('categoria', 'hora', 'dia_semana'):
+            completo = agregar_dimension(dimension, self.inicio, self.fin)
+            por_mes = combinar([_agregar_fragmento(dimension, d, h) for d, h in dividir_por_mes(self.inicio, self.fin)])
+            ordenar = lambda filas: sorted(filas, key=lambda fila: fila['clave'])
+            self.assertEqual(ordenar(por_mes), ordenar(completo))
+        self.assertEqual(sum(fila['num_ventas'] for fila in completo), 9)
+        self.assertEqual(sum(fila['ingresos'] for fila in completo), Decimal('2.60'))
+
+
+class CatalogoCursorTest(TestCase):
+    """Paginación por cursor del catálogo: sin repetidos ni huecos, y cursores inválidos"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        # Precios repetidos: el id desempata
+        for i in range(7):
+            Producto.objects.create(nombre=f'P{i}', descripcion='-', precio=Decimal(10 + i % 3), stock=i,
+                                    categoria=categoria)
+
+    def recorrer(self, orden):
+        vistos, cursor = [], None
+        while True:
+            pagina = pagina_catalogo(orden=orden, cursor=cursor, tamano=3)
+            vistos += [producto.pk for producto in pagina['productos']]
+            cursor = pagina['siguiente']
+            if not cursor:
+                return vistos
+
+    def test_recorre_todo_en_orden(self):
+        for orden, campos in (('precio', ('precio', 'id')), ('-stock', ('-stock', '-id')), ('nombre', ('nombre', 'id'))):
+            esperado = list(Producto.objects.order_by(*campos).values_list('id', flat=True))
+            self.assertEqual(self.recorrer(orden), esperado)
+
+    def test_cursor_invalido_es_primera_pagina(self):
+        primera = [p.pk for p in pagina_catalogo(orden='precio', tamano=3)['productos']]
+        for cursor in (codificar_cursor('abc', 1), 'no-es-base64!', codificar_cursor('NaN', 1), 'WzEsMl0'):
+            pagina = pagina_catalogo(orden='precio', cursor=cursor, tamano=3)
+            self.assertEqual([p.pk for p in pagina['productos']], primera)
+
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('producto_lista'), {'orden': 'precio', 'cursor': codificar_cursor('abc', 1)})
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_lista_incluye_inactivos(self):
+        # Es la lista de gestión: los inactivos se muestran (con su estado) para poder reactivarlos
+        Producto.objects.filter(nombre='P0').update(activo=False)
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('producto_lista'))
+        self.assertContains(respuesta, 'Gestión de Productos</h1>', html=False)
+        self.assertContains(respuesta, 'Inactivo')
+        self.assertEqual(len(respuesta.context['productos']), 7)
+
+
+class ResumenesDiariosTest(TestCase):
+    """Los resúmenes diarios y por cliente se ajustan al crear, editar, mover y eliminar ventas"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        self.cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                              telefono='1', direccion='-')
+        self.producto = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'), stock=100,
+                                                categoria=Categoria.objects.create(nombre='Bebidas'))
+        self.ayer = timezone.localdate() - timedelta(days=1)
+        self.venta = Venta.objects.create(cliente=self.cliente, producto=self.producto, vendedor=self.usuario,
+                                          cantidad=2, precio_unitario=Decimal('10.00'),
+                                          fecha_venta=inicio_del_dia(self.ayer) + timedelta(hours=10))
+
+    def fila(self, dimension, clave, fecha=None):
+        """(num_ventas, unidades, ingresos) de una fila de resumen; ceros si no existe"""
+        fila = ResumenVentaDiario.objects.filter(dimension=dimension, clave=clave, fecha=fecha or self.ayer).first()
+        return (fila.num_ventas, fila.unidades, fila.ingresos) if fila else (0, 0, 0)
+
+    def todas(self, fecha=None):
+        claves = (('total', 0), ('producto', self.producto.pk), ('cliente', self.cliente.pk),
+                  ('vendedor', self.usuario.pk))
+        return {self.fila(dimension, clave, fecha) for dimension, clave in claves}
+
+    def test_crear_y_editar(self):
+        self.assertEqual(self.todas(), {(1, 2, Decimal('20.00'))})
+        resumen = ResumenCliente.objects.get(cliente=self.cliente)
+        self.assertEqual((resumen.num_ventas, resumen.unidades, resumen.gastado), (1, 2, Decimal('20.00')))
+
+        venta = Venta.objects.get(pk=self.venta.pk)
+        venta.cantidad = 5
+        venta.save()
+        self.assertEqual(self.todas(), {(1, 5, Decimal('50.00'))})
+        self.assertEqual(ResumenCliente.objects.get(cliente=self.cliente).gastado, Decimal('50.00'))
+
+    def test_mover_a_otro_dia(self):
+        hoy = timezone.localdate()
+        self.venta.fecha_venta = inicio_del_dia(hoy) + timedelta(hours=1)
+        self.venta.save()
+        self.assertEqual(self.todas(), {(0, 0, Decimal('0.00'))})
+        self.assertEqual(self.todas(hoy), {(1, 2, Decimal('20.00'))})
+        # Mover no cambia el acumulado del cliente
+        self.assertEqual(ResumenCliente.objects.get(cliente=self.cliente).num_ventas, 1)
+
+    def test_eliminar(self):
+        self.venta.delete()
+        self.assertEqual(self.todas(), {(0, 0, Decimal('0.00'))})
+        self.assertEqual(ResumenCliente.objects.get(cliente=self.cliente).num_ventas, 0)
+
+    def test_eliminar_en_cascada(self):
+        otro = Cliente.objects.create(nombre='Luis', apellido='Mora', email='luis@correo.com',
+                                      telefono='2', direccion='-')
+        Venta.objects.create(cliente=otro, producto=self.producto, cantidad=1, precio_unitario=Decimal('10.00'),
+                             fecha_venta=self.venta.fecha_venta)
+        cliente_id = self.cliente.pk
+        self.cliente.delete()  # Cascada: se va la venta de Ana y su resumen de cliente
+        self.assertEqual(self.fila('total', 0), (1, 1, Decimal('10.00')))
+        self.assertEqual(self.fila('cliente', cliente_id), (0, 0, Decimal('0.00')))
+        self.assertFalse(ResumenCliente.objects.filter(cliente_id=cliente_id).exists())
+
+        self.producto.delete()  # Cascada: se va la venta de Luis
+        self.assertEqual(self.fila('total', 0), (0, 0, Decimal('0.00')))
+        self.assertEqual(ResumenCliente.objects.get(cliente=otro).num_ventas, 0)
+
+
+    def test_reconstruir_agrupa_igual_que_el_incremental(self):
+        # Ventas junto a la medianoche local (en UTC caen en otro día), leídas en varios lotes
+        medianoche = inicio_del_dia(timezone.localdate())
+        for minutos in (-30, -1, 0, 30):
+            Venta.objects.create(cliente=self.cliente, producto=self.producto, cantidad=1,
+                                 precio_unitario=Decimal('10.00'), fecha_venta=medianoche + timedelta(minutes=minutos))
+        columnas = ('fecha', 'dimension', 'clave', 'num_ventas', 'unidades', 'ingresos')
+        incremental = set(ResumenVentaDiario.objects.values_list(*columnas))
+
+        call_command('reconstruir_resumenes', lote=2, dias_por_bloque=1, stdout=io.StringIO())
+        self.assertEqual(set(ResumenVentaDiario.objects.values_list(*columnas)), incremental)
+        self.assertEqual(self.fila('total', 0), (3, 4, Decimal('40.00')))
+
+class InventarioTest(TestCase):
+    """El stock nunca queda negativo y no se aceptan cantidades menores a 1"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        self.cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                              telefono='1', direccion='-')
+        self.producto = Producto.objects.create(nombre='Agua', descripcion='-', precio=Decimal('10.00'), stock=5,
+                                                categoria=Categoria.objects.create(nombre='Bebidas'))
+
+    def stock(self):
+        return Producto.objects.get(pk=self.producto.pk).stock
+
+    def test_sin_sobreventa(self):
+        with self.assertRaises(StockInsuficiente) as error:
+            descontar_stock(self.producto.pk, 6)
+        self.assertEqual(error.exception.disponible, 5)
+        with self.assertRaises(StockInsuficiente):
+            registrar_venta(Venta(cliente=self.cliente, producto=self.producto, cantidad=6,
+                                  precio_unitario=self.producto.precio))
+        self.assertEqual(self.stock(), 5)
+        self.assertFalse(Venta.objects.exists())
+
+        descontar_stock(self.producto.pk, 5)
+        self.assertEqual(self.stock(), 0)
+
+    def test_cantidad_invalida(self):
+        for cantidad in (0, -10):
+            with self.assertRaises(ValueError):
+                descontar_stock(self.producto.pk, cantidad)
+        self.assertEqual(self.stock(), 5)
+
+    def test_vista_rechaza_cantidades_invalidas(self):
+        self.client.force_login(self.usuario)
+        datos = {'cliente': self.cliente.pk, 'producto': self.producto.pk}
+        for cantidad in (-10, 0, 6):
+            respuesta = self.client.post(reverse('venta_crear'), {**datos, 'cantidad': cantidad})
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertIn('cantidad', respuesta.context['form'].errors)
+        self.assertEqual(self.stock(), 5)
+        self.assertFalse(Venta.objects.exists())
+
+        respuesta = self.client.post(reverse('venta_crear'), {**datos, 'cantidad': 3})
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(self.stock(), 2)
+        self.assertEqual(Venta.objects.get().total, Decimal('30.00'))
+
+
+class TicketTest(TestCase):
+    """Un ticket se guarda completo (stock, líneas y resúmenes) o no se guarda nada"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        self.cliente = Cliente.objects.create(nombre='Ana', apellido='López', email='ana@correo.com',
+                                              telefono='1', direccion='-')
+        categoria = Categoria.objects.create(nombre='Bebidas')
+        self.productos = [
+            Producto.objects.create(nombre=f'P{i}', descripcion='-', precio=Decimal('10.00'), stock=10,
+                                    categoria=categoria)
+            for i in range(30)
+        ]
+
+    def test_todas_las_lineas(self):
+        ticket = crear_ticket(self.cliente, self.usuario, [(p.pk, 2) for p in self.productos[:3]] + [
+            (self.productos[0].pk, 1),  # Producto repetido: se suma a su línea
+        ])
+        self.assertEqual(list(Producto.objects.filter(pk__in=[p.pk for p in self.productos[:3]])
+                              .order_by('pk').values_list('stock', flat=True)), [7, 8, 8])
+        lineas = Venta.objects.filter(ticket=ticket)
+        self.assertEqual(lineas.count(), 3)
+        self.assertEqual(ticket.total, Decimal('70.00'))
+
+        hoy = timezone.localdate()
+        total = ResumenVentaDiario.objects.get(dimension='total', fecha=hoy, clave=0)
+        self.assertEqual((total.num_ventas, total.unidades, total.ingresos), (3, 7, Decimal('70.00')))
+        self.assertEqual(ResumenVentaDiario.objects.get(dimension='producto', fecha=hoy,
+                                                        clave=self.productos[0].pk).unidades, 3)
+        self.assertEqual(ResumenCliente.objects.get(cliente=self.cliente).num_ventas, 3)
+
+    def test_sin_stock_no_guarda_nada(self):
+        with self.assertRaises(ValidationError):
+            crear_ticket(self.cliente, self.usuario, [(self.productos[0].pk, 2), (self.productos[1].pk, 11)])
+        self.assertEqual(set(Producto.objects.values_list('stock', flat=True)), {10})
+        self.assertFalse(Ticket.objects.exists())
+        self.assertFalse(Venta.objects.exists())
+        self.assertFalse(ResumenVentaDiario.objects.exists())
+
+    def test_consultas_no_crecen_con_las_lineas(self):
+        crear_ticket(self.cliente, self.usuario, [(self.productos[0].pk, 1)])  # Crea las filas del día
+        with CaptureQueriesContext(connection) as pocas:
+            crear_ticket(self.cliente, self.usuario, [(p.pk, 1) for p in self.productos[:3]])
+        with CaptureQueriesContext(connection) as muchas:
+            crear_ticket(self.cliente, self.usuario, [(p.pk, 1) for p in self.productos])
+        self.assertEqual(len(pocas), len(muchas))
+        self.assertLessEqual(len(muchas), 16)  # Incluye los SAVEPOINT de las transacciones anidadas
+
+
+class ExportacionVentasTest(TestCase):
+    """Exportación CSV (en streaming, por lotes) y XLSX del periodo"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin_prueba', password='clave-segura-123')
+        self.client.force_login(self.usuario)
+        cliente = Cliente.objects.create(nombre='José', apellido='Núñez', email='jose@correo.com',
+                                         telefono='1', direccion='-')
+        producto = Producto.objects.create(nombre='Café, molido', descripcion='-', precio=Decimal('10.00'), stock=100,
+                                           categoria=Categoria.objects.create(nombre='Bebidas'))
+        self.hoy = timezone.localdate()
+        for horas in (1, 2, 3, 4, 5, -20):  # La última queda fuera del periodo (antier)
+            Venta.objects.create(cliente=cliente, producto=producto, vendedor=self.usuario, cantidad=1,
+                                 precio_unitario=Decimal('10.00'),
+                                 fecha_venta=inicio_del_dia(self.hoy - timedelta(days=1)) + timedelta(hours=horas))
+        self.rango = {'inicio': self.hoy - timedelta(days=1), 'fin': self.hoy}
+
+    def test_lotes_y_filtro(self):
+        inicio, fin = inicio_del_dia(self.rango['inicio']), inicio_del_dia(self.hoy + timedelta(days=1))
+        # Una venta anterior con id mayor y un empate de fecha que cruza lotes: el cursor es (fecha, id)
+        primera = Venta.objects.order_by('fecha_venta').filter(fecha_venta__gte=inicio).first()
+        for _ in range(2):
+            Venta.objects.create(cliente=primera.cliente, producto=primera.producto, cantidad=1,
+                                 precio_unitario=Decimal('10.00'), fecha_venta=primera.fecha_venta)
+        with CaptureQueriesContext(connection) as consultas:
+            filas = list(filas_ventas(inicio, fin, tamano=2))
+        self.assertEqual(len(consultas), 5)  # 4 lotes de 2 y uno vacío al final
+        esperado = Venta.objects.filter(fecha_venta__gte=inicio).order_by('fecha_venta', 'id')
+        self.assertEqual([fila[0] for fila in filas], list(esperado.values_list('id', flat=True)))
+        self.assertEqual(len(filas), 7)
+
+    def test_csv(self):
+        respuesta = self.client.get(reverse('reporte_ventas_exportar'), self.rango)
+        self.assertTrue(respuesta.streaming)
+        self.assertIn(f'ventas_{self.rango["inicio"]}_{self.hoy}.csv', respuesta['Content-Disposition'])
+        texto = b''.join(respuesta.streaming_content).decode('utf-8')
+        self.assertTrue(texto.startswith('\ufeff'))  # BOM para Excel
+        lineas = texto.lstrip('\ufeff').splitlines()
+        self.assertEqual(lineas[0], 'ID,Ticket,Fecha,Cliente,Apellido,Producto,Cantidad,Precio unitario,Total,Vendedor')
+        self.assertEqual(len(lineas), 6)
+        self.assertIn(',José,Núñez,"Café, molido",1,10.00,10.00,admin_prueba', lineas[1])
+
+    @unittest.skipUnless(importlib.util.find_spec('openpyxl'), 'openpyxl no está instalado (dependencia opcional)')
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        respuesta = self.client.get(reverse('reporte_ventas_exportar'), {**self.rango, 'formato': 'xlsx'})
+        self.assertEqual(respuesta.status_code, 200)
+        hoja = load_workbook(io.BytesIO(b''.join(respuesta.streaming_content)), read_only=True)['Ventas']
+        filas = list(hoja.values)
+        self.assertEqual(filas[0][:3], ('ID', 'Ticket', 'Fecha'))
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(filas[1][5], 'Café, molido')
+
+    def test_xlsx_sin_openpyxl(self):
+        with mock.patch.dict(sys.modules, {'openpyxl': None}):  # import openpyxl -> ImportError
+            respuesta = self.client.get(reverse('reporte_ventas_exportar'), {**self.rango, 'formato': 'xlsx'})
+        self.assertRedirects(respuesta, f"{reverse('reporte_ventas')}?inicio={self.rango['inicio']}&fin={self.hoy}",
+                             fetch_redirect_response=False)
+
+
+class ContadoresCacheTest(TestCase):
+    """Los contadores del dashboard en caché se ajustan solo cuando la transacción se confirma"""
+
+    def setUp(self):
+        cache.clear()
+        obtener_contadores()  # Deja los contadores en caché (todos en 0)
+
+    def test_incrementa_y_decrementa(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            categoria = Categoria.objects.create(nombre='Bebidas')
+            Categoria.objects.create(nombre='Snacks')
+        with self.assertNumQueries(0):
+            self.assertEqual(obtener_contadores()['categorias'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            categoria.delete()
+        self.assertEqual(obtener_contadores()['categorias'], 1)
+
+    def test_rollback_no_cambia_la_cache(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Categoria.objects.create(nombre='Bebidas')
+                    raise RuntimeError('se revierte')
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(obtener_contadores()['categorias'], 0)
+        self.assertFalse(Categoria.objects.exists())
@@ -0,0 +1,73 @@
+# tienda/tickets.py
+# Registro de tickets (ventas de varias líneas) con inserción masiva
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .inventario import bloquear_productos, descontar_stock_lote
+from .models import Ticket, Venta
+from .resumenes import aplicar_ventas, huella_venta
+
+
+def crear_ticket(cliente, vendedor, lineas):
+    """
+    Registra un ticket con todas sus líneas en una sola transacción.
+
+    lineas: lista de (producto_id, cantidad). Si un producto aparece varias veces
+    sus cantidades se suman en una sola línea.
+
+    Todas las líneas se validan en una sola pasada y los precios salen de la misma
+    consulta que bloquea los productos (in_bulk); las líneas se guardan con un solo
+    bulk_create y los resúmenes diarios se actualizan en lote.
+    Lanza ValidationError con la lista de todos los errores encontrados.
+    """
+    cantidades = OrderedDict()
+    errores = []
+    for producto_id, cantidad in lineas:
+        if not cantidad or cantidad < 1:
+            errores.append(f'La cantidad del producto #{producto_id} debe ser mayor a cero')
+            continue
+        cantidades[producto_id] = cantidades.get(producto_id, 0) + cantidad
+    if not cantidades and not errores:
+        errores.append('El ticket no tiene productos')
+    if errores:
+        raise ValidationError(errores)
+
+    with transaction.atomic():
+        # Una sola consulta bloquea los productos y trae sus precios y existencias
+        productos = bloquear_productos(cantidades)
+        for producto_id, cantidad in cantidades.items():
+            producto = productos.get(producto_id)
+            if producto is None:
+                errores.append(f'El producto #{producto_id} no existe')
+            elif not producto.activo:
+                errores.append(f'El producto "{producto.nombre}" no está activo')
+            elif producto.stock < cantidad:
+                errores.append(
+                    f'Stock insuficiente de "{producto.nombre}": se solicitaron {cantidad} y hay {producto.stock}'
+                )
+        if errores:
+            raise ValidationError(errores)
+
+        descontar_stock_lote(productos, cantidades)
+
+        ticket = Ticket.objects.create(cliente=cliente, vendedor=vendedor, fecha=timezone.now())
+        ventas = []
+        for producto_id, cantidad in cantidades.items():
+            precio = productos[producto_id].precio
+            ventas.append(Venta(
+                ticket=ticket, cliente=cliente, vendedor=vendedor, producto_id=producto_id,
+                cantidad=cantidad, precio_unitario=precio, total=cantidad * precio,
+                fecha_venta=ticket.fecha,
+            ))
+
+        # bulk_create no llama a Venta.save: el total ya va calculado y los resúmenes se aplican aquí
+        Venta.objects.bulk_create(ventas)
+        aplicar_ventas([huella_venta(venta) for venta in ventas])
+
+        ticket.total = sum(venta.total for venta in ventas)
+        ticket.save(update_fields=['total'])
+
+    return ticket
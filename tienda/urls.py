@@ -13,10 +13,15 @@ urlpatterns = [ # Lista de patrones de URL.
             
     # Dashboard
     path('dashboard/', views.home, name='dashboard'), # URL para el panel de control.
+    path('dashboard/estadisticas/', views.contadores_estadisticas, name='contadores_estadisticas'), # Aciertos/fallos de la caché de contadores.
+    path('dashboard/rendimiento/', views.instrumentacion, name='instrumentacion'), # Tiempos y consultas por ruta (middleware de instrumentación).
     
     # CRUD ProductosÑ
     path('productos/', views.producto_lista, name='producto_lista'), # URL para listar productos.
     path('productos/crear/', views.producto_crear, name='producto_crear'), # URL para crear un producto.
+    path('productos/importar/', views.producto_importar, name='producto_importar'), # Carga masiva desde CSV.
+    path('productos/ajuste-masivo/', views.producto_ajuste_masivo, name='producto_ajuste_masivo'), # Ajuste de precio/stock por lote.
+    path('productos/proveedores/autocompletar/', views.proveedor_autocompletar, name='proveedor_autocompletar'), # JSON para el selector de proveedores.
     path('productos/editar/<int:pk>/', views.producto_editar, name='producto_editar'), # URL para editar un producto específico (usando su PK).
     path('productos/eliminar/<int:pk>/', views.producto_eliminar, name='producto_eliminar'), # URL para eliminar (desactivar) un producto específico.
 
@@ -41,7 +46,13 @@ urlpatterns = [ # Lista de patrones de URL.
     path('clientes/eliminar/<int:pk>', views.cliente_eliminar, name='cliente_eliminar'),  # Eliminar cliente
 
     path('ventas/crear/', views.venta_crear, name='venta_crear'),  # Registrar venta
+    path('ventas/clientes/autocompletar/', views.cliente_autocompletar, name='cliente_autocompletar'),  # JSON para el combobox de clientes
+    path('ventas/productos/autocompletar/', views.producto_autocompletar, name='producto_autocompletar'),  # JSON para el combobox de productos
+    path('ventas/ticket/', views.venta_ticket, name='venta_ticket'),  # Registrar ticket con varios productos
     path('ventas/reporte/', views.reporte_ventas, name='reporte_ventas'),  # Reporte de ventas
+    path('ventas/reporte/grafica/', views.reporte_ventas_grafica, name='reporte_ventas_grafica'),  # Serie JSON de la gráfica
+    path('ventas/reporte/serie/', views.reporte_ventas_serie, name='reporte_ventas_serie'),  # Serie JSON por hora/día/semana/mes
+    path('ventas/reporte/exportar/', views.reporte_ventas_exportar, name='reporte_ventas_exportar'),  # Descarga CSV/XLSX
     # path('ventas/estadisticas/', views.ventas_estadisticas, name='ventas_estadisticas'),
 
 # Nota:  captura un número entero de la URL y lo pasa como parámetro 'pk' a la vista
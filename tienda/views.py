@@ -11,13 +11,33 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from .models import Producto, Categoria, PerfilUsuario, Proveedor, Cliente, Venta # Importa los modelos necesarios.
 from .forms import ProductoForm, CategoriaForm, ProveedorForm, UserForm,  ClienteForm, VentaForm # Importa el formulario de Producto.
+from .catalogo import pagina_catalogo, ORDENAMIENTOS
+from .busqueda import buscar_productos
+from .compras import pagina_compras, resumen_cliente
+from .autocompletar import autocompletar_clientes, autocompletar_productos, autocompletar_proveedores
+from .resumenes import inicio_del_dia, resumen_periodo, top_dimension
+from .inventario import registrar_venta, StockInsuficiente
+from .tickets import crear_ticket
+from .roles import obtener_permisos
+from .exportacion import respuesta_csv, respuesta_xlsx
+from .reportes import (
+    DIMENSIONES_POR_DEFECTO, DIMENSIONES_REPORTE, ORDENES_REPORTE, pagina_ventas, periodo_abierto,
+    reporte_dimensiones, serie_top_productos, serie_ventas,
+)
+from .contadores import obtener_contadores, ventas_de_hoy, estadisticas as estadisticas_contadores
+from .middleware import agregado as agregado_instrumentacion
+from django.http import JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control
+from .forms import TicketForm, LineaTicketFormSet, ImportarProductosForm, AjusteMasivoForm, FiltroAjusteForm
+from .operaciones import ajustar_productos, filtrar_productos
+from .importacion import ErrorImportacion, importar_productos
+import io
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models import Sum, Count, F, Value
-from django.db.models.functions import Concat
 from datetime import timedelta, datetime
 from django.urls import reverse
-import pandas as pd
-import plotly.express as px
 
 # ============ DECORADOR PERSONALIZADO PARA PERMISOS POR ROL ============
 def rol_requerido(*roles_permitidos):
@@ -45,20 +65,21 @@ def rol_requerido(*roles_permitidos):
                 return view_func(request, *args, **kwargs)
             
             # 3. Verificar si el usuario tiene perfil con rol asignado
-            try:
-                perfil = request.user.perfil  # Obtener perfil del usuario
-                # 4. Verificar si su rol está en los roles permitidos
-                if perfil.rol in roles_permitidos:
-                    return view_func(request, *args, **kwargs)  # Permitir acceso
-                else:
-                    # Mostrar mensaje de error indicando roles necesarios
-                    roles_texto = ', '.join([r.capitalize() for r in roles_permitidos])
-                    messages.error(request, f'⚠️ Acceso denegado. Se requiere rol: {roles_texto}')
-                    return redirect('home')  # Redirigir al home
-            except PerfilUsuario.DoesNotExist:
+            #    (el rol se resuelve una vez por petición y se guarda en caché)
+            permisos = obtener_permisos(request)
+            if not permisos:
                 # Si el usuario no tiene perfil asignado
                 messages.error(request, '⚠️ Tu cuenta no tiene un perfil asignado. Contacta al administrador.')
                 return redirect('home')
+
+            # 4. Verificar si su rol está en los roles permitidos
+            if permisos.rol in roles_permitidos:
+                return view_func(request, *args, **kwargs)  # Permitir acceso
+            else:
+                # Mostrar mensaje de error indicando roles necesarios
+                roles_texto = ', '.join([r.capitalize() for r in roles_permitidos])
+                messages.error(request, f'⚠️ Acceso denegado. Se requiere rol: {roles_texto}')
+                return redirect('home')  # Redirigir al home
         
         return _wrapped_view
     return decorator
@@ -103,28 +124,16 @@ def logout_view(request):
 def home(request):
     """Dashboard principal con totales generales y total de ventas del día."""
 
-    total_productos = Producto.objects.count()
-    total_categorias = Categoria.objects.count()
-    total_proveedores = Proveedor.objects.count()
-    total_clientes = Cliente.objects.count()
+    # Contadores y total de hoy desde la caché (se actualizan con señales)
+    contadores = obtener_contadores()
+    total_productos = contadores['productos']
+    total_categorias = contadores['categorias']
+    total_proveedores = contadores['proveedores']
+    total_clientes = contadores['clientes']
 
     productos_recientes = Producto.objects.all()[:5]
 
-    # ✅ Obtener fecha actual en zona horaria local (ya ajustada)
-    hoy_local = timezone.localtime(timezone.now()).date()
-
-    # ✅ Determinar inicio y fin del día actual (zona local)
-    inicio_dia = timezone.make_aware(
-        timezone.datetime.combine(hoy_local, timezone.datetime.min.time())
-    )
-    fin_dia = inicio_dia + timedelta(days=1)
-
-    # ✅ Calcular total vendido hoy (usando rango local correcto)
-    total_ventas = (
-        Venta.objects
-        .filter(fecha_venta__gte=inicio_dia, fecha_venta__lt=fin_dia)
-        .aggregate(total=Sum('total'))['total'] or 0
-    )
+    total_ventas = ventas_de_hoy()
 
     context = {
         'total_productos': total_productos,
@@ -138,12 +147,135 @@ def home(request):
     return render(request, 'tienda/dashboard.html', context)
 
 
+@rol_requerido('administrador', 'admin')
+@login_required
+def contadores_estadisticas(request):
+    """Aciertos/fallos de la caché de contadores del dashboard (solo administradores)"""
+    return JsonResponse(estadisticas_contadores())
+
+
+@rol_requerido('administrador', 'admin')
+@login_required
+def instrumentacion(request):
+    """Tiempos y consultas acumulados por ruta en este proceso (solo administradores)"""
+    if request.method == 'POST' and 'reiniciar' in request.POST:
+        agregado_instrumentacion.reiniciar()
+        messages.success(request, 'Estadísticas de rendimiento reiniciadas')
+        return redirect('instrumentacion')
+
+    rutas = agregado_instrumentacion.resumen()
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({'rutas': rutas})
+    return render(request, 'tienda/instrumentacion.html', {'rutas': rutas})
+
+
 # ============ VISTAS CRUD PARA PRODUCTOS ============
 @login_required
 def producto_lista(request):
-    """Vista que lista todos los productos"""
-    productos = Producto.objects.all()  # Obtenemos todos los productos de la base de datos
-    return render(request, 'tienda/producto_lista.html', {'productos': productos})  # Renderizamos template con la lista
+    """Vista que lista los productos paginados por cursor (o los resultados de la búsqueda ?q=)"""
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        # Con búsqueda los resultados se ordenan por relevancia
+        pagina = buscar_productos(
+            busqueda,
+            cursor=request.GET.get('cursor'),
+            categoria=request.GET.get('categoria'),
+        )
+    else:
+        pagina = pagina_catalogo(
+            orden=request.GET.get('orden'),
+            cursor=request.GET.get('cursor'),
+            categoria=request.GET.get('categoria'),
+        )
+
+    # Parámetros para el enlace de "Siguiente" conservando orden y categoría
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+    primera_pagina = parametros.urlencode()
+    if pagina['siguiente']:
+        parametros['cursor'] = pagina['siguiente']
+
+    return render(request, 'tienda/producto_lista.html', {
+        'productos': pagina['productos'],
+        'orden': pagina['orden'],
+        'ordenamientos': ORDENAMIENTOS,
+        'categoria_id': request.GET.get('categoria', ''),
+        'busqueda': busqueda,
+        'es_primera_pagina': not request.GET.get('cursor'),
+        'primera_pagina': primera_pagina,
+        'siguiente_pagina': parametros.urlencode() if pagina['siguiente'] else None,
+    })
+
+@rol_requerido('administrador', 'gerente', 'admin')
+@login_required
+def producto_importar(request):
+    """Carga masiva de productos desde un CSV (crea o actualiza por nombre)"""
+    resultado = None
+    if request.method == 'POST':
+        form = ImportarProductosForm(request.POST, request.FILES)
+        if form.is_valid():
+            # El archivo subido se lee como texto por partes, sin cargarlo completo en memoria
+            archivo = io.TextIOWrapper(form.cleaned_data['archivo'].file, encoding='utf-8-sig', newline='')
+            try:
+                resultado = importar_productos(
+                    archivo,
+                    delimitador=form.cleaned_data['delimitador'],
+                    crear_faltantes=form.cleaned_data['crear_faltantes'],
+                    simular=form.cleaned_data['simular'],
+                )
+            except (ErrorImportacion, UnicodeDecodeError) as error:
+                form.add_error('archivo', f'No se pudo leer el archivo: {error}')
+            else:
+                if form.cleaned_data['simular']:
+                    messages.info(request, 'Simulación: no se guardó ningún cambio')
+                else:
+                    messages.success(request, f'{resultado.importados} productos importados')
+    else:
+        form = ImportarProductosForm()
+
+    return render(request, 'tienda/producto_importar.html', {
+        'form': form,
+        'resultado': resultado,
+        'errores': resultado.errores[:200] if resultado else [],  # Solo los primeros para no generar una página enorme
+    })
+
+@rol_requerido('administrador', 'gerente', 'admin')
+@login_required
+def producto_ajuste_masivo(request):
+    """
+    Ajuste de precio o stock para todos los productos que cumplan los filtros.
+    "Vista previa" solo cuenta y muestra algunos productos; "Aplicar" ejecuta un solo UPDATE.
+    Con formato=json responde {afectados, vista_previa} (para scripts o llamadas AJAX).
+    """
+    filtros = FiltroAjusteForm(request.POST or None)
+    ajuste = AjusteMasivoForm(request.POST or None)
+    resultado = None
+    simular = request.POST.get('accion') != 'aplicar'
+    como_json = request.POST.get('formato') == 'json'
+
+    if request.method == 'POST':
+        if filtros.is_valid() and ajuste.is_valid():
+            productos = filtrar_productos(**filtros.cleaned_data)
+            resultado = ajustar_productos(productos, simular=simular, **ajuste.cleaned_data)
+            if como_json:
+                return JsonResponse({
+                    'simulacion': simular,
+                    'afectados': resultado['afectados'],
+                    'vista_previa': [dict(fila, actual=str(fila['actual']), nuevo=str(fila['nuevo']))
+                                     for fila in resultado['vista_previa']],
+                })
+            if not simular:
+                messages.success(request, f'{resultado["afectados"]} productos actualizados')
+                return redirect('producto_ajuste_masivo')
+        elif como_json:
+            return JsonResponse({'errores': {**filtros.errors.get_json_data(), **ajuste.errors.get_json_data()}},
+                                status=400)
+
+    return render(request, 'tienda/producto_ajuste_masivo.html', {
+        'filtros': filtros,
+        'ajuste': ajuste,
+        'resultado': resultado,
+    })
 
 @rol_requerido('administrador', 'gerente', 'admin')
 @login_required
@@ -179,6 +311,14 @@ def producto_editar(request, pk):
     return render(request, 'tienda/producto_form.html', {'form': form, 'accion': 'Editar'})
 
 
+@rol_requerido('administrador', 'gerente', 'admin')
+@login_required
+@cache_control(private=True, max_age=30)
+def proveedor_autocompletar(request):
+    """Proveedores cuyo nombre, empresa o correo empiezan con ?term=, paginados (JSON para Select2)"""
+    return JsonResponse(autocompletar_proveedores(request.GET.get('term'), request.GET.get('page')))
+
+
 @login_required
 @rol_requerido('administrador','admin')  # Solo Administrador puede eliminar
 def producto_eliminar(request, pk):
@@ -197,8 +337,8 @@ def producto_eliminar(request, pk):
 @rol_requerido('gerente', 'administrador', 'vendedor', 'cliente','admin')  # Vendedor NO puede ver categorías
 def categoria_lista(request):
     """Vista que lista todas las categorías"""
-    # categorias = Categoria.objects.all()
-    categorias = Categoria.objects.annotate(total_productos=Count('productos'))
+    # Los conteos ya están guardados en cada categoría (tienda.categorias): sin JOIN ni GROUP BY
+    categorias = Categoria.objects.all()
     return render(request, 'tienda/categoria_lista.html', {'categorias': categorias})
 
 
@@ -241,8 +381,8 @@ def categoria_eliminar(request, pk):
     """Vista para eliminar una categoría"""
     categoria = get_object_or_404(Categoria, pk=pk)
 
-    # 🔹 Contar los productos asociados a la categoría
-    productos_asociados = categoria.productos.count()
+    # 🔹 Productos asociados a la categoría (conteo guardado, sin COUNT)
+    productos_asociados = categoria.total_productos
 
     if request.method == 'POST':
         categoria.delete()
@@ -387,16 +527,17 @@ def cliente_eliminar(request, pk):
 @login_required
 @rol_requerido('cliente')
 def mis_compras(request):
-    """Muestra solo las ventas del cliente logueado"""
-    
-    try:
-        cliente = Cliente.objects.get(usuario=request.user)
-        ventas = Venta.objects.filter(cliente=cliente).order_by('-id')  # Últimas primero
-    except Cliente.DoesNotExist:
-        ventas = []  # Si no tiene cliente asociado
+    """Muestra las compras del cliente logueado, por páginas (?antes=<id>), con su resumen histórico"""
+    cliente = Cliente.objects.select_related('resumen').filter(usuario=request.user).first()
+    if cliente is None:  # Si no tiene cliente asociado
+        return render(request, 'tienda/mis_compras.html', {'ventas': []})
 
+    pagina = pagina_compras(cliente, antes=request.GET.get('antes'))
     return render(request, 'tienda/mis_compras.html', {
-        'ventas': ventas
+        'ventas': pagina['ventas'],
+        'siguiente': pagina['siguiente'],
+        'es_primera_pagina': not request.GET.get('antes'),
+        'resumen': resumen_cliente(cliente),
     })
 
 # ============ VISTAS PARA VENTAS ============
@@ -406,23 +547,26 @@ def venta_crear(request):
     """Vista para registrar una nueva venta"""
     if request.method == 'POST':
         form = VentaForm(request.POST)
+        # Recuperar los parámetros del periodo si existen
+        fecha_inicio = request.POST.get('fecha_inicio', '')
+        fecha_fin = request.POST.get('fecha_fin', '')
         if form.is_valid():
             venta = form.save(commit=False)
             venta.vendedor = request.user
             venta.precio_unitario = venta.producto.precio
-            venta.save()
-            messages.success(request, f'Venta registrada exitosamente - Total: ${venta.total}')
-
-            # Recuperar los parámetros del periodo si existen
-            fecha_inicio = request.POST.get('fecha_inicio')
-            fecha_fin = request.POST.get('fecha_fin')
-
-            # Redirigir manteniendo el rango de fechas usando reverse
-            if fecha_inicio and fecha_fin:
-                return redirect(f"{reverse('reporte_ventas')}?inicio={fecha_inicio}&fin={fecha_fin}")
+            try:
+                registrar_venta(venta)  # Descuenta stock y guarda en una sola transacción
+            except StockInsuficiente as error:
+                form.add_error('cantidad', str(error))
             else:
-                hoy = timezone.now().date()
-                return redirect(f"{reverse('reporte_ventas')}?inicio={hoy}&fin={hoy}")
+                messages.success(request, f'Venta registrada exitosamente - Total: ${venta.total}')
+
+                # Redirigir manteniendo el rango de fechas usando reverse
+                if fecha_inicio and fecha_fin:
+                    return redirect(f"{reverse('reporte_ventas')}?inicio={fecha_inicio}&fin={fecha_fin}")
+                else:
+                    hoy = timezone.now().date()
+                    return redirect(f"{reverse('reporte_ventas')}?inicio={hoy}&fin={hoy}")
 
     else:
         form = VentaForm()
@@ -437,114 +581,212 @@ def venta_crear(request):
     })
 
 
+@rol_requerido('administrador', 'gerente', 'admin')
+@login_required
+@cache_control(private=True, max_age=30)
+def cliente_autocompletar(request):
+    """Clientes cuyo nombre, apellido o correo empiezan con ?term= (JSON para Select2)"""
+    return JsonResponse(autocompletar_clientes(request.GET.get('term'), request.GET.get('page')))
 
-@rol_requerido('administrador', 'gerente', 'vendedor', 'admin')
+
+@rol_requerido('administrador', 'gerente', 'admin')
 @login_required
-def reporte_ventas(request):
-    """Muestra el reporte de ventas con filtrado por fechas y estadísticas."""
+@cache_control(private=True, max_age=30)
+def producto_autocompletar(request):
+    """Productos activos que coinciden con ?term=, por relevancia (JSON para Select2)"""
+    return JsonResponse(autocompletar_productos(request.GET.get('term'), request.GET.get('page')))
+
 
-    # === Filtro de fechas ===
-    inicio_str = request.GET.get('inicio')
-    fin_str = request.GET.get('fin')
 
+def _rango_fechas(request, estricto=False):
+    """
+    Lee los parámetros ?inicio=AAAA-MM-DD&fin=AAAA-MM-DD y regresa (inicio, fin, es_periodo)
+    como rango [inicio, fin) de medianoche local a medianoche local. Si faltan o son
+    inválidos se usa el día de hoy; con `estricto` las fechas inválidas (o inicio después
+    de fin) lanzan ValueError, para que las vistas JSON respondan 400.
+    """
     hoy = timezone.localdate()
-    es_periodo = False
+    inicio_date = fin_date = hoy
 
+    inicio_str = request.GET.get('inicio')
+    fin_str = request.GET.get('fin')
     if inicio_str and fin_str:
         try:
             inicio_date = datetime.strptime(inicio_str, '%Y-%m-%d').date()
             fin_date = datetime.strptime(fin_str, '%Y-%m-%d').date()
+        except ValueError:
+            if estricto:
+                raise ValueError('Fechas inválidas: use inicio=AAAA-MM-DD y fin=AAAA-MM-DD')
+            inicio_date = fin_date = hoy
+        if estricto and inicio_date > fin_date:
+            raise ValueError('La fecha de inicio es posterior a la fecha de fin')
 
-            # Se incluye TODO el último día
-            inicio = timezone.make_aware(datetime.combine(inicio_date, datetime.min.time()))
-            fin = timezone.make_aware(datetime.combine(fin_date, datetime.max.time()))
+    # Se incluye TODO el último día
+    inicio = inicio_del_dia(inicio_date)
+    fin = inicio_del_dia(fin_date + timedelta(days=1))
+    return inicio, fin, inicio_date != fin_date
 
-            es_periodo = inicio_date != fin_date
 
-        except ValueError:
-            inicio = timezone.make_aware(datetime.combine(hoy, datetime.min.time()))
-            fin = timezone.make_aware(datetime.combine(hoy, datetime.max.time()))
+def _productos_elegidos(datos):
+    """
+    Opciones (id, etiqueta) de los productos elegidos en las líneas del ticket, para volver a
+    mostrarlos si el formulario tiene errores. Una sola consulta para todas las líneas.
+    """
+    elegidos = {valor for clave, valor in datos.items() if clave.endswith('-producto') and valor.isdigit()}
+    return [
+        (pk, f'{nombre} - ${precio}')
+        for pk, nombre, precio in Producto.objects.filter(id__in=elegidos).values_list('id', 'nombre', 'precio')
+    ]
+
+
+@rol_requerido('administrador', 'gerente','admin')
+@login_required
+def venta_ticket(request):
+    """Vista para registrar un ticket con varios productos en una sola operación"""
+    if request.method == 'POST':
+        # Los productos se buscan con AJAX; solo hacen falta las etiquetas de los ya elegidos
+        productos = _productos_elegidos(request.POST)
+        form = TicketForm(request.POST)
+        formset = LineaTicketFormSet(request.POST, form_kwargs={'productos': productos})
+        if form.is_valid() and formset.is_valid():
+            lineas = [
+                (linea['producto'], linea['cantidad'])
+                for linea in formset.cleaned_data if linea  # Se ignoran las líneas vacías
+            ]
+            try:
+                ticket = crear_ticket(form.cleaned_data['cliente'], request.user, lineas)
+            except ValidationError as error:
+                for mensaje in error.messages:
+                    form.add_error(None, mensaje)
+            else:
+                messages.success(request, f'Ticket #{ticket.pk} registrado - Total: ${ticket.total}')
+                hoy = timezone.localdate()
+                return redirect(f"{reverse('reporte_ventas')}?inicio={hoy}&fin={hoy}")
     else:
-        inicio = timezone.make_aware(datetime.combine(hoy, datetime.min.time()))
-        fin = timezone.make_aware(datetime.combine(hoy, datetime.max.time()))
-
-    ventas = (
-        Venta.objects
-        .select_related('cliente', 'vendedor', 'producto')
-        .filter(fecha_venta__gte=inicio, fecha_venta__lte=fin)
-        .order_by('-fecha_venta'))
-
-    # === Estadísticas ===
-    total_ventas = ventas.aggregate(total=Sum('total'))['total'] or 0
-    cantidad_ventas = ventas.count()
+        form = TicketForm()
+        formset = LineaTicketFormSet()
+
+    return render(request, 'tienda/ticket_form.html', {
+        'form': form,
+        'formset': formset,
+        'media': form.media + formset.media,  # JS/CSS de Select2 una sola vez
+    })
+
+
+@rol_requerido('administrador', 'gerente', 'vendedor', 'admin')
+@login_required
+def reporte_ventas(request):
+    """Muestra el reporte de ventas con filtrado por fechas y estadísticas."""
+
+    # === Filtro de fechas ===
+    inicio, fin, es_periodo = _rango_fechas(request)
+    hoy = timezone.localdate()
+
+    # === Estadísticas (leídas de los resúmenes diarios) ===
+    resumen = resumen_periodo(inicio, fin)
+    total_ventas = resumen['ingresos']
+    cantidad_ventas = resumen['num_ventas']
     promedio_venta = total_ventas / cantidad_ventas if cantidad_ventas else 0
 
+    # === Detalle: una página de ventas con solo las columnas de la tabla ===
+    pagina = pagina_ventas(inicio, fin, cursor=request.GET.get('cursor'))
+
+    # Parámetros para "Siguiente" conservando el periodo (y generar_reporte)
+    parametros = request.GET.copy()
+    parametros.pop('cursor', None)
+    primera_pagina = parametros.urlencode()
+    if pagina['siguiente']:
+        parametros['cursor'] = pagina['siguiente']
+
     context = {
-        'ventas': ventas,
+        'ventas': pagina['ventas'],
+        'es_primera_pagina': not request.GET.get('cursor'),
+        'primera_pagina': primera_pagina,
+        'siguiente_pagina': parametros.urlencode() if pagina['siguiente'] else None,
         'total_ventas_dia': total_ventas,
         'cantidad_ventas': cantidad_ventas,
+        'unidades_vendidas': resumen['unidades'],
         'promedio_venta': promedio_venta,
         'fecha_inicio': inicio.date(),
-        'fecha_fin': fin.date(),         # ← AQUÍ LA CORRECCIÓN REAL
+        'fecha_fin': (fin - timedelta(days=1)).date(),  # El rango es [inicio, fin)
         'fecha_actual': hoy,
         'es_periodo': es_periodo,
     }
 
     # === Reportes adicionales ===
-    if 'generar_reporte' in request.GET and ventas.exists():
+    # Dimensiones pedidas desde el formulario (?dimensiones=cliente&dimensiones=hora...)
+    dimensiones = [d for d in request.GET.getlist('dimensiones') if d in DIMENSIONES_REPORTE]
+    dimensiones = dimensiones or list(DIMENSIONES_POR_DEFECTO)
+    orden = request.GET.get('orden') if request.GET.get('orden') in ORDENES_REPORTE else 'ingresos'
+    context.update({
+        'dimensiones_reporte': DIMENSIONES_REPORTE,
+        'dimensiones_elegidas': dimensiones,
+        'ordenes_reporte': ORDENES_REPORTE,
+        'orden_reporte': orden,
+    })
 
-        clientes_frecuentes = (
-            ventas.annotate(
-                nombre_completo=Concat(
-                    F('cliente__nombre'), Value(' '), F('cliente__apellido')
-                )
-            )
-            .values('nombre_completo')
-            .annotate(
-                total_compras=Count('id'),
-                total_gastado=Sum('total')
-            )
-            .order_by('-total_gastado')[:5]
-        )
+    if 'generar_reporte' in request.GET and cantidad_ventas:
+        # Una consulta por dimensión (agrupando por id) y un in_bulk para los nombres
+        context['reportes'] = reporte_dimensiones(inicio, fin, dimensiones, orden=orden)
+        if 'producto' in dimensiones:
+            # La gráfica se dibuja en el navegador con los datos de reporte_ventas_grafica
+            context['url_grafica'] = f"{reverse('reporte_ventas_grafica')}?inicio={inicio.date()}&fin={context['fecha_fin']}"
 
-        top_productos = (
-            ventas.values('producto__nombre')
-            .annotate(cantidad_total=Sum('cantidad'))
-            .order_by('-cantidad_total')[:5]
-        )
+    # === Permisos ===
+    context['puede_generar_reporte'] = obtener_permisos(request).rol in ['administrador', 'gerente']
 
-        # Gráfica con Plotly
-        df = pd.DataFrame(list(top_productos))
-        if not df.empty:
-            fig = px.bar(
-                df,
-                x='producto__nombre',
-                y='cantidad_total',
-                title='Ventas por Producto',
-                labels={'producto__nombre': 'Producto', 'cantidad_total': 'Cantidad Vendida'}
-            )
-            ventas_por_producto_html = fig.to_html(full_html=False)
-        else:
-            ventas_por_producto_html = None
+    return render(request, 'tienda/reporte_ventas.html', context)
 
-        context.update({
-            'clientes_frecuentes': clientes_frecuentes,
-            'top_productos': top_productos,
-            'ventas_por_producto_html': ventas_por_producto_html,
-        })
 
-    # === Permisos ===
+
+@rol_requerido('administrador', 'gerente', 'admin')
+@login_required
+def reporte_ventas_grafica(request):
+    """Serie JSON de productos más vendidos del periodo (la gráfica se dibuja en el navegador)"""
     try:
-        perfil = request.user.perfil
-        puede_generar_reporte = perfil.rol in ['administrador', 'gerente']
-    except PerfilUsuario.DoesNotExist:
-        puede_generar_reporte = False
+        inicio, fin, es_periodo = _rango_fechas(request, estricto=True)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    respuesta = JsonResponse(serie_top_productos(inicio, fin))
+    # Un periodo que incluye hoy cambia con cada venta: el navegador no lo guarda
+    patch_cache_control(respuesta, private=True, max_age=0 if periodo_abierto(fin) else 300)
+    return respuesta
 
-    context['puede_generar_reporte'] = puede_generar_reporte
 
-    return render(request, 'tienda/reporte_ventas.html', context)
+@rol_requerido('administrador', 'gerente', 'admin')
+@login_required
+def reporte_ventas_serie(request):
+    """
+    Serie JSON de ventas del periodo por intervalo (?granularidad=hora|dia|semana|mes),
+    con el periodo anterior si se pide ?comparar=1
+    """
+    inicio, fin, es_periodo = _rango_fechas(request)
+    try:
+        serie = serie_ventas(inicio, fin, request.GET.get('granularidad', 'dia'),
+                             comparar=request.GET.get('comparar') == '1')
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    respuesta = JsonResponse(serie)
+    patch_cache_control(respuesta, private=True, max_age=0 if periodo_abierto(fin) else 300)
+    return respuesta
 
 
+@rol_requerido('administrador', 'gerente', 'admin')
+@login_required
+def reporte_ventas_exportar(request):
+    """Descarga las ventas del periodo (?inicio&fin) en CSV o XLSX (?formato=xlsx)"""
+    inicio, fin, es_periodo = _rango_fechas(request)
+    fecha_fin = (fin - timedelta(days=1)).date()
+
+    if request.GET.get('formato') == 'xlsx':
+        try:
+            return respuesta_xlsx(inicio, fin, fecha_fin)
+        except ImportError:
+            messages.error(request, 'La exportación a Excel requiere instalar openpyxl (pip install openpyxl)')
+            return redirect(f"{reverse('reporte_ventas')}?inicio={inicio.date()}&fin={fecha_fin}")
+
+    return respuesta_csv(inicio, fin, fecha_fin)
+
 
 @rol_requerido('administrador', 'gerente','admin')
 @login_required
@@ -554,9 +796,13 @@ def venta_nueva(request):
         if form.is_valid():
             venta = form.save(commit=False)
             venta.vendedor = request.user
-            venta.save()
-            messages.success(request, "Venta registrada exitosamente.")
-            return redirect('reporte_ventas')
+            try:
+                registrar_venta(venta)
+            except StockInsuficiente as error:
+                form.add_error('cantidad', str(error))
+            else:
+                messages.success(request, "Venta registrada exitosamente.")
+                return redirect('reporte_ventas')
     else:
         form = VentaForm()
     return render(request, 'tienda/venta_form.html', {'form': form})